@@ -1,42 +1,16 @@
-from colorama import Fore, Style, init
-
-init(autoreset=True)
-
-
-class InvalidInputError(Exception):
-    pass
-
-
-def validate_positive_number(value):
-    try:
-        number = float(value)
-        if number < 0:
-            raise InvalidInputError(
-                "Invalid input. Please enter a non-negative numeric value."
-            )
-        return number
-    except ValueError:
-        raise InvalidInputError("Invalid input. Please enter a numeric value.")
+import argparse
+import contextlib
+import heapq
+import json
+import os
+import sys
+import time
 
+from colorama import Fore, Style, init
 
-def validate_menu_item(item):
-    if not isinstance(item, MenuItem):
-        raise InvalidInputError("Invalid item object provided.")
-
-
-def validate_menu_item_name(item_name):
-    if not isinstance(item_name, str):
-        raise InvalidInputError("Invalid item name provided.")
-
-
-def validate_restaurant(restaurant):
-    if not isinstance(restaurant, Restaurant):
-        raise InvalidInputError("Invalid restaurant object provided.")
-
+import restaurant_core as core
 
-def validate_menu(menu):
-    if not isinstance(menu, Menu):
-        raise InvalidInputError("Invalid menu object provided.")
+init(autoreset=True)
 
 
 def get_integer_input(prompt):
@@ -69,267 +43,486 @@ def get_non_empty_string_input(prompt):
             return value
 
 
-class Restaurant:
-    def __init__(self, name, address, contact_info):
-        self.name = name
-        self.address = address
-        self.contact_info = contact_info
-        self.menu = {}
-        self.order_history = OrderHistory()
-
-    def add_menu(self, menu):
+def get_location_input(prompt):
+    while True:
         try:
-            validate_menu(menu)
-            self.menu = menu
-        except InvalidInputError as e:
-            print(Fore.RED + f"Error: {str(e)}")
-
-    def remove_menu(self):
-        self.menu = {}
-
-    def update_menu(self, menu):
+            return core.parse_location(input(prompt))
+        except core.InvalidInputError as e:
+            print(Fore.RED + str(e))
+
+
+def highlight_for(stream):
+    return (Fore.CYAN, Style.RESET_ALL) if stream.isatty() else None
+
+
+def print_errors(errors):
+    for message in errors:
+        print(Fore.RED + message)
+
+
+def print_ingest_report(report):
+    print(
+        Fore.CYAN + f"Processed {report.received} records in {report.elapsed:.2f}s "
+        f"({report.throughput():,.0f} records/s)."
+    )
+    print(Fore.GREEN + f"Applied: {report.applied}")
+    if report.rejected:
+        print(Fore.RED + f"Rejected: {report.rejected}")
+        for message, count in report.error_counts():
+            print(f"  {count} x {message}")
+        for line_number, message in report.samples:
+            print(f"  line {line_number}: {message}")
+
+
+def load_catalog_file(registry, path):
+    with core.open_input(path) as stream:
+        print_errors(core.load_catalog(registry, stream))
+
+
+def open_rejects(path):
+    if not path:
+        return contextlib.nullcontext()
+    return open(path, "w", encoding="utf-8", buffering=1 << 20)
+
+
+def run_ingest(args, registry=None):
+    if registry is None:
+        registry = core.AccountRegistry()
+    if args.catalog:
+        load_catalog_file(registry, args.catalog)
+    engine = core.OrderEngine(registry, create_customers=args.create_customers)
+    with core.open_input(args.ingest) as stream, open_rejects(args.rejects) as sink:
+        records = core.read_order_records(
+            stream, core.guess_format(args.ingest, args.format)
+        )
+        report = engine.ingest(records, args.batch_size, core.IngestReport(sink=sink))
+    print_ingest_report(report)
+    if args.report:
+        ledger = core.OrderLedger()
+        ledger.attach(registry)
+        print_sales_report(ledger)
+    return engine
+
+
+def print_shard_report(pool, limit=10):
+    revenue = pool.revenue()
+    orders = sum(count for count, _ in revenue.values())
+    total = sum(cents for _, cents in revenue.values())
+    print(Fore.CYAN + f"Orders: {orders}, revenue: {core.format_cents(total)}")
+    print(Fore.GREEN + "Top restaurants by revenue:")
+    ranked = heapq.nlargest(limit, revenue.items(), key=lambda pair: pair[1][1])
+    for i, (contact_info, (count, cents)) in enumerate(ranked, start=1):
+        print(f"{i}. {contact_info} - {core.format_cents(cents)} in {count} orders")
+    print(Fore.GREEN + "Best-selling items:")
+    counts = pool.item_counts()
+    ranked = heapq.nlargest(limit, counts.items(), key=lambda pair: pair[1])
+    for i, (item_name, quantity) in enumerate(ranked, start=1):
+        print(f"{i}. {item_name} - {quantity} sold")
+
+
+def run_sharded_ingest(args):
+    catalog = []
+    if args.catalog:
+        with core.open_input(args.catalog) as stream:
+            catalog = stream.readlines()
+    with core.ShardPool(args.shards, catalog, (), args.create_customers) as pool:
+        print_errors(pool.catalog_errors())
+        with core.open_input(args.ingest) as stream:
+            records = core.read_order_records(
+                stream, core.guess_format(args.ingest, args.format)
+            )
+            report = pool.ingest(records, batch_size=args.batch_size)
+        print_ingest_report(report)
+        if args.report:
+            print_shard_report(pool)
+    return report
+
+
+def print_sales_report(ledger, restaurant=None, limit=10):
+    start = time.perf_counter()
+    item_revenue = ledger.revenue_per_item(restaurant)
+    restaurant_revenue = {} if restaurant else ledger.revenue_per_restaurant()
+    buckets = ledger.orders_per_bucket(3600, restaurant)
+    basket = ledger.average_basket_size(restaurant)
+    elapsed = time.perf_counter() - start
+    if not item_revenue:
+        print(Fore.YELLOW + "No orders found in the history.")
+        return
+    revenue_by_name = {}
+    for item, revenue in item_revenue.items():
+        revenue_by_name[item.name] = revenue_by_name.get(item.name, 0) + revenue
+    print(Fore.GREEN + "Revenue per item:")
+    for item_name, revenue in heapq.nlargest(
+        limit, revenue_by_name.items(), key=lambda pair: pair[1]
+    ):
+        print(f"{item_name} - {core.format_cents(revenue)}")
+    if restaurant_revenue:
+        print(Fore.GREEN + "Revenue per restaurant:")
+        for account, revenue in heapq.nlargest(
+            limit, restaurant_revenue.items(), key=lambda pair: pair[1]
+        ):
+            print(f"{account.name} - {core.format_cents(revenue)}")
+    print(Fore.GREEN + "Orders per hour:")
+    for start_time, count in sorted(buckets.items())[-limit:]:
+        print(
+            time.strftime("%Y-%m-%d %H:00", time.localtime(start_time)),
+            "-",
+            count,
+        )
+    print(Fore.GREEN + f"Average basket size: {basket:.2f} items")
+    print(Fore.CYAN + f"Report computed in {elapsed * 1000:.1f} ms.")
+
+
+def print_trending(tracker, restaurant=None, limit=10):
+    for span in sorted(tracker.windows):
+        if span % 3600 == 0:
+            label = f"{span // 3600} hours"
+        else:
+            label = f"{span // 60} minutes"
+        print(Fore.GREEN + f"Trending in the last {label}:")
+        top = tracker.top(span, limit, restaurant)
+        if not top:
+            print(Fore.YELLOW + "No orders in this period.")
+        for i, (item_name, quantity) in enumerate(top, start=1):
+            print(f"{i}. {item_name} - about {quantity} sold")
+
+
+def run_server(args, registry=None, store=None):
+    if registry is None:
+        registry = core.AccountRegistry()
+    if args.catalog:
+        load_catalog_file(registry, args.catalog)
+    service = core.OrderService(registry, args.stripes, args.create_customers, store)
+    with core.OrderServer((args.host, args.port), service) as server:
+        host, port = server.server_address[:2]
+        print(Fore.GREEN + f"Serving orders on {host}:{port} (press Ctrl+C to stop).")
         try:
-            validate_menu(menu)
-            self.menu = menu
-        except InvalidInputError as e:
-            print(Fore.RED + f"Error: {str(e)}")
-
-    def get_menu(self):
-        return self.menu
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(Fore.YELLOW + "Server stopped.")
+
+
+def print_load_test(result):
+    elapsed = result["elapsed_s"]
+    print(
+        Fore.CYAN + f"Placed {result['placed']} orders from {result['clients']} "
+        f"clients in {elapsed:.2f}s ({result['placed'] / elapsed:,.0f} orders/s)."
+    )
+    print(
+        Fore.CYAN + f"{result['retries']} retried requests returned their "
+        "original order."
+    )
+    failures = result["failures"]
+    if failures:
+        print(Fore.RED + f"{len(failures)} problems found:")
+        for message in failures[:20]:
+            print(f"  {message}")
+    else:
+        print(Fore.GREEN + "No lost or duplicated orders.")
+
+
+def print_login_benchmark(results):
+    print(Fore.CYAN + "Login lookup latency (list scan vs. registry):")
+    for result in results:
+        print(f"{result['accounts']:>9,} accounts:")
+        for kind, label in (
+            ("restaurant", "restaurant login:"),
+            ("customer", "customer login:"),
+        ):
+            scan = result[f"{kind}_scan_s"]
+            hashed = result[f"{kind}_registry_s"]
+            print(
+                f"  {label:<17} scan {scan * 1e6:12.1f} us, "
+                f"registry {hashed * 1e6:6.2f} us ({scan / hashed:,.0f}x)"
+            )
 
-    def get_order_history(self):
-        return self.order_history
 
+def print_memory_benchmark(results, lines_per_order=3):
+    print(Fore.CYAN + f"Order memory with {lines_per_order} lines per order:")
+    for result in results:
+        size = result["orders"]
+        before = result["before_bytes"]
+        after = result["after_bytes"]
+        print(
+            f"{size:>9,} orders: before {before / 2**20:9.1f} MiB "
+            f"({before / size:5.0f} B/order), after {after / 2**20:9.1f} MiB "
+            f"({after / size:5.0f} B/order), {1 - after / before:.0%} smaller"
+        )
+
+
+def print_search_benchmark(result):
+    items = result["items"]
+    build = result["build_s"]
+    print(
+        Fore.CYAN + f"Indexed {items:,} menu items in {build:.1f}s "
+        f"({items / build:,.0f} items/s)."
+    )
+    for name, stats in result["operations"].items():
+        print(
+            f"  {name:<16} p50 {stats['p50_us']:8.1f} us, "
+            f"p99 {stats['p99_us']:8.1f} us"
+        )
+
+
+def print_feed_benchmark(result):
+    print(
+        Fore.CYAN + f"Placed {result['orders']:,} orders: "
+        f"{result['baseline_orders_per_s']:,.0f} orders/s without the feed, "
+        f"{result['feed_orders_per_s']:,.0f} orders/s with it."
+    )
+    print(
+        f"  {result['published']:,} events published, "
+        f"{result['inbox_dropped']:,} dropped from the inbox"
+    )
+    for stats in result["subscriptions"]:
+        print(
+            f"  {stats['name']:<16} {stats['policy']:<12} "
+            f"delivered {stats['delivered']:>8,}, dropped {stats['dropped']:>8,}, "
+            f"coalesced {stats['coalesced']:>8,}"
+        )
+
+
+def print_kitchen_simulation(result):
+    print(
+        Fore.CYAN + f"Simulated {result['orders']:,} orders on {result['stations']} "
+        f"stations over {result['simulated_hours']:,.1f} hours: "
+        f"{result['throughput_per_hour']:,.1f} orders/hour, "
+        f"{result['utilization']:.0%} station utilization."
+    )
+    print(
+        f"  wait mean {result['wait_mean_s'] / 60:8.1f} min, "
+        f"p50 {result['wait_p50_s'] / 60:8.1f} min, "
+        f"p95 {result['wait_p95_s'] / 60:8.1f} min, "
+        f"max {result['wait_max_s'] / 60:8.1f} min"
+    )
+    print(
+        f"  max queue depth {result['max_queue_depth']:,}, "
+        f"{result['late']:,} orders late ({result['late'] / result['orders']:.0%})"
+    )
+    print(
+        f"  scheduler: {result['operations_per_s']:,.0f} operations/s "
+        f"({result['scheduling_s']:.2f}s in total)"
+    )
+
+
+def print_profile(profiler, limit=25, path=None):
+    import pstats
+
+    if path:
+        profiler.dump_stats(path)
+        print(Fore.GREEN + f"Profile written to {path}.")
+    stats = pstats.Stats(profiler, stream=sys.stdout)
+    stats.sort_stats("cumulative").print_stats(limit)
+
+
+PAGE_SIZE = 20
+
+
+def print_comparison(baseline, current, threshold=0.10):
+    if baseline.get("parameters") != current["parameters"]:
+        print(Fore.YELLOW + "Warning: the baseline used different workload parameters.")
+    print(
+        Fore.CYAN
+        + f"{'operation':<20} {'baseline p50':>13} {'current p50':>13} {'change':>8}"
+    )
+    regressions = []
+    for name, before, after, change, regressed in core.compare_benchmarks(
+        baseline, current, threshold
+    ):
+        if before is None:
+            print(f"{name:<20} {'-':>13} {after:>11.3f}us {'new':>8}")
+            continue
+        color = Fore.RED if regressed else ""
+        print(color + f"{name:<20} {before:>11.3f}us {after:>11.3f}us {change:>+8.0%}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def run_benchmark_suite(args):
+    result = core.benchmark_suite(
+        args.restaurants,
+        args.customers,
+        args.menu_size,
+        args.orders,
+        args.skew,
+        args.seed,
+        startup_script=os.path.abspath(__file__),
+    )
+    text = json.dumps(result, indent=2)
+    if args.bench_output:
+        with open(args.bench_output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(Fore.GREEN + f"Benchmark results written to {args.bench_output}.")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            return print_comparison(json.load(f), result)
+    return []
+
+
+def run_startup_benchmark(runs=10):
+    bench = core.BenchmarkRecorder()
+    eager_modules = core.benchmark_startup(bench, runs, os.path.abspath(__file__))
+    print(Fore.CYAN + f"Cold start over {runs} runs:")
+    for name, stats in bench.summary().items():
+        print(
+            f"  {name:<16} p50 {stats['p50_us'] / 1000:8.1f} ms, "
+            f"max {stats['max_us'] / 1000:8.1f} ms"
+        )
+    if eager_modules:
+        print(Fore.RED + f"The core imported {', '.join(eager_modules)} eagerly.")
+    else:
+        print(Fore.GREEN + "The core loaded no terminal or optional modules.")
+    return eager_modules
+
+
+def confirm_more():
+    return input(Fore.YELLOW + "Show more orders? (yes/no): ").lower() == "yes"
+
+
+def export_history(registry, contact_info, path):
+    restaurant = registry.find_restaurant(contact_info)
+    if restaurant is None:
+        print(Fore.RED + "Unknown restaurant phone number.")
+        return
+    start = time.perf_counter()
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as stream:
+        core.render_orders(
+            restaurant.order_history.orders.values(), stream, separator=True
+        )
+    elapsed = time.perf_counter() - start
+    print(
+        Fore.GREEN
+        + f"Exported {len(restaurant.order_history.orders)} orders to {path} "
+        f"in {elapsed:.2f}s."
+    )
+
+
+def import_menu_file(restaurant, path, file_format=None, batch_size=1000, rejects=None):
+    importer = core.MenuImporter(restaurant)
+    with core.open_input(path) as stream, open_rejects(rejects) as sink:
+        records = core.read_order_records(stream, core.guess_format(path, file_format))
+        report = importer.ingest(records, batch_size, core.IngestReport(sink=sink))
+    print_ingest_report(report)
+    return report
+
+
+def export_menu_file(restaurant, path, file_format=None):
+    start = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as stream:
+        count = core.export_menu(
+            restaurant.menu, stream, core.guess_format(path, file_format)
+        )
+    elapsed = time.perf_counter() - start
+    print(Fore.GREEN + f"Exported {count} menu items to {path} in {elapsed:.2f}s.")
+
+
+def run_menu_transfer(args, registry=None):
+    if registry is None:
+        registry = core.AccountRegistry()
+    if args.catalog:
+        load_catalog_file(registry, args.catalog)
+    restaurant = registry.find_restaurant(args.import_menu or args.export_menu)
+    if restaurant is None:
+        print(Fore.RED + "Unknown restaurant phone number.")
+        return None
+    if args.import_menu:
+        return import_menu_file(
+            restaurant, args.input, args.format, args.batch_size, args.rejects
+        )
+    export_menu_file(restaurant, args.output or "menu.jsonl", args.format)
+    return None
+
+
+def print_suggestions(recommender, restaurant, order_items):
+    suggestions = recommender.suggest(restaurant, order_items)
+    if not suggestions:
+        return
+    print(Fore.CYAN + "Frequently ordered together:")
+    for item, count in suggestions:
+        orders = "order" if count == 1 else "orders"
+        print(
+            f"- {item.name} - {core.format_cents(item.price_cents)} ({count} {orders})"
+        )
+
+
+def place_order_interactively(customer, restaurant, order_items=None, recommender=None):
+    if order_items is None:
+        order_items = {}
 
-class Menu:
-    def __init__(self):
-        self.items = {}
+    while True:
+        if recommender is not None and order_items:
+            print_suggestions(recommender, restaurant, order_items)
+        menu = restaurant.get_menu()
+        if not menu:
+            print(Fore.YELLOW + "No items in the menu.")
+            break
 
-    def add_item(self, item):
-        try:
-            validate_menu_item(item)
-            self.items[item.name] = item
-        except InvalidInputError as e:
-            print(Fore.RED + f"Error: {str(e)}")
+        print(Fore.GREEN + "Menu Items:")
+        sys.stdout.write(menu.render())
 
-    def remove_item(self, item_name):
+        print(Fore.YELLOW + "Select an item and quantity (or '0' to place the order):")
         try:
-            validate_menu_item_name(item_name)
-            if item_name in self.items:
-                del self.items[item_name]
-                print(Fore.GREEN + "Item removed from the menu.")
-            else:
-                raise ValueError(Fore.RED + "Item not found in the menu.")
-        except (InvalidInputError, ValueError) as e:
-            print(Fore.RED + f"Error: {str(e)}")
+            selected_item_index = int(input("Item number: ")) - 1
+        except ValueError:
+            print(Fore.RED + "Invalid input. Please enter a valid item number.")
+            continue
 
-    def update_item(self, item_name, new_description, new_price):
-        try:
-            if not all(isinstance(arg, str) for arg in [item_name, new_description]):
-                raise TypeError(Fore.RED + "Invalid arguments provided.")
-            if not isinstance(new_price, (int, float)) or new_price < 0:
-                raise ValueError(
-                    Fore.RED
-                    + "Invalid price. Please enter a non-negative numeric value."
-                )
-            if item_name in self.items:
-                item = self.items[item_name]
-                item.description = new_description
-                item.price = new_price
+        if selected_item_index == -1:
+            if len(order_items) == 0:
+                print(Fore.YELLOW + "No items selected in the order.")
             else:
-                raise ValueError(Fore.RED + "Item not found in the menu.")
-        except (TypeError, ValueError) as e:
-            print(Fore.RED + f"Error: {str(e)}")
-
-    def get_items(self):
-        return self.items
-
-
-class MenuItem:
-    def __init__(self, name, description, price):
-        self.name = name
-        self.description = description
-        self.price = price
-
-
-class Customer:
-    def __init__(self, name, address, contact_info):
-        self.name = name
-        self.address = address
-        self.contact_info = contact_info
-        self.order_history = []
-
-    def place_order(self, restaurant, order_items=None):
-        try:
-            validate_restaurant(restaurant)
-
-            if order_items is None:
-                order_items = {}
-
-            while True:
-                menu = restaurant.get_menu()
-                if not menu:
-                    print(Fore.YELLOW + "No items in the menu.")
-                    break
-
-                print(Fore.GREEN + "Menu Items:")
-                for i, (item_name, item) in enumerate(
-                    menu.get_items().items(), start=1
-                ):
-                    print(f"{i}. {item_name} - {item.price}")
-
-                print(
-                    Fore.YELLOW
-                    + "Select an item and quantity (or '0' to place the order):"
-                )
-                try:
-                    selected_item_index = int(input("Item number: ")) - 1
-                except ValueError:
-                    print(Fore.RED + "Invalid input. Please enter a valid item number.")
-                    continue
-
-                if selected_item_index == -1:
-                    if len(order_items) == 0:
-                        print(Fore.YELLOW + "No items selected in the order.")
-                    else:
-                        print(Fore.CYAN + "Review Order:")
-                        for item, quantity in order_items.items():
-                            print(f"{item.name} - Quantity: {quantity}")
-                        confirm = input(
-                            Fore.YELLOW + "Confirm order (yes/no): "
-                        ).lower()
-                        if confirm == "yes":
-                            order = Order(self, restaurant, order_items)
-                            self.order_history.append(order)
-                            restaurant.order_history.add_order(order)
-
-                            print(Fore.CYAN + "Selected Items and Quantities:")
-                            for item, quantity in order_items.items():
-                                print(f"{item.name} - Quantity: {quantity}")
-
-                            print(Fore.GREEN + "Order placed successfully.")
-                        else:
-                            print(Fore.YELLOW + "Order canceled.")
+                print(Fore.CYAN + "Review Order:")
+                for item, quantity in order_items.items():
+                    print(f"{item.name} - Quantity: {quantity}")
+                confirm = input(Fore.YELLOW + "Confirm order (yes/no): ").lower()
+                if confirm == "yes":
+                    try:
+                        customer.place_order(restaurant, order_items)
+                    except core.InvalidInputError as e:
+                        print(Fore.RED + f"Error: {str(e)}")
                         break
 
-                if selected_item_index < 0 or selected_item_index >= len(
-                    menu.get_items()
-                ):
-                    print(Fore.RED + "Invalid item selection.")
-                    continue
-
-                selected_item = list(menu.get_items().values())[selected_item_index]
-                try:
-                    quantity = int(input("Enter the quantity: "))
-                except ValueError:
-                    print(Fore.RED + "Invalid input. Please enter a valid quantity.")
-                    continue
-
-                if quantity <= 0:
-                    print(Fore.RED + "Quantity must be a positive integer.")
-                    continue
-
-                if selected_item in order_items:
-                    order_items[selected_item] += quantity
+                    print(Fore.CYAN + "Selected Items and Quantities:")
+                    for item, quantity in order_items.items():
+                        print(f"{item.name} - Quantity: {quantity}")
+
+                    print(Fore.GREEN + "Order placed successfully.")
                 else:
-                    order_items[selected_item] = quantity
+                    print(Fore.YELLOW + "Order canceled.")
+                break
 
-        except InvalidInputError as e:
-            print(Fore.RED + f"Error: {str(e)}")
+        if selected_item_index < 0 or selected_item_index >= len(menu.get_items()):
+            print(Fore.RED + "Invalid item selection.")
+            continue
 
-    def view_order_history(self):
-        if len(self.order_history) == 0:
-            print(Fore.YELLOW + "No order history found.")
-        else:
-            for order in self.order_history:
-                print(Fore.CYAN + "Order from:", order.restaurant.name)
-                print("Restaurant Address:", order.restaurant.address)
-                print("Restaurant Contact Info:", order.restaurant.contact_info)
-                print("Customer:", order.customer.name)
-                print("Customer Address:", order.customer.address)
-                print("Customer Contact Info:", order.customer.contact_info)
-                print(Fore.CYAN + "Items:")
-                for item in order.items:
-                    print(Fore.CYAN + item.name, "-", item.price)
-                print("Total price:", order.total_price)
-
-
-class Order:
-    def __init__(self, customer, restaurant, items):
-        self.customer = customer
-        self.restaurant = restaurant
-        self.items = items
-        self.quantities = {item: quantity for item, quantity in items.items()}
-        self.total_price = self.calculate_total_price()
-
-    def calculate_total_price(self):
-        total = 0
-        for item, quantity in self.items.items():
-            total += item.price * quantity
-        return total
-
-    def add_item(self, item):
+        selected_item = menu.get_item_at(selected_item_index)
         try:
-            validate_menu_item(item)
-            self.items.append(item)
-            self.total_price = self.calculate_total_price()
-            print(Fore.GREEN + "Item added to the order.")
-        except InvalidInputError as e:
-            print(Fore.RED + f"Error: {str(e)}")
-
-    def remove_item(self, item):
-        if item in self.items:
-            self.items.remove(item)
-            self.total_price = self.calculate_total_price()
-            print(Fore.GREEN + "Item removed from the order.")
-        else:
-            print(Fore.RED + "Item not found in the order.")
-
-
-class OrderHistory:
-    def __init__(self):
-        self.orders = []
+            quantity = int(input("Enter the quantity: "))
+        except ValueError:
+            print(Fore.RED + "Invalid input. Please enter a valid quantity.")
+            continue
 
-    def add_order(self, order):
-        self.orders.append(order)
-        print(Fore.GREEN + "Order added to the history.")
+        if quantity <= 0:
+            print(Fore.RED + "Quantity must be a positive integer.")
+            continue
 
-    def remove_order(self, order):
-        if order in self.orders:
-            self.orders.remove(order)
-            print(Fore.GREEN + "Order removed from the history.")
+        if selected_item in order_items:
+            order_items[selected_item] += quantity
         else:
-            print(Fore.RED + "Order not found in the history.")
+            order_items[selected_item] = quantity
 
-    def view_orders(self):
-        if len(self.orders) == 0:
-            print(Fore.YELLOW + "No orders found in the history.")
-        else:
-            for order in self.orders:
-                print(Fore.CYAN + "Order from:", order.restaurant.name)
-                print("Restaurant Address:", order.restaurant.address)
-                print("Restaurant Contact Info:", order.restaurant.contact_info)
-                print("Customer:", order.customer.name)
-                print("Customer Address:", order.customer.address)
-                print("Customer Contact Info:", order.customer.contact_info)
-                print(Fore.CYAN + "Items:")
-                for item in order.items:
-                    print(Fore.CYAN + item.name, "-", item.price)
-                print("Total price:", order.total_price)
-                print()
-
-    def count_item_orders(self, item_name):
-        count = 0
-        for order in self.orders:
-            for item in order.items:
-                if item.name == item_name:
-                    count += 1
-        return count
-
-
-def main():
-    restaurants = []
-    customers = []
+
+def main(registry=None):
+    if registry is None:
+        registry = core.AccountRegistry()
+    ledger = None
+    recommender = None
+    trending = None
+    search_index = core.MenuSearchIndex()
+    search_index.attach(registry)
     selected_restaurant = None
     customer = None
     while True:
@@ -351,24 +544,23 @@ def main():
                 if selected_restaurant is None:
                     contact_info = input(Fore.YELLOW + "Enter the phone number: ")
 
-                    matching_restaurants = [
-                        restaurant
-                        for restaurant in restaurants
-                        if restaurant.contact_info.lower() == contact_info.lower()
-                    ]
+                    try:
+                        selected_restaurant = registry.find_restaurant(contact_info)
+                    except core.InvalidInputError as e:
+                        print(Fore.RED + f"Error: {str(e)}")
+                        continue
 
-                    if matching_restaurants:
-                        selected_restaurant = matching_restaurants[0]
+                    if selected_restaurant is not None:
                         print(Fore.GREEN + "Restaurant login successful.")
                     else:
                         restaurant_name = input("Enter the restaurant name: ")
                         address = input("Enter the restaurant address: ")
-                        selected_restaurant = Restaurant(
-                            restaurant_name, address, contact_info
+                        location = get_location_input(
+                            "Enter the restaurant location as x,y (leave blank to skip): "
+                        )
+                        selected_restaurant = registry.create_restaurant(
+                            restaurant_name, address, contact_info, location
                         )
-                        selected_restaurant.menu = Menu()
-                        selected_restaurant.order_history = OrderHistory()
-                        restaurants.append(selected_restaurant)
                         print(
                             Fore.GREEN + "New restaurant account created and logged in."
                         )
@@ -380,6 +572,8 @@ def main():
                     print(Fore.CYAN + "3- Update item in menu")
                     print(Fore.GREEN + "4- Display menu")
                     print(Fore.YELLOW + "5- Order history")
+                    print(Fore.MAGENTA + "6- Import menu from file")
+                    print(Fore.BLUE + "7- Export menu to file")
                     print(Fore.RED + "L- Log out")
                     option = input()
 
@@ -402,19 +596,21 @@ def main():
                                 + "Invalid price. Please enter a numeric value."
                             )
 
-                        item = MenuItem(item_name, item_description, item_price)
-                        selected_restaurant.menu.add_item(item)
-                        print(Fore.GREEN + "Item added to the menu.")
+                        try:
+                            selected_restaurant.menu.add_item(
+                                core.MenuItem(item_name, item_description, item_price)
+                            )
+                        except core.InvalidInputError as e:
+                            print(Fore.RED + f"Error: {str(e)}")
+                        else:
+                            print(Fore.GREEN + "Item added to the menu.")
 
                     elif option == 2:
                         if not selected_restaurant.menu.get_items():
                             print(Fore.YELLOW + "No items in the menu.")
                         else:
                             print(Fore.GREEN + "Menu Items:")
-                            for i, (item_name, item) in enumerate(
-                                selected_restaurant.menu.get_items().items(), start=1
-                            ):
-                                print(f"{i}. {item_name} - {item.price}")
+                            sys.stdout.write(selected_restaurant.menu.render())
 
                             item_index = 0
                             try:
@@ -432,20 +628,24 @@ def main():
                             ):
                                 print(Fore.RED + "Invalid item selection.")
                             else:
-                                selected_item = list(
-                                    selected_restaurant.menu.get_items().values()
-                                )[item_index]
-                                selected_restaurant.menu.remove_item(selected_item.name)
+                                selected_item = selected_restaurant.menu.get_item_at(
+                                    item_index
+                                )
+                                try:
+                                    selected_restaurant.menu.remove_item(
+                                        selected_item.name
+                                    )
+                                except core.InvalidInputError as e:
+                                    print(Fore.RED + f"Error: {str(e)}")
+                                else:
+                                    print(Fore.GREEN + "Item removed from the menu.")
 
                     elif option == 3:
                         if not selected_restaurant.menu.get_items():
                             print(Fore.YELLOW + "No items in the menu.")
                         else:
                             print(Fore.GREEN + "Menu Items:")
-                            for i, (item_name, item) in enumerate(
-                                selected_restaurant.menu.get_items().items(), start=1
-                            ):
-                                print(f"{i}. {item_name} - {item.price}")
+                            sys.stdout.write(selected_restaurant.menu.render())
 
                             item_index = 0
                             try:
@@ -463,9 +663,9 @@ def main():
                             ):
                                 print(Fore.RED + "Invalid item selection.")
                             else:
-                                selected_item = list(
-                                    selected_restaurant.menu.get_items().values()
-                                )[item_index]
+                                selected_item = selected_restaurant.menu.get_item_at(
+                                    item_index
+                                )
 
                                 new_description = input(
                                     f"Enter the new description for {selected_item.name}: "
@@ -483,12 +683,16 @@ def main():
                                         + "Invalid price. Please enter a numeric value."
                                     )
 
-                                selected_restaurant.menu.update_item(
-                                    selected_item.name,
-                                    new_description,
-                                    new_price,
-                                )
-                                print(Fore.GREEN + "Item updated.")
+                                try:
+                                    selected_restaurant.menu.update_item(
+                                        selected_item.name,
+                                        new_description,
+                                        new_price,
+                                    )
+                                except core.InvalidInputError as e:
+                                    print(Fore.RED + f"Error: {str(e)}")
+                                else:
+                                    print(Fore.GREEN + "Item updated.")
 
                     elif option == 4:
                         items = selected_restaurant.menu.get_items()
@@ -496,15 +700,15 @@ def main():
                             print(Fore.YELLOW + "No items in the menu.")
                         else:
                             print(Fore.GREEN + "Menu Items:")
-                            for i, (item_name, item) in enumerate(
-                                items.items(), start=1
-                            ):
-                                print(f"{i}. {item_name} - {item.price}")
+                            sys.stdout.write(selected_restaurant.menu.render())
 
                     elif option == 5:
                         print(Fore.YELLOW + "Select the desired option:")
                         print(Fore.CYAN + "1- Count of item orders")
                         print(Fore.GREEN + "2- View all orders with details")
+                        print(Fore.MAGENTA + "3- Best sellers")
+                        print(Fore.BLUE + "4- Sales report")
+                        print(Fore.CYAN + "5- Trending items")
                         sub_option = input()
 
                         sub_option = int(sub_option)
@@ -519,10 +723,9 @@ def main():
                                 print(Fore.YELLOW + "No items in the menu.")
                             else:
                                 print(Fore.GREEN + "Menu Items:")
-                                for i, (item_name, item) in enumerate(
-                                    menu_items.items(), start=1
-                                ):
-                                    print(f"{i}. {item_name}")
+                                sys.stdout.write(
+                                    selected_restaurant.menu.render(with_prices=False)
+                                )
 
                                 item_index = 0
                                 try:
@@ -543,9 +746,9 @@ def main():
                                 if item_index < 0 or item_index >= len(menu_items):
                                     print(Fore.RED + "Invalid item selection.")
                                 else:
-                                    selected_item = list(menu_items.values())[
-                                        item_index
-                                    ]
+                                    selected_item = (
+                                        selected_restaurant.menu.get_item_at(item_index)
+                                    )
                                     count = selected_restaurant.order_history.count_item_orders(
                                         selected_item.name
                                     )
@@ -555,11 +758,73 @@ def main():
                                     )
 
                         elif sub_option == 2:
-                            selected_restaurant.order_history.view_orders()
+                            history = selected_restaurant.order_history
+                            if not history.orders:
+                                print(Fore.YELLOW + "No orders found in the history.")
+                            cursor = 0
+                            while cursor is not None:
+                                cursor = history.view_orders(
+                                    cursor,
+                                    PAGE_SIZE,
+                                    sys.stdout,
+                                    highlight_for(sys.stdout),
+                                )
+                                if cursor is not None and not confirm_more():
+                                    break
+
+                        elif sub_option == 3:
+                            best_sellers = (
+                                selected_restaurant.order_history.best_sellers()
+                            )
+                            if not best_sellers:
+                                print(Fore.YELLOW + "No orders found in the history.")
+                            else:
+                                print(Fore.GREEN + "Best sellers:")
+                                history = selected_restaurant.order_history
+                                for i, (item_name, quantity) in enumerate(
+                                    best_sellers, start=1
+                                ):
+                                    orders = history.count_item_orders(item_name)
+                                    print(
+                                        f"{i}. {item_name} - {quantity} sold in {orders} orders"
+                                    )
+
+                        elif sub_option == 4:
+                            if ledger is None:
+                                try:
+                                    ledger = core.OrderLedger()
+                                    ledger.attach(registry)
+                                except ImportError:
+                                    print(
+                                        Fore.RED + "Sales reports require NumPy "
+                                        "(pip install numpy)."
+                                    )
+                            if ledger is not None:
+                                print_sales_report(ledger, selected_restaurant)
+
+                        elif sub_option == 5:
+                            if trending is None:
+                                trending = core.TrendingTracker()
+                                trending.attach(registry)
+                            print_trending(trending, selected_restaurant)
 
                         else:
                             print(Fore.RED + "Invalid option. Please try again.")
 
+                    elif option == 6:
+                        path = input("Enter the menu file path (.csv or .jsonl): ")
+                        try:
+                            import_menu_file(selected_restaurant, path)
+                        except OSError as e:
+                            print(Fore.RED + f"Error: {str(e)}")
+
+                    elif option == 7:
+                        path = input("Enter the output file path (.csv or .jsonl): ")
+                        try:
+                            export_menu_file(selected_restaurant, path)
+                        except OSError as e:
+                            print(Fore.RED + f"Error: {str(e)}")
+
                     else:
                         print(Fore.RED + "Invalid option. Please try again.")
 
@@ -567,26 +832,31 @@ def main():
                 if customer is None:
                     contact_info = input(Fore.YELLOW + "Enter your phone number: ")
 
-                    existing_customer = None
-                    for c in customers:
-                        if c.contact_info == contact_info:
-                            existing_customer = c
-                            break
+                    try:
+                        customer = registry.find_customer(contact_info)
+                    except core.InvalidInputError as e:
+                        print(Fore.RED + f"Error: {str(e)}")
+                        continue
 
-                    if existing_customer:
-                        customer = existing_customer
+                    if customer is not None:
                         print(Fore.GREEN + "Customer login successful.")
                     else:
                         customer_name = input("Enter your name: ")
                         address = input("Enter your address: ")
-                        customer = Customer(customer_name, address, contact_info)
-                        customers.append(customer)
+                        location = get_location_input(
+                            "Enter your location as x,y (leave blank to skip): "
+                        )
+                        customer = registry.create_customer(
+                            customer_name, address, contact_info, location
+                        )
                         print(Fore.GREEN + "New customer registered and logged in.")
 
                 while True:
                     print(Fore.YELLOW + "Select the desired option:")
                     print(Fore.CYAN + "1- Nearby restaurants")
                     print(Fore.GREEN + "2- View order history")
+                    print(Fore.MAGENTA + "3- Search menus")
+                    print(Fore.BLUE + "4- Trending items")
                     print(Fore.RED + "L- Log out")
                     option = input()
 
@@ -602,17 +872,12 @@ def main():
                             print(Fore.RED + "Please register as a customer first.")
                             continue
 
-                        matching_restaurants = [
-                            restaurant
-                            for restaurant in restaurants
-                            if restaurant.address.lower() == customer.address.lower()
-                        ]
+                        matching_restaurants = registry.nearby_restaurants(
+                            customer, core.NEARBY_RADIUS, core.NEARBY_LIMIT
+                        )
 
                         if not matching_restaurants:
-                            print(
-                                Fore.YELLOW
-                                + "No restaurants found with the same address."
-                            )
+                            print(Fore.YELLOW + "No restaurants found nearby.")
                             continue
 
                         print(Fore.GREEN + "Available Restaurants:")
@@ -660,10 +925,7 @@ def main():
                                     items = menu.get_items()
                                     if items:
                                         print(Fore.GREEN + "Menu Items:")
-                                        for i, (item_name, item) in enumerate(
-                                            items.items(), start=1
-                                        ):
-                                            print(f"{i}. {item_name} - {item.price}")
+                                        sys.stdout.write(menu.render())
                                         selected_item_index = 0
                                         try:
                                             selected_item_index = (
@@ -682,15 +944,21 @@ def main():
                                             print(Fore.RED + "Invalid item selection.")
                                             continue
 
-                                        selected_item = list(items.values())[
+                                        selected_item = menu.get_item_at(
                                             selected_item_index
-                                        ]
+                                        )
                                         quantity = get_integer_input(
                                             "Enter the quantity for the selected item: "
                                         )
                                         order_items = {selected_item: quantity}
-                                        customer.place_order(
-                                            selected_restaurant, order_items
+                                        if recommender is None:
+                                            recommender = core.CoOccurrenceIndex()
+                                            recommender.attach(registry)
+                                        place_order_interactively(
+                                            customer,
+                                            selected_restaurant,
+                                            order_items,
+                                            recommender,
                                         )
 
                                     else:
@@ -701,18 +969,21 @@ def main():
                                     )
 
                             elif option == 2:
-                                order = (
-                                    customer.order_history[-1]
-                                    if customer.order_history
-                                    else None
-                                )
+                                order = customer.order_history.latest()
 
                                 if order:
-                                    items = order.items
+                                    items = list(order.iter_priced_lines())
                                     if items:
                                         print(Fore.GREEN + "Order Items:")
-                                        for i, item in enumerate(items, start=1):
-                                            print(f"{i}. {item.name} - {item.price}")
+                                        for i, (
+                                            item,
+                                            quantity,
+                                            unit_cents,
+                                        ) in enumerate(items, start=1):
+                                            print(
+                                                f"{i}. {item.name} - "
+                                                f"{core.format_cents(unit_cents)} x {quantity}"
+                                            )
                                         selected_item_index = 0
                                         try:
                                             selected_item_index = (
@@ -732,7 +1003,7 @@ def main():
                                             print(Fore.RED + "Invalid item selection.")
                                             continue
 
-                                        selected_item = items[selected_item_index]
+                                        selected_item = items[selected_item_index][0]
                                         order.remove_item(selected_item)
                                         print(
                                             Fore.GREEN + "Item removed from the order."
@@ -743,14 +1014,10 @@ def main():
                                     print(Fore.RED + "No order placed yet.")
 
                             elif option == 3:
-                                order = (
-                                    customer.order_history[-1]
-                                    if customer.order_history
-                                    else None
-                                )
+                                order = customer.order_history.latest()
 
                                 if order:
-                                    total_price = order.calculate_total_price()
+                                    total_price = core.format_cents(order.total_cents)
                                     print(
                                         Fore.GREEN + f"Customer Name: {customer.name}"
                                     )
@@ -760,8 +1027,16 @@ def main():
                                         + f"Contact Info: {customer.contact_info}"
                                     )
                                     print(Fore.CYAN + "Order Items:")
-                                    for item in order.items:
-                                        print(Fore.CYAN + f"{item.name} - {item.price}")
+                                    for (
+                                        item,
+                                        quantity,
+                                        unit_cents,
+                                    ) in order.iter_priced_lines():
+                                        print(
+                                            Fore.CYAN
+                                            + f"{item.name} - {core.format_cents(unit_cents)}"
+                                            f" x {quantity}"
+                                        )
                                     print(Fore.GREEN + f"Total Price: {total_price}")
                                 else:
                                     print(Fore.YELLOW + "No order placed yet.")
@@ -774,7 +1049,38 @@ def main():
                             print(Fore.RED + "Please register as a customer first.")
                             continue
 
-                        customer.view_order_history()
+                        if not customer.order_history:
+                            print(Fore.YELLOW + "No order history found.")
+                            continue
+                        cursor = None
+                        while True:
+                            cursor = customer.view_order_history(
+                                cursor, PAGE_SIZE, sys.stdout, highlight_for(sys.stdout)
+                            )
+                            if cursor is None or not confirm_more():
+                                break
+
+                    elif option == 3:
+                        query = input("Search for food (e.g. 'pizza under 10'): ")
+                        try:
+                            results = search_index.search(query)
+                        except core.InvalidInputError as e:
+                            print(Fore.RED + f"Error: {str(e)}")
+                            continue
+                        if not results:
+                            print(Fore.YELLOW + "No matching items found.")
+                            continue
+
+                        print(Fore.GREEN + "Matching Items:")
+                        for i, (restaurant, item, _) in enumerate(results, start=1):
+                            price = core.format_cents(item.price_cents)
+                            print(f"{i}. {item.name} - {price} ({restaurant.name})")
+
+                    elif option == 4:
+                        if trending is None:
+                            trending = core.TrendingTracker()
+                            trending.attach(registry)
+                        print_trending(trending)
 
                     else:
                         print(Fore.RED + "Invalid option. Please try again.")
@@ -785,5 +1091,342 @@ def main():
             print(Fore.RED + "Invalid option. Please enter a valid number.")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Restaurant management system")
+    parser.add_argument(
+        "--benchmark-login",
+        action="store_true",
+        help="compare login lookup latency of list scans and the account registry",
+    )
+    parser.add_argument(
+        "--benchmark-memory",
+        action="store_true",
+        help="measure order memory with tracemalloc for the old and compact layouts",
+    )
+    parser.add_argument(
+        "--benchmark-search",
+        action="store_true",
+        help="build the menu search index for each size in --sizes and time queries",
+    )
+    parser.add_argument(
+        "--benchmark-startup",
+        action="store_true",
+        help="time cold starts of the headless core and the CLI in fresh interpreters",
+    )
+    parser.add_argument(
+        "--benchmark-feed",
+        action="store_true",
+        help="place --orders orders with and without event feed subscribers",
+    )
+    parser.add_argument(
+        "--simulate-kitchen",
+        action="store_true",
+        help="simulate --orders orders arriving at a kitchen with --stations stations",
+    )
+    parser.add_argument(
+        "--stations", type=int, default=8, help="kitchen stations in the simulation"
+    )
+    parser.add_argument(
+        "--arrival-rate",
+        type=float,
+        default=0.5,
+        help="orders per minute arriving in the kitchen simulation",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="account counts used by the benchmarks",
+    )
+    parser.add_argument(
+        "--ingest",
+        metavar="PATH",
+        help="place orders from a JSONL or CSV file ('-' reads stdin)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["jsonl", "csv"],
+        help="file format for --ingest and menu files (guessed from the file name)",
+    )
+    parser.add_argument(
+        "--catalog",
+        metavar="PATH",
+        help="JSONL file with restaurants and their menus to load first",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="number of order records validated and applied together",
+    )
+    parser.add_argument(
+        "--create-customers",
+        action="store_true",
+        help="register unknown customer phone numbers instead of rejecting them",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="split --ingest across N worker processes by restaurant phone number",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="print a sales report after --ingest (requires NumPy)",
+    )
+    parser.add_argument(
+        "--export-history",
+        metavar="PHONE",
+        help="write the order history of a restaurant to --output",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        help="file written by --export-history (orders.txt) or --export-menu "
+        "(menu.jsonl)",
+    )
+    parser.add_argument(
+        "--import-menu",
+        metavar="PHONE",
+        help="add or replace the menu items of a restaurant from --input",
+    )
+    parser.add_argument(
+        "--export-menu",
+        metavar="PHONE",
+        help="write the menu of a restaurant to --output as JSON Lines or CSV",
+    )
+    parser.add_argument(
+        "--input",
+        metavar="PATH",
+        help="JSONL or CSV menu file read by --import-menu ('-' reads stdin)",
+    )
+    parser.add_argument(
+        "--rejects",
+        metavar="PATH",
+        help="write every rejected --ingest or --import-menu row to a JSONL file",
+    )
+    parser.add_argument(
+        "--data-dir",
+        metavar="PATH",
+        help="directory for the write-ahead log and snapshots (in-memory if omitted)",
+    )
+    parser.add_argument(
+        "--group-commit",
+        type=int,
+        default=1,
+        help="fsync the log every N records (0 leaves flushing to the OS)",
+    )
+    parser.add_argument(
+        "--sync-interval",
+        type=float,
+        help="also fsync the log when this many seconds passed since the last sync",
+    )
+    parser.add_argument(
+        "--snapshot-every",
+        type=int,
+        default=100_000,
+        help="write a snapshot after N log records (0 disables snapshots)",
+    )
+    parser.add_argument(
+        "--history-keep",
+        type=int,
+        metavar="N",
+        help="keep the newest N entries of each customer's order history in "
+        "memory and spill older ones under --data-dir",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="accept JSON-lines order requests over TCP instead of the menu loop",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="address the order server listens on"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="port the order server listens on"
+    )
+    parser.add_argument(
+        "--stripes",
+        type=int,
+        default=64,
+        help="number of lock stripes shared by restaurants and customers",
+    )
+    parser.add_argument(
+        "--load-test",
+        action="store_true",
+        help="run concurrent clients against a local server and check every order",
+    )
+    parser.add_argument(
+        "--clients", type=int, default=50, help="concurrent clients for --load-test"
+    )
+    parser.add_argument(
+        "--orders-per-client",
+        type=int,
+        default=200,
+        help="orders placed by each --load-test client",
+    )
+    parser.add_argument(
+        "--benchmark-suite",
+        action="store_true",
+        help="time the core operations on a generated workload and print JSON",
+    )
+    parser.add_argument(
+        "--restaurants", type=int, default=100, help="restaurants in the workload"
+    )
+    parser.add_argument(
+        "--customers", type=int, default=1000, help="customers in the workload"
+    )
+    parser.add_argument(
+        "--menu-size", type=int, default=30, help="average menu size in the workload"
+    )
+    parser.add_argument(
+        "--orders", type=int, default=50_000, help="orders placed by the workload"
+    )
+    parser.add_argument(
+        "--skew",
+        type=float,
+        default=1.1,
+        help="Zipf exponent for restaurant, customer and item picks (0 is uniform)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="random seed for the generated workload"
+    )
+    parser.add_argument(
+        "--bench-output",
+        metavar="PATH",
+        help="write the --benchmark-suite JSON to a file instead of stdout",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="earlier --benchmark-suite JSON to compare median latencies against",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="instrument hot paths and write metrics on exit (JSON or Prometheus)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="run the selected mode under cProfile and print the top hot spots",
+    )
+    parser.add_argument(
+        "--profile-limit",
+        type=int,
+        default=25,
+        help="number of functions listed by --profile",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="PATH",
+        help="also save the raw --profile statistics for pstats or other viewers",
+    )
+    args = parser.parse_args(argv)
+    if args.shards > 1 and args.data_dir:
+        parser.error("--shards cannot be combined with --data-dir")
+    if args.shards > 1 and args.rejects:
+        parser.error("--shards cannot be combined with --rejects")
+    if args.import_menu and not args.input:
+        parser.error("--import-menu requires --input")
+    if args.history_keep is not None and not args.data_dir:
+        parser.error("--history-keep requires --data-dir")
+    if args.history_keep is not None and args.history_keep < 0:
+        parser.error("--history-keep must not be negative")
+    return args
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    store = None
+    registry = None
+    if args.data_dir:
+        store = core.DataStore(
+            args.data_dir,
+            args.group_commit,
+            args.sync_interval,
+            args.snapshot_every,
+            args.history_keep,
+        )
+        registry = store.open()
+    metrics = None
+    if args.metrics:
+        if registry is None:
+            registry = core.AccountRegistry()
+        metrics = core.Metrics(registry)
+        metrics.instrument(
+            [(sys.modules[__name__], "print_sales_report", "render_sales_report")]
+        )
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        if args.benchmark_login:
+            print_login_benchmark(core.benchmark_login(args.sizes))
+        elif args.benchmark_memory:
+            print_memory_benchmark(core.benchmark_memory(args.sizes))
+        elif args.benchmark_search:
+            for size in args.sizes:
+                print_search_benchmark(core.benchmark_search(size))
+        elif args.benchmark_feed:
+            print_feed_benchmark(core.benchmark_feed(args.orders))
+        elif args.simulate_kitchen:
+            if args.orders < 1 or args.stations < 1 or args.arrival_rate <= 0:
+                print(
+                    Fore.RED
+                    + "--orders, --stations and --arrival-rate must be greater than 0."
+                )
+                sys.exit(1)
+            print_kitchen_simulation(
+                core.simulate_kitchen(
+                    args.orders,
+                    args.stations,
+                    args.arrival_rate,
+                    args.menu_size,
+                    args.seed,
+                )
+            )
+        elif args.benchmark_startup:
+            if run_startup_benchmark():
+                sys.exit(1)
+        elif args.benchmark_suite:
+            if run_benchmark_suite(args):
+                sys.exit(1)
+        elif args.ingest and args.shards > 1:
+            run_sharded_ingest(args)
+        elif args.ingest:
+            run_ingest(args, registry)
+        elif args.serve:
+            run_server(args, registry, store)
+        elif args.load_test:
+            result = core.run_load_test(
+                args.clients, args.orders_per_client, stripes=args.stripes
+            )
+            print_load_test(result)
+            if result["failures"]:
+                sys.exit(1)
+        elif args.import_menu or args.export_menu:
+            run_menu_transfer(args, registry)
+        elif args.export_history:
+            export_history(
+                registry or core.AccountRegistry(),
+                args.export_history,
+                args.output or "orders.txt",
+            )
+        else:
+            main(registry)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            print_profile(profiler, args.profile_limit, args.profile_output)
+        if metrics is not None:
+            metrics.write(args.metrics)
+            print(Fore.GREEN + f"Metrics written to {args.metrics}.")
+        if store is not None:
+            store.close()
@@ -0,0 +1,97 @@
+import importlib
+
+EXPORTS = {
+    "models": (
+        "NEARBY_LIMIT",
+        "NEARBY_RADIUS",
+        "AccountRegistry",
+        "AddressIndex",
+        "Customer",
+        "CustomerHistory",
+        "IdempotencyCache",
+        "InvalidInputError",
+        "ItemTable",
+        "Menu",
+        "MenuItem",
+        "Order",
+        "OrderHistory",
+        "Restaurant",
+        "format_cents",
+        "format_time",
+        "iter_order_report",
+        "normalize_address",
+        "normalize_contact_info",
+        "parse_location",
+        "render_orders",
+        "to_cents",
+        "validate_menu",
+        "validate_menu_item",
+        "validate_menu_item_name",
+        "validate_positive_number",
+        "validate_quantity",
+        "validate_restaurant",
+        "write_chunks",
+    ),
+    "search": ("MenuSearchIndex", "parse_search_query", "tokenize"),
+    "recommend": ("CoOccurrenceIndex",),
+    "trending": ("TRENDING_WINDOWS", "SlidingSketch", "TrendingTracker"),
+    "ingest": (
+        "IngestReport",
+        "MenuImporter",
+        "OrderEngine",
+        "export_menu",
+        "guess_format",
+        "load_catalog",
+        "load_catalog_line",
+        "open_input",
+        "parse_item_list",
+        "read_order_records",
+    ),
+    "sharding": ("ShardPool", "shard_of"),
+    "feed": (
+        "BLOCK",
+        "COALESCE",
+        "DROP_OLDEST",
+        "FEED_POLICIES",
+        "EventFeed",
+        "FeedEvent",
+        "Subscription",
+    ),
+    "kitchen": ("KitchenDispatcher", "KitchenScheduler", "simulate_kitchen"),
+    "ledger": ("OrderLedger",),
+    "storage": ("DataStore", "HistorySpill"),
+    "service": (
+        "LockStripes",
+        "OrderRequestHandler",
+        "OrderServer",
+        "OrderService",
+        "run_load_test",
+    ),
+    "metrics": ("Metrics",),
+    "benchmarks": (
+        "BenchmarkRecorder",
+        "benchmark_feed",
+        "benchmark_login",
+        "benchmark_memory",
+        "benchmark_search",
+        "benchmark_startup",
+        "benchmark_suite",
+        "compare_benchmarks",
+        "percentile",
+        "zipf_weights",
+    ),
+}
+MODULE_OF = {name: module for module, names in EXPORTS.items() for name in names}
+
+__all__ = sorted(MODULE_OF)
+
+
+def __getattr__(name):
+    module = MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
+
+
+def __dir__():
+    return __all__
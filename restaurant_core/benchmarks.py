@@ -0,0 +1,530 @@
+import asyncio
+import io
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+from .feed import BLOCK, COALESCE, DROP_OLDEST, EventFeed
+from .ingest import OrderEngine
+from .models import (
+    NEARBY_LIMIT,
+    NEARBY_RADIUS,
+    AccountRegistry,
+    Customer,
+    MenuItem,
+    Order,
+    Restaurant,
+)
+from .recommend import CoOccurrenceIndex
+from .search import MenuSearchIndex
+from .trending import TrendingTracker
+
+STARTUP_PROBES = (
+    ("startup_python", "pass"),
+    ("startup_core", "import restaurant_core"),
+    ("startup_models", "import restaurant_core as core; core.AccountRegistry()"),
+)
+EAGER_MODULES_PROBE = (
+    "import sys, restaurant_core as core; core.AccountRegistry(); "
+    "core.MenuSearchIndex(); core.OrderEngine; core.DataStore; "
+    "print(*sorted(name for name in ('colorama', 'numpy', 'socketserver', "
+    "'multiprocessing', 'cProfile', 'tracemalloc') if name in sys.modules))"
+)
+
+
+def benchmark_login(sizes=(10_000, 100_000, 1_000_000), lookups=100_000, seed=0):
+    rng = random.Random(seed)
+    for size in sizes:
+        registry = AccountRegistry()
+        restaurants = []
+        customers = []
+        for i in range(size):
+            phone = f"0912{i:07d}"
+            restaurants.append(
+                registry.create_restaurant(f"Restaurant {i}", f"Street {i}", phone)
+            )
+            customers.append(registry.create_customer(f"Customer {i}", "", phone))
+
+        scan_lookups = max(3, 2_000_000 // size)
+        phones = [f"0912{rng.randrange(size):07d}" for _ in range(scan_lookups)]
+
+        start = time.perf_counter()
+        for contact_info in phones:
+            [
+                restaurant
+                for restaurant in restaurants
+                if restaurant.contact_info.lower() == contact_info.lower()
+            ]
+        restaurant_scan = (time.perf_counter() - start) / scan_lookups
+
+        start = time.perf_counter()
+        for contact_info in phones:
+            for c in customers:
+                if c.contact_info == contact_info:
+                    break
+        customer_scan = (time.perf_counter() - start) / scan_lookups
+
+        phones = [f"0912{rng.randrange(size):07d}" for _ in range(lookups)]
+        start = time.perf_counter()
+        for contact_info in phones:
+            registry.find_restaurant(contact_info)
+        restaurant_hashed = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for contact_info in phones:
+            registry.find_customer(contact_info)
+        customer_hashed = (time.perf_counter() - start) / lookups
+
+        del registry, restaurants, customers
+        yield {
+            "accounts": size,
+            "restaurant_scan_s": restaurant_scan,
+            "restaurant_registry_s": restaurant_hashed,
+            "customer_scan_s": customer_scan,
+            "customer_registry_s": customer_hashed,
+        }
+
+
+def benchmark_memory(sizes=(100_000, 1_000_000), lines_per_order=3, seed=0):
+    class LegacyOrder:
+        def __init__(self, customer, restaurant, items):
+            self.order_id = Order.next_id
+            self.created_at = time.time()
+            self.customer = customer
+            self.restaurant = restaurant
+            self.items = dict(items)
+            self.quantities = {item: quantity for item, quantity in items.items()}
+            self.total_price = sum(
+                item.price * quantity for item, quantity in items.items()
+            )
+            self.histories = []
+
+    rng = random.Random(seed)
+    restaurant = Restaurant("Restaurant", "Street", "0912")
+    customer = Customer("Customer", "Street", "0935")
+    menu_items = [MenuItem(f"Item {i}", "", 1.5 + i) for i in range(50)]
+    baskets = [
+        {item: rng.randint(1, 5) for item in rng.sample(menu_items, lines_per_order)}
+        for _ in range(1000)
+    ]
+    for size in sizes:
+        results = []
+        for order_class in (LegacyOrder, Order):
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            orders = [
+                order_class(customer, restaurant, baskets[i % len(baskets)])
+                for i in range(size)
+            ]
+            used = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            del orders
+            results.append(used)
+        before, after = results
+        yield {"orders": size, "before_bytes": before, "after_bytes": after}
+
+
+def zipf_weights(count, skew):
+    total = 0.0
+    cumulative = []
+    for rank in range(1, count + 1):
+        total += 1 / rank**skew
+        cumulative.append(total)
+    return cumulative
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(
+        len(sorted_values) - 1, int(math.ceil(fraction * len(sorted_values))) - 1
+    )
+    return sorted_values[max(index, 0)]
+
+
+class BenchmarkRecorder:
+    def __init__(self):
+        self.samples = {}
+
+    def call(self, name, function, *args):
+        start = time.perf_counter_ns()
+        result = function(*args)
+        elapsed = time.perf_counter_ns() - start
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = []
+        samples.append(elapsed)
+        return result
+
+    def summary(self):
+        operations = {}
+        for name, samples in self.samples.items():
+            samples = sorted(samples)
+            total = sum(samples)
+            operations[name] = {
+                "count": len(samples),
+                "total_s": round(total / 1e9, 6),
+                "ops_per_s": round(len(samples) / (total / 1e9), 1) if total else None,
+                "mean_us": round(total / len(samples) / 1e3, 3),
+                "p50_us": round(percentile(samples, 0.50) / 1e3, 3),
+                "p90_us": round(percentile(samples, 0.90) / 1e3, 3),
+                "p99_us": round(percentile(samples, 0.99) / 1e3, 3),
+                "max_us": round(samples[-1] / 1e3, 3),
+            }
+        return operations
+
+
+def benchmark_suite(
+    restaurants=100,
+    customers=1000,
+    menu_size=30,
+    orders=50_000,
+    skew=1.1,
+    seed=0,
+    queries=2000,
+    startup_runs=5,
+    startup_script=None,
+):
+    rng = random.Random(seed)
+    bench = BenchmarkRecorder()
+    registry = AccountRegistry()
+    engine = OrderEngine(registry)
+    started = time.perf_counter()
+
+    restaurant_phones = [f"0912{i:07d}" for i in range(restaurants)]
+    customer_phones = [f"0935{i:07d}" for i in range(customers)]
+    menus = []
+    for i, phone in enumerate(restaurant_phones):
+        location = (rng.uniform(0, 100), rng.uniform(0, 100))
+        restaurant = bench.call(
+            "create_restaurant",
+            registry.create_restaurant,
+            f"Restaurant {i}",
+            f"{i} Benchmark Street",
+            phone,
+            location,
+        )
+        names = [
+            f"Item {j}"
+            for j in range(
+                rng.randint(max(1, menu_size // 2), max(1, menu_size * 3 // 2))
+            )
+        ]
+        for name in names:
+            item = MenuItem(name, "", rng.randint(100, 3000) / 100)
+            bench.call("menu_add_item", restaurant.menu.add_item, item)
+        menus.append((restaurant, names, zipf_weights(len(names), skew)))
+    for i, phone in enumerate(customer_phones):
+        bench.call(
+            "create_customer",
+            registry.create_customer,
+            f"Customer {i}",
+            f"{i} Benchmark Avenue",
+            phone,
+            (rng.uniform(0, 100), rng.uniform(0, 100)),
+        )
+
+    restaurant_weights = zipf_weights(restaurants, skew)
+    customer_weights = zipf_weights(customers, skew)
+    restaurant_picks = rng.choices(
+        range(restaurants), cum_weights=restaurant_weights, k=orders
+    )
+    customer_picks = rng.choices(
+        range(customers), cum_weights=customer_weights, k=orders
+    )
+    created_at = 1_700_000_000.0
+    placed = []
+    for restaurant_index, customer_index in zip(restaurant_picks, customer_picks):
+        restaurant, names, weights = menus[restaurant_index]
+        items = {}
+        for name in rng.choices(names, cum_weights=weights, k=rng.randint(1, 4)):
+            items[name] = items.get(name, 0) + rng.randint(1, 3)
+        created_at += rng.expovariate(1 / 30)
+        placed.append(
+            bench.call(
+                "place_order",
+                engine.place_order,
+                customer_phones[customer_index],
+                restaurant.contact_info,
+                items,
+                created_at,
+            )
+        )
+
+    lookups = rng.choices(range(restaurants), cum_weights=restaurant_weights, k=queries)
+    for index in lookups:
+        bench.call(
+            "login_restaurant", registry.find_restaurant, restaurant_phones[index]
+        )
+    for index in rng.choices(range(customers), cum_weights=customer_weights, k=queries):
+        bench.call("login_customer", registry.find_customer, customer_phones[index])
+    for index in lookups:
+        restaurant, names, weights = menus[index]
+        history = restaurant.order_history
+        name = rng.choices(names, cum_weights=weights)[0]
+        bench.call("count_item_orders", history.count_item_orders, name)
+        bench.call("best_sellers", history.best_sellers, 10)
+        start = created_at - rng.uniform(0, created_at - 1_700_000_000.0)
+        bench.call("orders_between", history.orders_between, start, start + 3600)
+        bench.call("menu_render", restaurant.menu.render)
+        item = restaurant.menu.get_items()[name]
+        bench.call(
+            "menu_update_item",
+            restaurant.menu.update_item,
+            name,
+            item.description,
+            rng.randint(100, 3000) / 100,
+        )
+        if history.orders:
+            bench.call("view_orders_page", history.view_orders, 0, 20, io.StringIO())
+    customer_list = registry.get_customers()
+    for index in rng.choices(range(customers), cum_weights=customer_weights, k=queries):
+        history = customer_list[index].order_history
+        if history:
+            bench.call("customer_history_page", history.page, None, 20)
+    for _ in range(queries):
+        customer = rng.choice(customer_list)
+        bench.call(
+            "nearby_restaurants",
+            registry.nearby_restaurants,
+            customer,
+            NEARBY_RADIUS,
+            NEARBY_LIMIT,
+        )
+    for order in rng.sample(placed, min(queries, len(placed))):
+        item = order.line_at(0)[0]
+        bench.call("order_add_item", order.add_item, item, 1)
+        bench.call("order_remove_item", order.remove_item, item, 1)
+    for order in rng.sample(placed, min(queries, len(placed))):
+        bench.call("remove_order", order.restaurant.order_history.remove_order, order)
+    recommender = CoOccurrenceIndex()
+    recommender.attach(registry)
+    for order in rng.sample(placed, min(queries, len(placed))):
+        basket = [item for item, _ in order.iter_lines()]
+        bench.call("suggest_add_ons", recommender.suggest, order.restaurant, basket)
+    trending = TrendingTracker()
+    trending.attach(registry, created_at)
+    for index in lookups:
+        span = rng.choice(sorted(trending.windows))
+        bench.call("trending_top", trending.top, span, 20, None, created_at)
+        restaurant = menus[index][0]
+        bench.call("trending_top", trending.top, span, 20, restaurant, created_at)
+    eager_modules = benchmark_startup(bench, startup_runs, startup_script)
+
+    return {
+        "benchmark": "ordering",
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "parameters": {
+            "restaurants": restaurants,
+            "customers": customers,
+            "menu_size": menu_size,
+            "orders": orders,
+            "skew": skew,
+            "seed": seed,
+            "queries": queries,
+            "startup_runs": startup_runs,
+        },
+        "eager_modules": eager_modules,
+        "operations": bench.summary(),
+    }
+
+
+SEARCH_DISHES = (
+    "pizza",
+    "burger",
+    "pasta",
+    "salad",
+    "soup",
+    "sushi",
+    "taco",
+    "curry",
+    "kebab",
+    "sandwich",
+    "noodles",
+    "steak",
+    "pancake",
+    "dumplings",
+    "risotto",
+    "falafel",
+)
+SEARCH_WORDS = (
+    "spicy",
+    "classic",
+    "vegan",
+    "grilled",
+    "crispy",
+    "smoked",
+    "garlic",
+    "cheese",
+    "chicken",
+    "beef",
+    "tomato",
+    "mushroom",
+    "lemon",
+    "honey",
+    "pepper",
+    "basil",
+    "truffle",
+    "shrimp",
+    "tofu",
+    "olive",
+    "bacon",
+    "chili",
+    "ginger",
+    "sesame",
+)
+
+
+def benchmark_search(items=1_000_000, menu_size=100, queries=1000, seed=0):
+    rng = random.Random(seed)
+    registry = AccountRegistry()
+    index = MenuSearchIndex()
+    index.attach(registry)
+    started = time.perf_counter()
+    for r in range(max(1, items // menu_size)):
+        restaurant = registry.create_restaurant(
+            f"Restaurant {r}", f"{r} Search Street", f"0912{r:07d}"
+        )
+        for i in range(min(menu_size, items - r * menu_size)):
+            name = f"{rng.choice(SEARCH_WORDS)} {rng.choice(SEARCH_DISHES)} {i}"
+            description = " ".join(rng.sample(SEARCH_WORDS, 3))
+            restaurant.menu.add_item(
+                MenuItem(name, description, rng.randint(200, 4000) / 100)
+            )
+    build = time.perf_counter() - started
+    bench = BenchmarkRecorder()
+    for _ in range(queries):
+        dish = rng.choice(SEARCH_DISHES)
+        word = rng.choice(SEARCH_WORDS)
+        bench.call("single term", index.search, dish)
+        bench.call(
+            "term with price", index.search, f"{dish} under {rng.randint(5, 30)}"
+        )
+        bench.call("two terms", index.search, f"{word} {dish}")
+        bench.call("prefix", index.search, dish[: rng.randint(2, 4)])
+    return {
+        "items": len(index.entries),
+        "build_s": build,
+        "operations": bench.summary(),
+    }
+
+
+def benchmark_feed(orders=50_000, restaurants=20, customers=200, slow_delay=0.005):
+    registry = AccountRegistry()
+    engine = OrderEngine(registry)
+    for r in range(restaurants):
+        restaurant = registry.create_restaurant(
+            f"Restaurant {r}", f"{r} Feed Street", f"0912{r:07d}"
+        )
+        for i in range(10):
+            restaurant.menu.add_item(MenuItem(f"Item {i}", "", 5 + i))
+    for c in range(customers):
+        registry.create_customer(f"Customer {c}", f"{c} Feed Avenue", f"0935{c:07d}")
+
+    def place(count):
+        started = time.perf_counter()
+        for n in range(count):
+            restaurant = f"0912{n % restaurants:07d}"
+            order = engine.place_order(
+                f"0935{n % customers:07d}", restaurant, {f"Item {n % 10}": 1}
+            )
+            if n % 4 == 0:
+                menu = order.restaurant.menu
+                order.add_item(menu.get_items()[f"Item {(n + 1) % 10}"])
+        return count / (time.perf_counter() - started)
+
+    baseline = place(orders)
+    feed = EventFeed()
+    consumers = (
+        ("kitchen display", BLOCK, 1000, 0.0),
+        ("analytics", DROP_OLDEST, 100, slow_delay),
+        ("notifications", COALESCE, 100, slow_delay),
+    )
+    state = {"ready": threading.Event()}
+
+    async def consume(subscription, delay):
+        async for _ in subscription.batches(100 if not delay else 10):
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def run():
+        await feed.start()
+        subscriptions = [
+            (name, feed.subscribe(None, maxsize, policy))
+            for name, policy, maxsize, _ in consumers
+        ]
+        tasks = [
+            asyncio.create_task(consume(subscription, delay))
+            for (_, subscription), (*_, delay) in zip(subscriptions, consumers)
+        ]
+        state["loop"] = asyncio.get_running_loop()
+        state["done"] = asyncio.Event()
+        state["ready"].set()
+        await state["done"].wait()
+        await feed.close()
+        await asyncio.gather(*tasks)
+        state["subscriptions"] = [
+            dict(subscription.stats(), name=name)
+            for name, subscription in subscriptions
+        ]
+
+    thread = threading.Thread(target=asyncio.run, args=(run(),))
+    thread.start()
+    state["ready"].wait()
+    feed.attach(registry)
+    with_feed = place(orders)
+    feed.detach(registry)
+    state["loop"].call_soon_threadsafe(state["done"].set)
+    thread.join()
+    return {
+        "orders": orders,
+        "baseline_orders_per_s": baseline,
+        "feed_orders_per_s": with_feed,
+        "published": feed.published,
+        "inbox_dropped": feed.inbox_dropped,
+        "subscriptions": state["subscriptions"],
+    }
+
+
+def compare_benchmarks(baseline, current, threshold=0.10):
+    rows = []
+    for name, stats in sorted(current["operations"].items()):
+        before = baseline.get("operations", {}).get(name)
+        if not before or not before["p50_us"]:
+            rows.append((name, None, stats["p50_us"], None, False))
+            continue
+        change = stats["p50_us"] / before["p50_us"] - 1
+        rows.append(
+            (name, before["p50_us"], stats["p50_us"], change, change > threshold)
+        )
+    return rows
+
+
+def run_quietly(command, cwd):
+    subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, check=True)
+
+
+def benchmark_startup(bench, runs=10, script=None):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    commands = [(name, [sys.executable, "-c", code]) for name, code in STARTUP_PROBES]
+    if script is not None:
+        commands.append(("startup_cli", [sys.executable, script, "--help"]))
+    for _ in range(runs):
+        for name, command in commands:
+            bench.call(name, run_quietly, command, root)
+    probe = subprocess.run(
+        [sys.executable, "-c", EAGER_MODULES_PROBE],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+    return probe.stdout.split()
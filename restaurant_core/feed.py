@@ -0,0 +1,247 @@
+import asyncio
+import collections
+import threading
+import time
+
+from .models import InvalidInputError
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+FEED_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+class FeedEvent:
+    __slots__ = ("sequence", "kind", "key", "data", "timestamp")
+
+    def __init__(self, kind, key, data):
+        self.sequence = None
+        self.kind = kind
+        self.key = key
+        self.data = data
+        self.timestamp = time.time()
+
+
+def order_event(kind, restaurant, order):
+    customer = order.customer
+    return FeedEvent(
+        kind,
+        ("order", restaurant.account_id, order.order_id),
+        {
+            "order_id": order.order_id,
+            "restaurant_id": restaurant.account_id,
+            "customer_id": None if customer is None else customer.account_id,
+            "created_at": order.created_at,
+            "total_cents": order.total_cents,
+            "items": [[item.name, quantity] for item, quantity in order.iter_lines()],
+        },
+    )
+
+
+def menu_event(kind, restaurant, item=None):
+    data = {
+        "restaurant_id": restaurant.account_id,
+        "version": getattr(restaurant.menu, "version", 0),
+    }
+    if item is None:
+        return FeedEvent(kind, ("menu", restaurant.account_id), data)
+    data["name"] = item.name
+    if kind != "menu_item_removed":
+        data["price_cents"] = item.price_cents
+    return FeedEvent(kind, ("menu", restaurant.account_id, item.name), data)
+
+
+class Subscription:
+    def __init__(self, feed, kinds=None, maxsize=1000, policy=DROP_OLDEST):
+        if policy not in FEED_POLICIES:
+            raise InvalidInputError(f"Unknown backpressure policy '{policy}'.")
+        if maxsize < 1:
+            raise InvalidInputError("Queue size must be at least 1.")
+        self.feed = feed
+        self.kinds = None if kinds is None else frozenset(kinds)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.queue = collections.OrderedDict()
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self.ready = asyncio.Event()
+        self.space = asyncio.Event()
+
+    def offer(self, event):
+        queue = self.queue
+        if self.policy == COALESCE and event.key in queue:
+            queue[event.key] = event
+            self.coalesced += 1
+            return True
+        if len(queue) >= self.maxsize:
+            if self.policy == BLOCK:
+                return False
+            queue.popitem(last=False)
+            self.dropped += 1
+        queue[event.key if self.policy == COALESCE else event.sequence] = event
+        self.ready.set()
+        return True
+
+    async def get(self):
+        while not self.queue:
+            if self.closed:
+                return None
+            self.ready.clear()
+            await self.ready.wait()
+        return self._pop()
+
+    async def batches(self, max_batch=100, max_delay=0.0):
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await self.get()
+            if event is None:
+                return
+            batch = [event]
+            deadline = loop.time() + max_delay
+            while len(self.queue) < max_batch - 1 and not self.closed:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self.ready.clear()
+                try:
+                    await asyncio.wait_for(self.ready.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            while self.queue and len(batch) < max_batch:
+                batch.append(self._pop())
+            yield batch
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "queued": len(self.queue),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    def _pop(self):
+        _, event = self.queue.popitem(last=False)
+        self.delivered += 1
+        self.space.set()
+        return event
+
+    def _finish(self):
+        self.closed = True
+        self.ready.set()
+        self.space.set()
+
+
+class EventFeed:
+    def __init__(self, inbox_size=100_000):
+        self.inbox_size = inbox_size
+        self.inbox = collections.deque()
+        self.published = 0
+        self.inbox_dropped = 0
+        self.subscriptions = []
+        self.loop = None
+        self.wakeup = None
+        self.scheduled = False
+        self.closing = False
+        self.task = None
+        self.lock = threading.Lock()
+
+    def attach(self, registry):
+        registry.subscribe(self.record)
+
+    def detach(self, registry):
+        registry.unsubscribe(self.record)
+
+    def record(self, event, account, *args):
+        if event in ("order_added", "order_removed", "order_item_changed"):
+            self.publish(order_event(event, account, args[0]))
+        elif event in ("menu_item_added", "menu_item_updated", "menu_item_removed"):
+            self.publish(menu_event(event, account, args[0]))
+        elif event in ("menu_items_added", "menu_replaced"):
+            self.publish(menu_event(event, account))
+
+    def publish(self, event):
+        # Called from order intake, possibly on another thread: it only
+        # appends to the inbox and never waits for a subscriber.
+        with self.lock:
+            if len(self.inbox) >= self.inbox_size:
+                self.inbox.popleft()
+                self.inbox_dropped += 1
+            self.published += 1
+            event.sequence = self.published
+            self.inbox.append(event)
+            if self.scheduled or self.loop is None:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def subscribe(self, kinds=None, maxsize=1000, policy=DROP_OLDEST):
+        subscription = Subscription(self, kinds, maxsize, policy)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        subscription._finish()
+
+    async def start(self):
+        self.wakeup = asyncio.Event()
+        with self.lock:
+            self.loop = asyncio.get_running_loop()
+            self.scheduled = True
+        self.task = self.loop.create_task(self._dispatch())
+        self.wakeup.set()
+
+    async def close(self):
+        self.closing = True
+        if self.task is not None:
+            # A blocking subscriber that stopped reading must not keep the
+            # dispatcher waiting: what no longer fits its queue is dropped.
+            for subscription in self.subscriptions:
+                subscription.space.set()
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "inbox": len(self.inbox),
+            "inbox_dropped": self.inbox_dropped,
+            "subscriptions": [
+                subscription.stats() for subscription in self.subscriptions
+            ],
+        }
+
+    async def _dispatch(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            with self.lock:
+                events = self.inbox
+                self.inbox = collections.deque()
+                self.scheduled = False
+            for event in events:
+                for subscription in list(self.subscriptions):
+                    kinds = subscription.kinds
+                    if kinds is not None and event.kind not in kinds:
+                        continue
+                    # A blocking subscriber holds up this dispatcher, not
+                    # order intake; events wait in the bounded inbox.
+                    while not subscription.offer(event):
+                        if subscription.closed or self.closing:
+                            subscription.dropped += 1
+                            break
+                        subscription.space.clear()
+                        await subscription.space.wait()
+            if self.closing and not self.inbox:
+                return
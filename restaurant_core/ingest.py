@@ -0,0 +1,370 @@
+import contextlib
+import csv
+import json
+import math
+import sys
+import time
+
+from .models import (
+    InvalidInputError,
+    MenuItem,
+    Order,
+    format_cents,
+    validate_menu,
+    validate_menu_item_name,
+    validate_positive_number,
+    validate_quantity,
+    validate_restaurant,
+    write_chunks,
+)
+
+MENU_FIELDS = ("name", "description", "price")
+MAX_CLOCK_SKEW = 300
+
+
+class IngestReport:
+    def __init__(self, max_samples=10, sink=None):
+        self.received = 0
+        self.applied = 0
+        self.rejected = 0
+        self.errors = {}
+        self.samples = []
+        self.max_samples = max_samples
+        self.sink = sink
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line_number, error):
+        self.rejected += 1
+        message = str(error)
+        self.errors[message] = self.errors.get(message, 0) + 1
+        if len(self.samples) < self.max_samples:
+            self.samples.append((line_number, message))
+        if self.sink is not None:
+            self.sink.write(json.dumps({"line": line_number, "error": message}) + "\n")
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def throughput(self):
+        return self.received / self.elapsed if self.elapsed else 0.0
+
+    def error_counts(self):
+        return sorted(self.errors.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class OrderEngine:
+    def __init__(self, registry, create_customers=False):
+        self.registry = registry
+        self.create_customers = create_customers
+
+    def place_order(
+        self,
+        customer_contact,
+        restaurant_contact,
+        items,
+        created_at=None,
+        idempotency_key=None,
+    ):
+        validated = self.validate(
+            {
+                "customer_phone": customer_contact,
+                "restaurant_phone": restaurant_contact,
+                "items": items,
+                "created_at": created_at,
+                "idempotency_key": idempotency_key,
+            }
+        )
+        return self._apply(*validated)
+
+    def validate(self, record):
+        if isinstance(record, str):
+            try:
+                record = json.loads(record)
+            except (ValueError, RecursionError):
+                raise InvalidInputError("Malformed JSON record.")
+        if not isinstance(record, dict):
+            raise InvalidInputError("Order record must be an object.")
+        customer_contact = record.get("customer_phone")
+        restaurant_contact = record.get("restaurant_phone")
+        restaurant = self.registry.find_restaurant(restaurant_contact or "")
+        if restaurant is None:
+            raise InvalidInputError("Unknown restaurant phone number.")
+        customer = self.registry.find_customer(customer_contact or "")
+        if customer is None and not self.create_customers:
+            raise InvalidInputError("Unknown customer phone number.")
+        order_items = self._resolve_items(restaurant, record.get("items"))
+        created_at = record.get("created_at") or None
+        if created_at is not None:
+            created_at = validate_positive_number(created_at)
+            if not created_at <= time.time() + MAX_CLOCK_SKEW:
+                raise InvalidInputError("Invalid order time provided.")
+        idempotency_key = record.get("idempotency_key") or None
+        if idempotency_key is not None and not isinstance(idempotency_key, str):
+            raise InvalidInputError("Idempotency key must be a string.")
+        return (
+            customer_contact,
+            customer,
+            restaurant,
+            order_items,
+            created_at,
+            idempotency_key,
+        )
+
+    def ingest(self, records, batch_size=1000, report=None):
+        if report is None:
+            report = IngestReport()
+        batch = []
+        for line_number, record in records:
+            batch.append((line_number, record))
+            if len(batch) >= batch_size:
+                self._ingest_batch(batch, report)
+                batch.clear()
+        if batch:
+            self._ingest_batch(batch, report)
+        report.finish()
+        return report
+
+    def _ingest_batch(self, batch, report):
+        report.received += len(batch)
+        validated = []
+        for line_number, record in batch:
+            try:
+                validated.append((line_number, self.validate(record)))
+            except InvalidInputError as e:
+                report.reject(line_number, e)
+        for line_number, values in validated:
+            try:
+                self._apply(*values)
+            except InvalidInputError as e:
+                report.reject(line_number, e)
+            else:
+                report.applied += 1
+
+    def _apply(
+        self,
+        customer_contact,
+        customer,
+        restaurant,
+        order_items,
+        created_at,
+        idempotency_key=None,
+    ):
+        if customer is None:
+            customer = self.registry.find_customer(customer_contact)
+            if customer is None:
+                customer = self.registry.create_customer(
+                    customer_contact, "", customer_contact
+                )
+        if idempotency_key is not None:
+            order = self.registry.replayed_order(customer, restaurant, idempotency_key)
+            if order is not None:
+                return order
+        order = Order(customer, restaurant, order_items, created_at=created_at)
+        customer.order_history.append(order)
+        restaurant.order_history.add_order(order)
+        if idempotency_key is not None:
+            self.registry.remember_order(customer, idempotency_key, order)
+        return order
+
+    def _resolve_items(self, restaurant, items):
+        if isinstance(items, dict):
+            items = items.items()
+        elif isinstance(items, str):
+            items = parse_item_list(items)
+        elif items is not None and not isinstance(items, list):
+            raise InvalidInputError("Order items must be a list, object or string.")
+        if not items:
+            raise InvalidInputError("No items selected in the order.")
+        menu_items = restaurant.menu.get_items() if restaurant.menu else {}
+        order_items = {}
+        for entry in items:
+            if isinstance(entry, dict):
+                entry = (entry.get("name"), entry.get("quantity", 1))
+            elif not isinstance(entry, (list, tuple)) or len(entry) != 2:
+                raise InvalidInputError("Invalid order line provided.")
+            item_name, quantity = entry
+            validate_menu_item_name(item_name)
+            item = menu_items.get(item_name)
+            if item is None:
+                raise InvalidInputError(f"Item '{item_name}' not found in the menu.")
+            validate_quantity(quantity)
+            order_items[item] = validate_quantity(order_items.get(item, 0) + quantity)
+        return order_items
+
+
+class MenuImporter:
+    def __init__(self, restaurant):
+        validate_restaurant(restaurant)
+        validate_menu(restaurant.menu)
+        self.restaurant = restaurant
+
+    def validate(self, record):
+        if isinstance(record, str):
+            try:
+                record = json.loads(record)
+            except (ValueError, RecursionError):
+                raise InvalidInputError("Malformed JSON record.")
+        if not isinstance(record, dict):
+            raise InvalidInputError("Menu record must be an object.")
+        name = record.get("name")
+        validate_menu_item_name(name)
+        name = name.strip()
+        if not name:
+            raise InvalidInputError("Item name cannot be empty.")
+        description = record.get("description") or ""
+        if not isinstance(description, str):
+            raise InvalidInputError("Invalid item description provided.")
+        price = validate_positive_number(record.get("price"))
+        if not math.isfinite(price):
+            raise InvalidInputError("Invalid item price provided.")
+        return MenuItem(name, description.strip(), price)
+
+    def ingest(self, records, batch_size=1000, report=None):
+        if report is None:
+            report = IngestReport()
+        batch = []
+        for line_number, record in records:
+            batch.append((line_number, record))
+            if len(batch) >= batch_size:
+                self._ingest_batch(batch, report)
+                batch.clear()
+        if batch:
+            self._ingest_batch(batch, report)
+        report.finish()
+        return report
+
+    def _ingest_batch(self, batch, report):
+        report.received += len(batch)
+        items = []
+        for line_number, record in batch:
+            try:
+                items.append(self.validate(record))
+            except InvalidInputError as e:
+                report.reject(line_number, e)
+        if items:
+            self.restaurant.menu.add_items(items)
+        report.applied += len(items)
+
+
+def export_menu(menu, stream, file_format="jsonl"):
+    validate_menu(menu)
+    items = map(menu.get_items().get, menu.positions)
+    if file_format == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(MENU_FIELDS)
+        writer.writerows(
+            (item.name, item.description, format_cents(item.price_cents))
+            for item in items
+        )
+        stream.flush()
+    else:
+        write_chunks(
+            (
+                json.dumps(
+                    {
+                        "name": item.name,
+                        "description": item.description,
+                        "price": item.price_cents / 100,
+                    }
+                )
+                + "\n"
+                for item in items
+            ),
+            stream,
+        )
+    return len(menu.positions)
+
+
+def parse_item_list(value):
+    items = []
+    for part in value.split(";"):
+        if not part.strip():
+            continue
+        item_name, _, quantity = part.rpartition(":")
+        if not item_name:
+            item_name, quantity = quantity, "1"
+        try:
+            items.append((item_name.strip(), int(quantity)))
+        except ValueError:
+            raise InvalidInputError("Quantity must be a positive integer.")
+    return items
+
+
+def read_order_records(stream, file_format="jsonl"):
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_number, line
+
+
+def open_input(path):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, newline="", encoding="utf-8")
+
+
+def guess_format(path, file_format=None):
+    if file_format:
+        return file_format
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def load_catalog(registry, stream):
+    errors = []
+    for line_number, line in enumerate(stream, start=1):
+        error = load_catalog_line(registry, line_number, line)
+        if error is not None:
+            errors.append(error)
+    return errors
+
+
+def load_catalog_line(registry, line_number, line):
+    if not line.strip():
+        return None
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise InvalidInputError("Catalog record must be an object.")
+        if not isinstance(record.get("name", ""), str):
+            raise InvalidInputError("Invalid restaurant name provided.")
+        menu = record.get("menu", [])
+        if not isinstance(menu, list):
+            raise InvalidInputError("Menu must be a list.")
+        location = record.get("location")
+        if location and (
+            not isinstance(location, list)
+            or len(location) != 2
+            or not all(
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                for value in location
+            )
+        ):
+            raise InvalidInputError("Location must be a pair of numbers.")
+        items = []
+        for entry in menu:
+            if not isinstance(entry, dict):
+                raise InvalidInputError("Menu entry must be an object.")
+            validate_menu_item_name(entry["name"])
+            description = entry.get("description", "")
+            if not isinstance(description, str):
+                raise InvalidInputError("Invalid item description provided.")
+            price = validate_positive_number(entry.get("price"))
+            items.append(MenuItem(entry["name"], description, price))
+        restaurant = registry.create_restaurant(
+            record["name"],
+            record.get("address", ""),
+            record["contact_info"],
+            tuple(location) if location else None,
+        )
+        for item in items:
+            restaurant.menu.add_item(item)
+    except KeyError as e:
+        return f"Catalog line {line_number}: missing field {str(e)}"
+    except (ValueError, TypeError, RecursionError, InvalidInputError) as e:
+        return f"Catalog line {line_number}: {str(e)}"
+    return None
@@ -0,0 +1,241 @@
+import collections
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from .models import AccountRegistry, InvalidInputError, MenuItem, Order
+
+DEFAULT_PREP_SECONDS = 300.0
+EXTRA_UNIT_SECONDS = 45.0
+PROMISE_SLACK_SECONDS = 600.0
+
+
+class KitchenScheduler:
+    def __init__(
+        self,
+        stations=2,
+        prep_times=None,
+        default_prep=DEFAULT_PREP_SECONDS,
+        extra_unit=EXTRA_UNIT_SECONDS,
+        promise_slack=PROMISE_SLACK_SECONDS,
+        alpha=0.2,
+        samples=10_000,
+        clock=time.time,
+    ):
+        if stations < 1:
+            raise InvalidInputError("A kitchen needs at least one station.")
+        self.stations = stations
+        self.prep_times = dict(prep_times or {})
+        self.default_prep = default_prep
+        self.extra_unit = extra_unit
+        self.promise_slack = promise_slack
+        self.alpha = alpha
+        self.clock = clock
+        self.queue = []
+        self.entries = {}
+        self.queued = {}
+        self.tokens = itertools.count()
+        self.free = list(range(stations - 1, -1, -1))
+        self.running = {}
+        self.waits = collections.deque(maxlen=samples)
+        self.max_depth = 0
+        self.dispatched = 0
+        self.completed = 0
+        self.late = 0
+        self.lock = threading.Lock()
+
+    def estimate(self, order):
+        longest = 0.0
+        units = 0
+        for item, quantity in order.iter_lines():
+            longest = max(longest, self.prep_times.get(item.name, self.default_prep))
+            units += quantity
+        return longest + self.extra_unit * max(units - 1, 0)
+
+    def enqueue(self, order, promised_at=None, now=None):
+        now = self.clock() if now is None else now
+        estimate = self.estimate(order)
+        if promised_at is None:
+            promised_at = order.created_at + estimate + self.promise_slack
+        with self.lock:
+            if order.order_id in self.queued or order.order_id in self.running:
+                raise InvalidInputError("Order is already in the kitchen.")
+            token = next(self.tokens)
+            # The latest moment the order can start and still be ready on time
+            # comes first; the promised time and arrival order break ties.
+            heapq.heappush(self.queue, (promised_at - estimate, promised_at, token))
+            self.entries[token] = (order, now, estimate, promised_at)
+            self.queued[order.order_id] = token
+            self.max_depth = max(self.max_depth, self.depth())
+        return promised_at
+
+    def cancel(self, order):
+        with self.lock:
+            token = self.queued.pop(order.order_id, None)
+            if token is None:
+                return False
+            del self.entries[token]
+            if len(self.queue) > 2 * self.depth() + 64:
+                self.queue = [entry for entry in self.queue if entry[2] in self.entries]
+                heapq.heapify(self.queue)
+            return True
+
+    def dispatch(self, now=None):
+        now = self.clock() if now is None else now
+        assignments = []
+        with self.lock:
+            while self.free and self.queue:
+                _, _, token = heapq.heappop(self.queue)
+                entry = self.entries.pop(token, None)
+                if entry is None:
+                    continue
+                order, enqueued_at, estimate, promised_at = entry
+                del self.queued[order.order_id]
+                station = self.free.pop()
+                self.running[order.order_id] = (station, now, estimate, promised_at)
+                self.waits.append(now - enqueued_at)
+                self.dispatched += 1
+                assignments.append((station, order, now + estimate))
+        return assignments
+
+    def complete(self, order, now=None):
+        now = self.clock() if now is None else now
+        with self.lock:
+            running = self.running.pop(order.order_id, None)
+            if running is None:
+                raise InvalidInputError("Order is not being prepared.")
+            station, started_at, estimate, promised_at = running
+            self.completed += 1
+            if now > promised_at:
+                self.late += 1
+            self.free.append(station)
+            if estimate > 0:
+                self._learn(order, (now - started_at) / estimate)
+        return station
+
+    def depth(self):
+        return len(self.entries)
+
+    def stats(self):
+        with self.lock:
+            waits = sorted(self.waits)
+            return {
+                "stations": self.stations,
+                "busy_stations": len(self.running),
+                "queue_depth": self.depth(),
+                "max_queue_depth": self.max_depth,
+                "dispatched": self.dispatched,
+                "completed": self.completed,
+                "late": self.late,
+                "wait_mean_s": sum(waits) / len(waits) if waits else 0.0,
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95_s": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "wait_max_s": waits[-1] if waits else 0.0,
+            }
+
+    def _learn(self, order, ratio):
+        # Every item of the order shares the measured over- or undershoot.
+        alpha = self.alpha
+        for item, _ in order.iter_lines():
+            prep = self.prep_times.get(item.name, self.default_prep)
+            self.prep_times[item.name] = prep * (1 - alpha + alpha * ratio)
+
+
+class KitchenDispatcher:
+    def __init__(self, stations=2, **options):
+        self.stations = stations
+        self.options = options
+        self.schedulers = {}
+        self.lock = threading.Lock()
+
+    def attach(self, registry):
+        registry.subscribe(self.record)
+
+    def detach(self, registry):
+        registry.unsubscribe(self.record)
+
+    def scheduler(self, restaurant):
+        scheduler = self.schedulers.get(restaurant)
+        if scheduler is None:
+            with self.lock:
+                scheduler = self.schedulers.get(restaurant)
+                if scheduler is None:
+                    scheduler = KitchenScheduler(self.stations, **self.options)
+                    self.schedulers[restaurant] = scheduler
+        return scheduler
+
+    def record(self, event, account, *args):
+        if event == "order_added":
+            self.scheduler(account).enqueue(args[0])
+        elif event == "order_removed":
+            scheduler = self.schedulers.get(account)
+            if scheduler is not None:
+                scheduler.cancel(args[0])
+
+
+def simulate_kitchen(
+    orders=10_000, stations=8, arrivals_per_minute=0.5, menu_size=20, seed=0
+):
+    rng = random.Random(seed)
+    registry = AccountRegistry()
+    restaurant = registry.create_restaurant(
+        "Simulated Kitchen", "1 Peak Street", "09120000000"
+    )
+    customer = registry.create_customer("Simulated Customer", "", "09350000000")
+    true_prep = {}
+    for i in range(menu_size):
+        item = MenuItem(f"Dish {i}", "", rng.randint(500, 3000) / 100)
+        restaurant.menu.add_item(item)
+        true_prep[item.name] = rng.uniform(120, 900)
+    items = list(restaurant.menu.get_items().values())
+    scheduler = KitchenScheduler(stations)
+
+    events = []
+    arrival = 0.0
+    for n in range(orders):
+        arrival += rng.expovariate(arrivals_per_minute / 60)
+        events.append((arrival, n, None))
+    heapq.heapify(events)
+    sequence = itertools.count(orders)
+    busy = 0.0
+    scheduling = 0.0
+    operations = 0
+    now = 0.0
+    while events:
+        now, _, order = heapq.heappop(events)
+        started = time.perf_counter()
+        if order is None:
+            picks = rng.sample(items, rng.randint(1, 3))
+            order = Order(
+                customer,
+                restaurant,
+                {item: rng.randint(1, 2) for item in picks},
+                created_at=now,
+            )
+            restaurant.order_history.add_order(order)
+            scheduler.enqueue(order, now=now)
+        else:
+            scheduler.complete(order, now=now)
+        assignments = scheduler.dispatch(now)
+        scheduling += time.perf_counter() - started
+        operations += 1 + len(assignments)
+        for _, order, _ in assignments:
+            units = sum(quantity for _, quantity in order.iter_lines())
+            prep = max(true_prep[item.name] for item, _ in order.iter_lines())
+            prep = (prep + EXTRA_UNIT_SECONDS * (units - 1)) * rng.lognormvariate(
+                0, 0.2
+            )
+            busy += prep
+            heapq.heappush(events, (now + prep, next(sequence), order))
+    hours = now / 3600
+    return dict(
+        scheduler.stats(),
+        orders=orders,
+        simulated_hours=hours,
+        throughput_per_hour=scheduler.completed / hours if hours else 0.0,
+        utilization=busy / (now * stations) if now else 0.0,
+        scheduling_s=scheduling,
+        operations_per_s=operations / scheduling if scheduling else 0.0,
+    )
@@ -0,0 +1,167 @@
+import threading
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class OrderLedger:
+    COLUMNS = (
+        ("order_id", "q"),
+        ("restaurant_id", "q"),
+        ("customer_id", "q"),
+        ("item_id", "q"),
+        ("quantity", "q"),
+        ("unit_cents", "q"),
+        ("timestamp", "d"),
+    )
+
+    def __init__(self, capacity=1024):
+        if np is None:
+            raise ImportError("NumPy is required for the order ledger.")
+        self.size = 0
+        self.columns = {
+            name: np.empty(capacity, dtype=np.dtype(code))
+            for name, code in self.COLUMNS
+        }
+        self.staged = {name: array(code) for name, code in self.COLUMNS}
+        self.restaurants = {}
+        self.items = []
+        self.item_ids = {}
+        self.lock = threading.Lock()
+
+    def attach(self, registry):
+        for restaurant in registry.restaurants.values():
+            for order in restaurant.order_history.orders.values():
+                self.record("order_added", restaurant, order)
+        registry.subscribe(self.record)
+
+    def record(self, event, account, *args):
+        with self.lock:
+            self._record(event, account, args)
+
+    def _record(self, event, account, args):
+        if event == "order_added":
+            for item, quantity, unit_cents in args[0].iter_priced_lines():
+                self.add_line(account, args[0], item, quantity, unit_cents)
+        elif event == "order_removed":
+            for item, quantity, unit_cents in args[0].iter_priced_lines():
+                self.add_line(account, args[0], item, -quantity, unit_cents)
+        elif event == "order_item_changed":
+            order, item, old_quantity, new_quantity, unit_cents = args
+            self.add_line(account, order, item, new_quantity - old_quantity, unit_cents)
+
+    def add_line(self, restaurant, order, item, quantity, unit_cents=None):
+        if unit_cents is None:
+            unit_cents = item.price_cents
+        self.restaurants[restaurant.account_id] = restaurant
+        customer_id = getattr(order.customer, "account_id", None)
+        staged = self.staged
+        staged["order_id"].append(order.order_id)
+        staged["restaurant_id"].append(restaurant.account_id or 0)
+        staged["customer_id"].append(-1 if customer_id is None else customer_id)
+        item_id = self.item_ids.get(item)
+        if item_id is None:
+            item_id = self.item_ids[item] = len(self.items)
+            self.items.append(item)
+        staged["item_id"].append(item_id)
+        staged["quantity"].append(quantity)
+        staged["unit_cents"].append(unit_cents)
+        staged["timestamp"].append(order.created_at)
+
+    def column(self, name):
+        self._flush()
+        return self._column(name)
+
+    def revenue_per_item(self, restaurant=None):
+        self._flush()
+        item_ids, revenue = self._sum_by("item_id", self._revenue(), restaurant)
+        items = self.items
+        return {items[item_id]: total for item_id, total in zip(item_ids, revenue)}
+
+    def revenue_per_restaurant(self):
+        self._flush()
+        account_ids, revenue = self._sum_by("restaurant_id", self._revenue())
+        return {
+            self.restaurants[account_id]: total
+            for account_id, total in zip(account_ids, revenue)
+        }
+
+    def orders_per_bucket(self, bucket_seconds=3600, restaurant=None):
+        self._flush()
+        order_ids, totals, timestamps = self._orders(restaurant)
+        buckets = np.floor(timestamps[totals > 0] / bucket_seconds) * bucket_seconds
+        starts, counts = np.unique(buckets, return_counts=True)
+        return dict(zip(starts.tolist(), counts.tolist()))
+
+    def average_basket_size(self, restaurant=None):
+        self._flush()
+        order_ids, totals, _ = self._orders(restaurant)
+        placed = totals > 0
+        if not placed.any():
+            return 0.0
+        return float(totals[placed].sum() / placed.sum())
+
+    def _column(self, name):
+        return self.columns[name][: self.size]
+
+    def _revenue(self):
+        return self._column("quantity") * self._column("unit_cents")
+
+    def _mask(self, restaurant):
+        if restaurant is None:
+            return slice(None)
+        return self._column("restaurant_id") == restaurant.account_id
+
+    def _sum_by(self, key, weights, restaurant=None):
+        mask = self._mask(restaurant)
+        keys = self._column(key)[mask]
+        if keys.size == 0:
+            return [], []
+        # Account and order IDs can be sparse (sharded runs start each shard
+        # at a large offset), so lines are grouped by rank, not by raw ID.
+        present, inverse = np.unique(keys, return_inverse=True)
+        # np.bincount sums in float64; adding into int64 keeps cents exact.
+        totals = np.zeros(present.size, dtype=weights.dtype)
+        np.add.at(totals, inverse, weights[mask])
+        return present.tolist(), totals.tolist()
+
+    def _orders(self, restaurant):
+        mask = self._mask(restaurant)
+        order_ids = self._column("order_id")[mask]
+        if order_ids.size == 0:
+            return order_ids, np.empty(0), np.empty(0)
+        present, inverse = np.unique(order_ids, return_inverse=True)
+        totals = np.bincount(
+            inverse, weights=self._column("quantity")[mask], minlength=present.size
+        )
+        timestamps = np.zeros(present.size)
+        timestamps[inverse] = self._column("timestamp")[mask]
+        return present, totals, timestamps
+
+    def _flush(self):
+        with self.lock:
+            self._flush_staged()
+
+    def _flush_staged(self):
+        count = len(self.staged["order_id"])
+        if not count:
+            return
+        needed = self.size + count
+        capacity = len(self.columns["order_id"])
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            for name, values in self.columns.items():
+                grown = np.empty(capacity, dtype=values.dtype)
+                grown[: self.size] = values[: self.size]
+                self.columns[name] = grown
+        for name, code in self.COLUMNS:
+            values = self.staged[name]
+            self.columns[name][self.size : needed] = np.frombuffer(
+                values, dtype=np.dtype(code)
+            )
+            self.staged[name] = array(code)
+        self.size = needed
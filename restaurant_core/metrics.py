@@ -0,0 +1,204 @@
+import bisect
+import functools
+import importlib
+import json
+import threading
+import time
+
+INSTRUMENTED = (
+    ("ingest.OrderEngine", "validate", "order_validate"),
+    ("ingest.OrderEngine", "_apply", "order_commit"),
+    ("service.OrderService", "place_order", "service_place_order"),
+    ("models.OrderHistory", "add_order", "history_add_order"),
+    ("models.OrderHistory", "remove_order_by_id", "history_remove_order"),
+    ("models.Menu", "add_item", "menu_add_item"),
+    ("models.Menu", "update_item", "menu_update_item"),
+    ("models.Menu", "remove_item", "menu_remove_item"),
+    ("models.OrderHistory", "orders_between", "history_orders_between"),
+    ("models.OrderHistory", "count_item_orders", "history_count_item_orders"),
+    ("models.OrderHistory", "count_item_quantity", "history_count_item_quantity"),
+    ("models.OrderHistory", "best_sellers", "history_best_sellers"),
+    ("models.AccountRegistry", "find_restaurant", "login_restaurant"),
+    ("models.AccountRegistry", "find_customer", "login_customer"),
+    ("search.MenuSearchIndex", "search", "menu_search"),
+    ("recommend.CoOccurrenceIndex", "suggest", "suggest_add_ons"),
+    ("trending.TrendingTracker", "top", "trending_top"),
+    ("kitchen.KitchenScheduler", "enqueue", "kitchen_enqueue"),
+    ("kitchen.KitchenScheduler", "dispatch", "kitchen_dispatch"),
+    ("models.Menu", "render", "render_menu"),
+    ("models", "render_orders", "render_orders"),
+)
+COUNTED = ("Restaurant", "Customer", "MenuItem", "Order")
+
+
+def resolve_owner(path):
+    module_name, _, class_name = path.partition(".")
+    owner = importlib.import_module(f"{__package__}.{module_name}")
+    return getattr(owner, class_name) if class_name else owner
+
+
+class Metrics:
+    BUCKETS = (
+        1e-6,
+        5e-6,
+        1e-5,
+        5e-5,
+        1e-4,
+        5e-4,
+        1e-3,
+        5e-3,
+        0.01,
+        0.05,
+        0.1,
+        0.5,
+        1.0,
+    )
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.operations = {}
+        self.created = dict.fromkeys(COUNTED, 0)
+        self.patched = []
+        self.lock = threading.Lock()
+
+    def instrument(self, targets=()):
+        if self.patched:
+            return
+        targets = [
+            (resolve_owner(path), attribute, name)
+            for path, attribute, name in INSTRUMENTED
+        ] + list(targets)
+        for owner, attribute, name in targets:
+            self._patch(owner, attribute, self._timed(name, getattr(owner, attribute)))
+        for class_name in COUNTED:
+            owner = resolve_owner(f"models.{class_name}")
+            self._patch(owner, "__init__", self._counted(class_name, owner.__init__))
+
+    def uninstrument(self):
+        while self.patched:
+            owner, attribute, original = self.patched.pop()
+            setattr(owner, attribute, original)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = [0, 0.0, [0] * (len(self.BUCKETS) + 1)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def object_counts(self):
+        counts = {}
+        registry = self.registry
+        if registry is not None:
+            restaurants = registry.restaurants.values()
+            counts["restaurants"] = len(registry.restaurants)
+            counts["customers"] = len(registry.customers)
+            counts["menu_items"] = sum(
+                len(r.menu.get_items()) for r in restaurants if r.menu
+            )
+            counts["orders"] = sum(len(r.order_history.orders) for r in restaurants)
+        return counts
+
+    def snapshot(self):
+        with self.lock:
+            operations = {
+                name: {
+                    "count": count,
+                    "sum_s": total,
+                    "mean_us": total / count * 1e6 if count else 0.0,
+                    "buckets": dict(
+                        zip([str(bound) for bound in self.BUCKETS] + ["+Inf"], buckets)
+                    ),
+                }
+                for name, (count, total, buckets) in sorted(self.operations.items())
+            }
+            created = dict(self.created)
+        snapshot = {
+            "timestamp": time.time(),
+            "operations": operations,
+            "objects_created": created,
+            "objects": self.object_counts(),
+        }
+        if self.registry is not None:
+            snapshot["idempotency"] = self.registry.placed_orders.stats()
+        return snapshot
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP restaurant_operation_seconds Latency of instrumented operations.",
+            "# TYPE restaurant_operation_seconds histogram",
+        ]
+        metric = "restaurant_operation_seconds"
+        for name, stats in snapshot["operations"].items():
+            label = f'operation="{name}"'
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{label}}} {stats['sum_s']:.9f}")
+            lines.append(f"{metric}_count{{{label}}} {stats['count']}")
+        lines.append("# HELP restaurant_objects_created_total Objects constructed.")
+        lines.append("# TYPE restaurant_objects_created_total counter")
+        for kind, count in snapshot["objects_created"].items():
+            lines.append(f'restaurant_objects_created_total{{kind="{kind}"}} {count}')
+        lines.append("# HELP restaurant_objects Objects currently registered.")
+        lines.append("# TYPE restaurant_objects gauge")
+        for kind, count in snapshot["objects"].items():
+            lines.append(f'restaurant_objects{{kind="{kind}"}} {count}')
+        cache = snapshot.get("idempotency")
+        if cache is not None:
+            lines.append("# HELP restaurant_idempotency_total Idempotency key lookups.")
+            lines.append("# TYPE restaurant_idempotency_total counter")
+            for result in (
+                "hits",
+                "misses",
+                "evictions",
+                "expirations",
+                "invalidations",
+            ):
+                lines.append(
+                    f'restaurant_idempotency_total{{result="{result}"}} {cache[result]}'
+                )
+            lines.append("# HELP restaurant_idempotency_keys Idempotency keys cached.")
+            lines.append("# TYPE restaurant_idempotency_keys gauge")
+            lines.append(f"restaurant_idempotency_keys {cache['size']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+                f.write("\n")
+            else:
+                f.write(self.to_prometheus())
+
+    def _patch(self, owner, attribute, replacement):
+        self.patched.append((owner, attribute, getattr(owner, attribute)))
+        setattr(owner, attribute, replacement)
+
+    def _timed(self, name, function):
+        observe = self.observe
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(name, perf_counter() - start)
+
+        return timed
+
+    def _counted(self, kind, function):
+        created = self.created
+
+        @functools.wraps(function)
+        def counted(*args, **kwargs):
+            function(*args, **kwargs)
+            created[kind] += 1
+
+        return counted
@@ -0,0 +1,1130 @@
+import bisect
+import collections
+import decimal
+import heapq
+import itertools
+import math
+import sys
+import threading
+import time
+from array import array
+
+# Order lines are stored in a C int array.
+MAX_QUANTITY = 2**31 - 1
+MAX_PRICE_CENTS = 2**31 - 1
+
+
+class InvalidInputError(Exception):
+    pass
+
+
+def validate_positive_number(value):
+    try:
+        number = float(value)
+        if number < 0:
+            raise InvalidInputError(
+                "Invalid input. Please enter a non-negative numeric value."
+            )
+        return number
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidInputError("Invalid input. Please enter a numeric value.")
+
+
+def validate_quantity(quantity, minimum=1):
+    if (
+        isinstance(quantity, bool)
+        or not isinstance(quantity, int)
+        or quantity < minimum
+    ):
+        if minimum:
+            raise InvalidInputError("Quantity must be a positive integer.")
+        raise InvalidInputError("Quantity must be a non-negative integer.")
+    if quantity > MAX_QUANTITY:
+        raise InvalidInputError("Quantity is too large.")
+    return quantity
+
+
+def validate_menu_item(item):
+    if not isinstance(item, MenuItem):
+        raise InvalidInputError("Invalid item object provided.")
+
+
+def validate_menu_item_name(item_name):
+    if not isinstance(item_name, str):
+        raise InvalidInputError("Invalid item name provided.")
+
+
+def validate_restaurant(restaurant):
+    if not isinstance(restaurant, Restaurant):
+        raise InvalidInputError("Invalid restaurant object provided.")
+
+
+def validate_menu(menu):
+    if not isinstance(menu, Menu):
+        raise InvalidInputError("Invalid menu object provided.")
+
+
+def normalize_contact_info(contact_info):
+    if not isinstance(contact_info, str):
+        raise InvalidInputError("Invalid phone number provided.")
+    if contact_info.isalnum():
+        return contact_info.lower()
+    key = "".join(ch for ch in contact_info.lower() if ch.isalnum())
+    if not key:
+        raise InvalidInputError("Invalid phone number provided.")
+    return key
+
+
+def normalize_address(address):
+    if not isinstance(address, str):
+        raise InvalidInputError("Invalid address provided.")
+    return " ".join(
+        "".join(ch if ch.isalnum() else " " for ch in address.lower()).split()
+    )
+
+
+def parse_location(value):
+    if value is None or value.strip() == "":
+        return None
+    try:
+        x, y = (float(part) for part in value.split(","))
+    except ValueError:
+        raise InvalidInputError(
+            "Invalid location. Please enter two numbers separated by a comma."
+        )
+    return (x, y)
+
+
+def format_time(order):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(order.created_at))
+
+
+def iter_order_report(orders, highlight=None, separator=False):
+    cyan, reset = highlight or ("", "")
+    minute = None
+    for order in orders:
+        if order.created_at // 60 != minute:
+            minute = order.created_at // 60
+            placed_at = format_time(order)
+        restaurant = order.restaurant
+        customer = order.customer
+        parts = [
+            f"{cyan}Order #{order.order_id} - {placed_at}{reset}\n",
+            f"{cyan}Order from: {restaurant.name}{reset}\n",
+            f"Restaurant Address: {restaurant.address}\n",
+            f"Restaurant Contact Info: {restaurant.contact_info}\n",
+            f"Customer: {customer.name}\n",
+            f"Customer Address: {customer.address}\n",
+            f"Customer Contact Info: {customer.contact_info}\n",
+            f"{cyan}Items:{reset}\n",
+        ]
+        for item, _, unit_cents in order.iter_priced_lines():
+            parts.append(f"{cyan}{item.name} - {format_cents(unit_cents)}{reset}\n")
+        parts.append(f"Total price: {format_cents(order.total_cents)}\n")
+        if separator:
+            parts.append("\n")
+        yield "".join(parts)
+
+
+def write_chunks(chunks, stream, chunk_size=1 << 16):
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            stream.write("".join(buffer))
+            buffer.clear()
+            size = 0
+    if buffer:
+        stream.write("".join(buffer))
+    stream.flush()
+
+
+def render_orders(
+    orders, stream=None, offset=0, limit=None, separator=False, highlight=None
+):
+    if stream is None:
+        stream = sys.stdout
+    stop = None if limit is None else offset + limit
+    page = itertools.islice(orders, offset, stop)
+    shown = 0
+
+    def counted():
+        nonlocal shown
+        for order in page:
+            shown += 1
+            yield order
+
+    write_chunks(iter_order_report(counted(), highlight, separator), stream)
+    if limit is None or shown < limit:
+        return None
+    return offset + shown
+
+
+def to_cents(price):
+    if isinstance(price, bool) or not isinstance(price, (int, float, decimal.Decimal)):
+        raise InvalidInputError("Invalid price. Please enter a numeric value.")
+    amount = decimal.Decimal(str(price))
+    if not amount.is_finite():
+        raise InvalidInputError("Invalid price. Please enter a finite value.")
+    try:
+        cents = amount.quantize(decimal.Decimal("0.01"), rounding=decimal.ROUND_HALF_UP)
+    except decimal.InvalidOperation:
+        raise InvalidInputError("Invalid price. Please enter a numeric value.")
+    return int(cents * 100)
+
+
+def format_cents(cents):
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
+
+
+class Restaurant:
+    __slots__ = (
+        "name",
+        "address",
+        "contact_info",
+        "location",
+        "account_id",
+        "listeners",
+        "menu",
+        "order_history",
+        "item_table",
+    )
+
+    def __init__(self, name, address, contact_info, location=None):
+        self.name = name
+        self.address = address
+        self.contact_info = contact_info
+        self.location = location
+        self.account_id = None
+        self.listeners = []
+        self.menu = {}
+        self.order_history = OrderHistory()
+        self.item_table = ItemTable()
+        self.order_history.listeners.append(self._relay)
+
+    def add_menu(self, menu):
+        validate_menu(menu)
+        self._replace_menu(menu)
+
+    def remove_menu(self):
+        self._replace_menu({})
+
+    def update_menu(self, menu):
+        validate_menu(menu)
+        self._replace_menu(menu)
+
+    def get_menu(self):
+        return self.menu
+
+    def get_order_history(self):
+        return self.order_history
+
+    def _replace_menu(self, menu):
+        if isinstance(self.menu, Menu):
+            self.menu.listeners.remove(self._relay)
+        self.menu = menu
+        if isinstance(menu, Menu):
+            menu.listeners.append(self._relay)
+        self._relay("menu_replaced", menu)
+
+    def _relay(self, event, *args):
+        for listener in self.listeners:
+            listener(event, self, *args)
+
+
+class Menu:
+    def __init__(self):
+        self.items = {}
+        self.positions = []
+        self.indexes = {}
+        self.rendered = {}
+        self.listeners = []
+        self.version = 0
+        self.history = {}
+
+    def add_item(self, item):
+        validate_menu_item(item)
+        if item.name not in self.items:
+            self.indexes[item.name] = len(self.positions)
+            self.positions.append(item.name)
+        self.items[item.name] = item
+        self.rendered.clear()
+        self._record_change(item.name, item)
+        self._notify("menu_item_added", item)
+
+    def add_items(self, items):
+        for item in items:
+            validate_menu_item(item)
+        for item in items:
+            if item.name not in self.items:
+                self.indexes[item.name] = len(self.positions)
+                self.positions.append(item.name)
+            self.items[item.name] = item
+            self._record_change(item.name, item)
+        self.rendered.clear()
+        self._notify("menu_items_added", items)
+
+    def remove_item(self, item_name):
+        validate_menu_item_name(item_name)
+        if item_name not in self.items:
+            raise InvalidInputError("Item not found in the menu.")
+        item = self.items.pop(item_name)
+        # The last item takes the place of the removed one, so removal does
+        # not shift the rest of the menu.
+        index = self.indexes.pop(item_name)
+        last = self.positions.pop()
+        if last != item_name:
+            self.positions[index] = last
+            self.indexes[last] = index
+        self.rendered.clear()
+        self._record_change(item_name, None)
+        self._notify("menu_item_removed", item)
+
+    def update_item(self, item_name, new_description, new_price):
+        if not all(isinstance(arg, str) for arg in [item_name, new_description]):
+            raise InvalidInputError("Invalid arguments provided.")
+        if not isinstance(new_price, (int, float)) or new_price < 0:
+            raise InvalidInputError(
+                "Invalid price. Please enter a non-negative numeric value."
+            )
+        if item_name not in self.items:
+            raise InvalidInputError("Item not found in the menu.")
+        item = MenuItem(item_name, new_description, new_price)
+        self.items[item_name] = item
+        self.rendered.clear()
+        self._record_change(item_name, item)
+        self._notify("menu_item_updated", item)
+        return item
+
+    def get_items(self):
+        return self.items
+
+    def get_item_at(self, index):
+        return self.items[self.positions[index]]
+
+    def item_at_version(self, item_name, version):
+        versions, items = self.history.get(item_name, ((), ()))
+        index = bisect.bisect_right(versions, version)
+        return items[index - 1] if index else None
+
+    def snapshot(self, version=None):
+        if version is None or version >= self.version:
+            return {name: self.items[name] for name in self.positions}
+        items = {}
+        for item_name in self.history:
+            item = self.item_at_version(item_name, version)
+            if item is not None:
+                items[item_name] = item
+        return items
+
+    def restore_history(self, version, history):
+        self.version = version
+        self.history = history
+
+    def render(self, with_prices=True):
+        listing = self.rendered.get(with_prices)
+        if listing is None:
+            if with_prices:
+                lines = [
+                    f"{i}. {item_name} - "
+                    f"{format_cents(self.items[item_name].price_cents)}\n"
+                    for i, item_name in enumerate(self.positions, start=1)
+                ]
+            else:
+                lines = [
+                    f"{i}. {item_name}\n"
+                    for i, item_name in enumerate(self.positions, start=1)
+                ]
+            listing = self.rendered[with_prices] = "".join(lines)
+        return listing
+
+    def _record_change(self, item_name, item):
+        self.version += 1
+        versions, items = self.history.setdefault(item_name, ([], []))
+        versions.append(self.version)
+        items.append(item)
+
+    def _notify(self, event, *args):
+        for listener in self.listeners:
+            listener(event, *args)
+
+
+class MenuItem:
+    __slots__ = ("name", "description", "price_cents")
+
+    def __init__(self, name, description, price):
+        self.name = name
+        self.description = description
+        self.price_cents = to_cents(price)
+        if abs(self.price_cents) > MAX_PRICE_CENTS:
+            raise InvalidInputError("Price is too large.")
+
+    @property
+    def price(self):
+        return self.price_cents / 100
+
+
+class ItemTable:
+    # Order lines refer to items by their index in the table of the
+    # restaurant, so an item lives as long as the restaurant that sold it.
+    __slots__ = ("items", "ids", "lock")
+
+    def __init__(self):
+        self.items = []
+        self.ids = {}
+        self.lock = threading.Lock()
+
+    def intern(self, item):
+        item_id = self.ids.get(item)
+        if item_id is None:
+            with self.lock:
+                item_id = self.ids.get(item)
+                if item_id is None:
+                    item_id = len(self.items)
+                    self.items.append(item)
+                    self.ids[item] = item_id
+        return item_id
+
+
+class IdempotencyCache:
+    def __init__(self, capacity=10_000, ttl=600.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, valid=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            elif entry is not None and valid is not None and not valid(entry[1]):
+                del self.entries[key]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class Customer:
+    __slots__ = (
+        "name",
+        "address",
+        "contact_info",
+        "location",
+        "account_id",
+        "order_history",
+    )
+
+    def __init__(self, name, address, contact_info, location=None):
+        self.name = name
+        self.address = address
+        self.contact_info = contact_info
+        self.location = location
+        self.account_id = None
+        self.order_history = CustomerHistory()
+
+    def place_order(self, restaurant, order_items):
+        validate_restaurant(restaurant)
+        if not order_items:
+            raise InvalidInputError("No items selected in the order.")
+        order = Order(self, restaurant, order_items)
+        self.order_history.append(order)
+        restaurant.order_history.add_order(order)
+        return order
+
+    def view_order_history(
+        self,
+        cursor=None,
+        limit=None,
+        stream=None,
+        highlight=None,
+        restaurant=None,
+        start=None,
+        end=None,
+    ):
+        if len(self.order_history) == 0:
+            return None
+        if limit is None:
+            orders = self.order_history.iter_orders(restaurant, start, end, cursor)
+            next_cursor = None
+        else:
+            orders, next_cursor = self.order_history.page(
+                cursor, limit, restaurant, start, end
+            )
+        render_orders(orders, stream, highlight=highlight)
+        return next_cursor
+
+
+class Order:
+    __slots__ = (
+        "order_id",
+        "created_at",
+        "customer",
+        "restaurant",
+        "lines",
+        "total_cents",
+        "menu_version",
+        "histories",
+    )
+    next_id = 1
+    id_lock = threading.Lock()
+
+    def __init__(self, customer, restaurant, items, order_id=None, created_at=None):
+        with Order.id_lock:
+            if order_id is None:
+                order_id = Order.next_id
+            Order.next_id = max(Order.next_id, order_id + 1)
+        self.order_id = order_id
+        self.created_at = time.time() if created_at is None else created_at
+        self.customer = customer
+        self.restaurant = restaurant
+        self.lines = array("i")
+        self.total_cents = 0
+        self.menu_version = getattr(restaurant.menu, "version", 0)
+        for item, quantity in items.items():
+            self._append_line(item, validate_quantity(quantity), item.price_cents)
+        self.histories = ()
+
+    @classmethod
+    def restore(
+        cls, customer, restaurant, lines, order_id, created_at, menu_version=None
+    ):
+        order = cls(customer, restaurant, {}, order_id, created_at)
+        if menu_version is not None:
+            order.menu_version = menu_version
+        for item, quantity, unit_cents in lines:
+            if unit_cents is None:
+                unit_cents = item.price_cents
+            order._append_line(item, quantity, unit_cents)
+        return order
+
+    @property
+    def items(self):
+        return dict(self.iter_lines())
+
+    @property
+    def total_price(self):
+        return self.total_cents / 100
+
+    def menu_snapshot(self):
+        return self.restaurant.menu.snapshot(self.menu_version)
+
+    def iter_lines(self):
+        items = self.restaurant.item_table.items
+        lines = self.lines
+        for position in range(0, len(lines), 3):
+            yield items[lines[position]], lines[position + 1]
+
+    def iter_priced_lines(self):
+        items = self.restaurant.item_table.items
+        lines = self.lines
+        for position in range(0, len(lines), 3):
+            yield items[lines[position]], lines[position + 1], lines[position + 2]
+
+    def line_count(self):
+        return len(self.lines) // 3
+
+    def line_at(self, index):
+        position = index * 3
+        if index < 0 or position >= len(self.lines):
+            raise IndexError("Order line index out of range.")
+        lines = self.lines
+        return (
+            self.restaurant.item_table.items[lines[position]],
+            lines[position + 1],
+            lines[position + 2],
+        )
+
+    def quantity_of(self, item):
+        position = self._find_line(item)
+        return 0 if position is None else self.lines[position + 1]
+
+    def calculate_total_price(self):
+        return self.total_price
+
+    def add_item(self, item, quantity=1):
+        validate_menu_item(item)
+        validate_quantity(quantity)
+        position = self._find_line(item)
+        if position is None:
+            self._append_line(item, quantity, item.price_cents)
+            self._notify_histories(item, 0, quantity, item.price_cents)
+        else:
+            quantity = validate_quantity(self.lines[position + 1] + quantity)
+            self._set_line(position, quantity)
+
+    def remove_item(self, item, quantity=None):
+        position = self._find_line(item)
+        if position is None:
+            raise InvalidInputError("Item not found in the order.")
+        new_quantity = 0
+        if quantity is not None:
+            validate_quantity(quantity)
+            new_quantity = max(self.lines[position + 1] - quantity, 0)
+        self._set_line(position, new_quantity)
+
+    def set_quantity(self, item, quantity):
+        validate_menu_item(item)
+        validate_quantity(quantity, 0)
+        position = self._find_line(item)
+        if position is None:
+            if quantity:
+                self._append_line(item, quantity, item.price_cents)
+                self._notify_histories(item, 0, quantity, item.price_cents)
+        else:
+            self._set_line(position, quantity)
+
+    def _append_line(self, item, quantity, unit_cents):
+        item_id = self.restaurant.item_table.intern(item)
+        self.lines.extend((item_id, quantity, unit_cents))
+        self.total_cents += quantity * unit_cents
+
+    def _set_line(self, position, quantity):
+        lines = self.lines
+        item = self.restaurant.item_table.items[lines[position]]
+        old_quantity = lines[position + 1]
+        unit_cents = lines[position + 2]
+        self.total_cents += (quantity - old_quantity) * unit_cents
+        if quantity:
+            lines[position + 1] = quantity
+        else:
+            del lines[position : position + 3]
+        self._notify_histories(item, old_quantity, quantity, unit_cents)
+
+    def _find_line(self, item):
+        if not isinstance(item, MenuItem):
+            return None
+        item_id = self.restaurant.item_table.ids.get(item)
+        if item_id is None:
+            return None
+        try:
+            return self.lines[::3].index(item_id) * 3
+        except ValueError:
+            return None
+
+    def _notify_histories(self, item, old_quantity, new_quantity, unit_cents):
+        for history in self.histories:
+            history.item_changed(self, item, old_quantity, new_quantity, unit_cents)
+
+
+class OrderHistory:
+    def __init__(self):
+        self.orders = {}
+        self.timeline = []
+        self.stale_ids = set()
+        self.item_quantities = {}
+        self.item_order_counts = {}
+        self.listeners = []
+
+    def add_order(self, order):
+        if order.order_id in self.orders:
+            raise InvalidInputError("Order is already in the history.")
+        if order.order_id in self.stale_ids:
+            self._compact_timeline()
+        self.orders[order.order_id] = order
+        entry = (order.created_at, order.order_id)
+        if not self.timeline or entry > self.timeline[-1]:
+            self.timeline.append(entry)
+        else:
+            bisect.insort(self.timeline, entry)
+        order.histories += (self,)
+        # An order can hold several versions of one item, but it still
+        # counts as one order for that name.
+        names = set()
+        for item, quantity in order.iter_lines():
+            self._count_item(item.name, quantity, item.name not in names)
+            names.add(item.name)
+        self._notify("order_added", order)
+
+    def get_order(self, order_id):
+        return self.orders.get(order_id)
+
+    def remove_order(self, order):
+        if self.orders.get(order.order_id) is not order:
+            raise InvalidInputError("Order not found in the history.")
+        self.remove_order_by_id(order.order_id)
+
+    def remove_order_by_id(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            raise InvalidInputError("Order not found in the history.")
+        self.stale_ids.add(order_id)
+        if len(self.stale_ids) > len(self.timeline) // 2:
+            self._compact_timeline()
+        order.histories = tuple(
+            history for history in order.histories if history is not self
+        )
+        names = set()
+        for item, quantity in order.iter_lines():
+            self._count_item(item.name, -quantity, -(item.name not in names))
+            names.add(item.name)
+        self._notify("order_removed", order)
+        customer_history = getattr(order.customer, "order_history", None)
+        if isinstance(customer_history, CustomerHistory):
+            customer_history.pin(order)
+
+    def orders_between(self, start=None, end=None):
+        low = 0 if start is None else bisect.bisect_left(self.timeline, (start,))
+        high = (
+            len(self.timeline)
+            if end is None
+            else bisect.bisect_left(self.timeline, (end,))
+        )
+        return [
+            self.orders[order_id]
+            for _, order_id in self.timeline[low:high]
+            if order_id not in self.stale_ids
+        ]
+
+    def _notify(self, event, *args):
+        for listener in self.listeners:
+            listener(event, *args)
+
+    def _compact_timeline(self):
+        self.timeline = [
+            entry for entry in self.timeline if entry[1] not in self.stale_ids
+        ]
+        self.stale_ids.clear()
+
+    def view_orders(self, offset=0, limit=None, stream=None, highlight=None):
+        if len(self.orders) == 0:
+            return None
+        return render_orders(
+            self.orders.values(), stream, offset, limit, True, highlight
+        )
+
+    def item_changed(self, order, item, old_quantity, new_quantity, unit_cents):
+        order_delta = (new_quantity > 0) - (old_quantity > 0)
+        if order_delta and any(
+            other is not item and other.name == item.name
+            for other, _ in order.iter_lines()
+        ):
+            order_delta = 0
+        self._count_item(item.name, new_quantity - old_quantity, order_delta)
+        self._notify(
+            "order_item_changed", order, item, old_quantity, new_quantity, unit_cents
+        )
+
+    def count_item_orders(self, item_name):
+        return self.item_order_counts.get(item_name, 0)
+
+    def count_item_quantity(self, item_name):
+        return self.item_quantities.get(item_name, 0)
+
+    def best_sellers(self, n=10):
+        return heapq.nlargest(n, self.item_quantities.items(), key=lambda pair: pair[1])
+
+    def _count_item(self, item_name, quantity_delta, order_delta):
+        quantity = self.item_quantities.get(item_name, 0) + quantity_delta
+        orders = self.item_order_counts.get(item_name, 0) + order_delta
+        if orders > 0:
+            self.item_quantities[item_name] = quantity
+            self.item_order_counts[item_name] = orders
+        else:
+            self.item_quantities.pop(item_name, None)
+            self.item_order_counts.pop(item_name, None)
+
+
+class CustomerHistory:
+    def __init__(self):
+        self.entries = []
+        self.orders = {}
+        self.by_restaurant = {}
+        self.size = 0
+        self.spill = None
+        self.keep = None
+        self.spill_at = None
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return reversed(list(self.iter_orders()))
+
+    def append(self, order):
+        self._insert(order)
+        self.size += 1
+        if self.spill is not None and len(self.entries) >= self.spill_at:
+            self._spill()
+
+    def latest(self):
+        return next(self.iter_orders(), None)
+
+    def iter_orders(self, restaurant=None, start=None, end=None, before=None):
+        entries = (
+            self.entries
+            if restaurant is None
+            else self.by_restaurant.get(restaurant, [])
+        )
+        recent = self._iter_entries(entries, start, end, before)
+        if self.spill is None or self.spill.count == 0:
+            return (order for _, order in recent)
+        account_id = None if restaurant is None else restaurant.account_id
+        spilled = self.spill.iter_newest(start, end, before, account_id)
+        merged = heapq.merge(recent, spilled, key=lambda pair: pair[0], reverse=True)
+        return (order for _, order in merged)
+
+    def page(self, cursor=None, limit=20, restaurant=None, start=None, end=None):
+        orders = list(
+            itertools.islice(
+                self.iter_orders(restaurant, start, end, cursor), limit + 1
+            )
+        )
+        if len(orders) <= limit:
+            return orders, None
+        del orders[limit:]
+        return orders, (orders[-1].created_at, orders[-1].order_id)
+
+    def spill_to(self, spill, keep):
+        self.spill = spill
+        self.keep = keep
+        self._spill()
+
+    def pin(self, order):
+        # A spilled order is resolved through its restaurant, so one the
+        # restaurant lets go of has to come back into memory.
+        if self.spill is not None and order.order_id not in self.orders:
+            self._insert(order)
+
+    def _insert(self, order):
+        entry = (order.created_at, order.order_id)
+        for entries in (
+            self.entries,
+            self.by_restaurant.setdefault(order.restaurant, []),
+        ):
+            if not entries or entry > entries[-1]:
+                entries.append(entry)
+            else:
+                bisect.insort(entries, entry)
+        self.orders[order.order_id] = order
+
+    def _iter_entries(self, entries, start, end, before):
+        low = 0 if start is None else bisect.bisect_left(entries, (start,))
+        high = len(entries) if end is None else bisect.bisect_left(entries, (end,))
+        if before is not None:
+            high = min(high, bisect.bisect_left(entries, tuple(before)))
+        for index in range(high - 1, low - 1, -1):
+            entry = entries[index]
+            yield entry, self.orders[entry[1]]
+
+    def _spill(self):
+        # Only this history's references are paged out: a spilled order
+        # stays in memory through its restaurant's history.
+        count = len(self.entries) - self.keep
+        records = []
+        for entry in self.entries[: max(count, 0)]:
+            order = self.orders[entry[1]]
+            restaurant = order.restaurant
+            if restaurant.order_history.get_order(order.order_id) is order:
+                records.append((*entry, restaurant.account_id))
+                del self.orders[entry[1]]
+        # Orders detached from their restaurant stay in memory; spilling again
+        # only once another keep's worth has arrived keeps appends amortized.
+        self.spill_at = len(self.entries) - len(records) + self.keep + 1
+        if not records:
+            return
+        self.entries = [entry for entry in self.entries if entry[1] in self.orders]
+        for restaurant, entries in list(self.by_restaurant.items()):
+            entries = [entry for entry in entries if entry[1] in self.orders]
+            if entries:
+                self.by_restaurant[restaurant] = entries
+            else:
+                del self.by_restaurant[restaurant]
+        self.spill.extend(records)
+
+
+class AddressIndex:
+    def __init__(self, cell_size=1.0):
+        self.cell_size = cell_size
+        self.by_address = {}
+        self.grid = {}
+        self.entries = {}
+
+    def add(self, restaurant):
+        if restaurant in self.entries:
+            self.remove(restaurant)
+        key = normalize_address(restaurant.address)
+        self.by_address.setdefault(key, {})[restaurant] = None
+        cell = None
+        if restaurant.location is not None:
+            cell = self._cell(restaurant.location)
+            self.grid.setdefault(cell, {})[restaurant] = restaurant.location
+        self.entries[restaurant] = (key, cell)
+
+    def remove(self, restaurant):
+        key, cell = self.entries.pop(restaurant)
+        self._discard(self.by_address, key, restaurant)
+        if cell is not None:
+            self._discard(self.grid, cell, restaurant)
+
+    def at_address(self, address):
+        return list(self.by_address.get(normalize_address(address), ()))
+
+    def within_radius(self, location, radius):
+        x, y = location
+        low_x, low_y = self._cell((x - radius, y - radius))
+        high_x, high_y = self._cell((x + radius, y + radius))
+        if (high_x - low_x + 1) * (high_y - low_y + 1) > len(self.grid):
+            cells = list(self.grid.values())
+        else:
+            cells = [
+                self.grid[(cx, cy)]
+                for cx in range(low_x, high_x + 1)
+                for cy in range(low_y, high_y + 1)
+                if (cx, cy) in self.grid
+            ]
+        found = []
+        for bucket in cells:
+            for restaurant, point in bucket.items():
+                distance = math.dist(location, point)
+                if distance <= radius:
+                    found.append((distance, restaurant))
+        found.sort(key=lambda pair: pair[0])
+        return [restaurant for _, restaurant in found]
+
+    def nearest(self, location, k, radius=None):
+        if k <= 0 or not self.grid:
+            return []
+        center_x, center_y = self._cell(location)
+        found = []
+        ring = 0
+        while True:
+            if (2 * ring + 1) ** 2 >= len(self.grid):
+                for (cx, cy), bucket in self.grid.items():
+                    if max(abs(cx - center_x), abs(cy - center_y)) >= ring:
+                        self._collect(location, bucket, found)
+                break
+            for cell in self._ring(center_x, center_y, ring):
+                if cell in self.grid:
+                    self._collect(location, self.grid[cell], found)
+            reach = ring * self.cell_size
+            if radius is not None and reach >= radius:
+                break
+            if len(found) >= k:
+                found.sort(key=lambda pair: pair[0])
+                if found[k - 1][0] <= reach:
+                    break
+            ring += 1
+        found.sort(key=lambda pair: pair[0])
+        if radius is not None:
+            found = [pair for pair in found if pair[0] <= radius]
+        return [restaurant for _, restaurant in found[:k]]
+
+    def nearby(self, address, location=None, radius=None, k=None):
+        if location is None or (radius is None and k is None):
+            return self.at_address(address)
+        if k is None:
+            matches = self.within_radius(location, radius)
+        else:
+            matches = self.nearest(location, k, radius)
+        seen = set(matches)
+        for restaurant in self.at_address(address):
+            if restaurant not in seen:
+                matches.append(restaurant)
+        return matches
+
+    def _cell(self, location):
+        return (
+            math.floor(location[0] / self.cell_size),
+            math.floor(location[1] / self.cell_size),
+        )
+
+    def _ring(self, center_x, center_y, ring):
+        if ring == 0:
+            yield (center_x, center_y)
+            return
+        for cx in range(center_x - ring, center_x + ring + 1):
+            yield (cx, center_y - ring)
+            yield (cx, center_y + ring)
+        for cy in range(center_y - ring + 1, center_y + ring):
+            yield (center_x - ring, cy)
+            yield (center_x + ring, cy)
+
+    def _collect(self, location, bucket, found):
+        for restaurant, point in bucket.items():
+            found.append((math.dist(location, point), restaurant))
+
+    def _discard(self, index, key, restaurant):
+        bucket = index[key]
+        del bucket[restaurant]
+        if not bucket:
+            del index[key]
+
+
+NEARBY_RADIUS = 5.0
+NEARBY_LIMIT = 10
+
+
+class AccountRegistry:
+    def __init__(self):
+        self.restaurants = {}
+        self.restaurant_ids = {}
+        self.customers = {}
+        self.address_index = AddressIndex()
+        self.next_restaurant_id = 1
+        self.next_customer_id = 1
+        self.listeners = []
+        self.placed_orders = IdempotencyCache()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def find_restaurant(self, contact_info):
+        return self.restaurants.get(normalize_contact_info(contact_info))
+
+    def replayed_order(self, customer, restaurant, idempotency_key):
+        # A removed order is forgotten, so a retry places it again.
+        order = self.placed_orders.get(
+            (customer, idempotency_key),
+            lambda order: order.restaurant.order_history.get_order(order.order_id)
+            is order,
+        )
+        if order is not None and order.restaurant is not restaurant:
+            raise InvalidInputError(
+                "Idempotency key was already used for another restaurant."
+            )
+        return order
+
+    def remember_order(self, customer, idempotency_key, order):
+        self.placed_orders.put((customer, idempotency_key), order)
+
+    def find_restaurant_by_id(self, account_id):
+        return self.restaurant_ids.get(account_id)
+
+    def find_customer(self, contact_info):
+        return self.customers.get(normalize_contact_info(contact_info))
+
+    def create_restaurant(
+        self, name, address, contact_info, location=None, account_id=None
+    ):
+        key = self._new_key(self.restaurants, contact_info)
+        normalize_address(address)
+        restaurant = Restaurant(name, address, contact_info, location)
+        if account_id is None:
+            account_id = self.next_restaurant_id
+        self.next_restaurant_id = max(self.next_restaurant_id, account_id + 1)
+        restaurant.account_id = account_id
+        restaurant.add_menu(Menu())
+        self.address_index.add(restaurant)
+        self.restaurants[key] = restaurant
+        self.restaurant_ids[account_id] = restaurant
+        restaurant.listeners.append(self._relay)
+        self._relay("restaurant_created", restaurant)
+        return restaurant
+
+    def create_customer(
+        self, name, address, contact_info, location=None, account_id=None
+    ):
+        key = self._new_key(self.customers, contact_info)
+        customer = Customer(name, address, contact_info, location)
+        if account_id is None:
+            account_id = self.next_customer_id
+        self.next_customer_id = max(self.next_customer_id, account_id + 1)
+        customer.account_id = account_id
+        self.customers[key] = customer
+        self._relay("customer_created", customer)
+        return customer
+
+    def update_restaurant(
+        self, restaurant, name=None, address=None, contact_info=None, location=None
+    ):
+        validate_restaurant(restaurant)
+        self._update_account(
+            self.restaurants, restaurant, name, address, contact_info, location
+        )
+        if address is not None or location is not None:
+            self.address_index.add(restaurant)
+        self._relay("restaurant_updated", restaurant)
+
+    def update_customer(
+        self, customer, name=None, address=None, contact_info=None, location=None
+    ):
+        if not isinstance(customer, Customer):
+            raise InvalidInputError("Invalid customer object provided.")
+        self._update_account(
+            self.customers, customer, name, address, contact_info, location
+        )
+        self._relay("customer_updated", customer)
+
+    def nearby_restaurants(self, customer, radius=None, k=None):
+        return self.address_index.nearby(customer.address, customer.location, radius, k)
+
+    def get_restaurants(self):
+        return list(self.restaurants.values())
+
+    def get_customers(self):
+        return list(self.customers.values())
+
+    def _relay(self, event, account, *args):
+        for listener in self.listeners:
+            listener(event, account, *args)
+
+    def _new_key(self, index, contact_info):
+        key = normalize_contact_info(contact_info)
+        if key in index:
+            raise InvalidInputError("This phone number is already registered.")
+        return key
+
+    def _update_account(self, index, account, name, address, contact_info, location):
+        old_key = normalize_contact_info(account.contact_info)
+        if index.get(old_key) is not account:
+            raise InvalidInputError("Account is not registered.")
+        if address is not None:
+            normalize_address(address)
+        if contact_info is not None:
+            new_key = normalize_contact_info(contact_info)
+            if new_key != old_key:
+                if new_key in index:
+                    raise InvalidInputError("This phone number is already registered.")
+                del index[old_key]
+                index[new_key] = account
+            account.contact_info = contact_info
+        if name is not None:
+            account.name = name
+        if address is not None:
+            account.address = address
+        if location is not None:
+            account.location = location
@@ -0,0 +1,93 @@
+import heapq
+import threading
+from operator import itemgetter
+
+from .models import Menu
+
+
+class CoOccurrenceIndex:
+    def __init__(self, k=10, slack=4):
+        self.k = k
+        self.capacity = k * slack
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def attach(self, registry):
+        with self.lock:
+            for restaurant in registry.restaurants.values():
+                for order in restaurant.order_history.orders.values():
+                    self._add_order(restaurant, order, 1)
+        registry.subscribe(self.record)
+
+    def record(self, event, account, *args):
+        if event == "order_added":
+            with self.lock:
+                self._add_order(account, args[0], 1)
+        elif event == "order_removed":
+            with self.lock:
+                self._add_order(account, args[0], -1)
+        elif event == "order_item_changed":
+            order, item, old_quantity, new_quantity, _ = args
+            if (old_quantity > 0) == (new_quantity > 0):
+                return
+            names = [line_item.name for line_item, _ in order.iter_lines()]
+            # Another line may hold an older version of the same item.
+            if new_quantity > 0 and names.count(item.name) == 1:
+                delta = 1
+            elif new_quantity == 0 and item.name not in names:
+                delta = -1
+            else:
+                return
+            with self.lock:
+                table = self.tables.setdefault(account, {})
+                for name in set(names):
+                    if name != item.name:
+                        self._bump(table, item.name, name, delta)
+                        self._bump(table, name, item.name, delta)
+
+    def neighbors(self, restaurant, name, limit=None):
+        with self.lock:
+            counts = self.tables.get(restaurant, {}).get(name, {})
+            return self._top(counts, self.k if limit is None else min(limit, self.k))
+
+    def suggest(self, restaurant, items, limit=3):
+        basket = {getattr(item, "name", item) for item in items}
+        scores = {}
+        with self.lock:
+            table = self.tables.get(restaurant, {})
+            for name in basket:
+                for other, count in self._top(table.get(name, {}), self.k):
+                    if other not in basket:
+                        scores[other] = scores.get(other, 0) + count
+        menu_items = (
+            restaurant.menu.get_items() if isinstance(restaurant.menu, Menu) else {}
+        )
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [
+            (menu_items[name], count) for name, count in ranked if name in menu_items
+        ][:limit]
+
+    def _add_order(self, restaurant, order, delta):
+        names = list({item.name for item, _ in order.iter_lines()})
+        if len(names) < 2:
+            return
+        table = self.tables.setdefault(restaurant, {})
+        for name in names:
+            for other in names:
+                if other != name:
+                    self._bump(table, name, other, delta)
+
+    def _bump(self, table, name, other, delta):
+        counts = table.setdefault(name, {})
+        count = counts.get(other, 0) + delta
+        if count > 0:
+            counts[other] = count
+            # Letting a row grow to twice its capacity before trimming keeps
+            # the cost of pruning constant per update.
+            if len(counts) > 2 * self.capacity:
+                table[name] = dict(self._top(counts, self.capacity))
+        else:
+            counts.pop(other, None)
+
+    def _top(self, counts, limit):
+        return heapq.nlargest(limit, counts.items(), key=itemgetter(1))
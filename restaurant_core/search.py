@@ -0,0 +1,291 @@
+import bisect
+import heapq
+import itertools
+import re
+import threading
+from array import array
+
+from .models import MAX_PRICE_CENTS, InvalidInputError, Menu, to_cents
+
+SEARCH_STOPWORDS = frozenset(
+    ("a", "an", "and", "cheap", "for", "in", "of", "some", "the", "with")
+)
+PRICE_FILTERS = (
+    (
+        re.compile(r"\bbetween\s*\$?(\d+(?:\.\d+)?)\s*(?:and|-)\s*\$?(\d+(?:\.\d+)?)"),
+        "between",
+    ),
+    (
+        re.compile(
+            r"\b(?:under|below|less than|cheaper than|at most|max)\s*\$?(\d+(?:\.\d+)?)"
+        ),
+        "max",
+    ),
+    (
+        re.compile(r"\b(?:over|above|more than|at least|min)\s*\$?(\d+(?:\.\d+)?)"),
+        "min",
+    ),
+)
+
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def price_bound(value):
+    # A bound no menu price can reach is dropped rather than failing the query.
+    try:
+        cents = to_cents(float(value))
+    except (ValueError, InvalidInputError):
+        return None
+    return cents if cents <= MAX_PRICE_CENTS else None
+
+
+def parse_search_query(query):
+    query = query.lower()
+    min_cents = 0
+    max_cents = None
+    for pattern, kind in PRICE_FILTERS:
+        match = pattern.search(query)
+        if match is None:
+            continue
+        query = query[: match.start()] + " " + query[match.end() :]
+        if kind == "between":
+            low, high = map(price_bound, match.groups())
+            if low is not None and high is not None and low > high:
+                low, high = high, low
+            min_cents, max_cents = low or 0, high
+        elif kind == "max":
+            max_cents = price_bound(match.group(1))
+        else:
+            min_cents = price_bound(match.group(1)) or 0
+    terms = [token for token in tokenize(query) if token not in SEARCH_STOPWORDS]
+    return terms, min_cents, max_cents
+
+
+class MenuSearchIndex:
+    NAME_WEIGHT = 2
+    DESCRIPTION_WEIGHT = 1
+    MAX_EXPANSIONS = 32
+    MAX_TERMS = 8
+    BULK_MERGE = 64
+
+    def __init__(self):
+        self.postings = {}
+        self.token_counts = {}
+        self.staged = {}
+        self.trie = {}
+        self.entries = {}
+        self.items = []
+        self.item_ids = {}
+        self.free_ids = []
+        self.menus = {}
+        self.lock = threading.Lock()
+
+    def attach(self, registry):
+        for restaurant in registry.restaurants.values():
+            self.index_menu(restaurant)
+        registry.subscribe(self.record)
+
+    def record(self, event, account, *args):
+        with self.lock:
+            self._record(event, account, args)
+
+    def _record(self, event, account, args):
+        if event == "menu_item_added" or event == "menu_item_updated":
+            self.add(account, args[0])
+        elif event == "menu_items_added":
+            for item in args[0]:
+                self.add(account, item)
+        elif event == "menu_item_removed":
+            self.remove(args[0])
+        elif event == "menu_replaced" or event == "restaurant_created":
+            self.index_menu(account)
+
+    def index_menu(self, restaurant):
+        for item_id in list(self.menus.get(restaurant, {}).values()):
+            self.remove(self.items[item_id])
+        if isinstance(restaurant.menu, Menu):
+            for item in restaurant.menu.get_items().values():
+                self.add(restaurant, item)
+
+    def add(self, restaurant, item):
+        names = self.menus.setdefault(restaurant, {})
+        previous = names.get(item.name)
+        if previous is not None:
+            self.remove(self.items[previous])
+        self.remove(item)
+        # Slots of removed items are reused, so IDs stay below 2**32.
+        if self.free_ids:
+            item_id = self.free_ids.pop()
+            self.items[item_id] = item
+        else:
+            item_id = len(self.items)
+            self.items.append(item)
+        self.item_ids[item] = item_id
+        weights = dict.fromkeys(tokenize(item.description), self.DESCRIPTION_WEIGHT)
+        weights.update(dict.fromkeys(tokenize(item.name), self.NAME_WEIGHT))
+        key = item.price_cents << 32 | item_id
+        for token, weight in weights.items():
+            count = self.token_counts.get(token, 0)
+            if not count:
+                self.postings[token] = {
+                    self.NAME_WEIGHT: array("q"),
+                    self.DESCRIPTION_WEIGHT: array("q"),
+                }
+                self._trie_add(token)
+            self.token_counts[token] = count + 1
+            self._stage(token, weight)[0].append(key)
+        names[item.name] = item_id
+        self.entries[item_id] = (restaurant, item.name, key, weights)
+
+    def remove(self, item):
+        item_id = self.item_ids.pop(item, None)
+        if item_id is None:
+            return
+        restaurant, name, key, weights = self.entries.pop(item_id)
+        self.items[item_id] = None
+        self.free_ids.append(item_id)
+        names = self.menus[restaurant]
+        if names.get(name) == item_id:
+            del names[name]
+        for token, weight in weights.items():
+            added, removed = self._stage(token, weight)
+            if key in added:
+                added.remove(key)
+            else:
+                removed.append(key)
+            self.token_counts[token] -= 1
+            if not self.token_counts[token]:
+                del self.token_counts[token]
+                del self.postings[token]
+                self.staged.pop((token, self.NAME_WEIGHT), None)
+                self.staged.pop((token, self.DESCRIPTION_WEIGHT), None)
+                self._trie_remove(token)
+
+    def complete(self, prefix, limit=None):
+        node = self.trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        limit = self.MAX_EXPANSIONS if limit is None else limit
+        tokens = []
+        queue = [node]
+        for node in queue:
+            if "" in node:
+                tokens.append(node[""])
+                if len(tokens) >= limit:
+                    break
+            queue.extend(child for char, child in sorted(node.items()) if char)
+        return tokens
+
+    def search(self, query, limit=10):
+        terms, min_cents, max_cents = parse_search_query(query)
+        if not terms or limit <= 0:
+            return []
+        del terms[self.MAX_TERMS :]
+        with self.lock:
+            self._flush()
+            return self._search(terms, min_cents, max_cents, limit)
+
+    def _search(self, terms, min_cents, max_cents, limit):
+        expansions = []
+        for position, term in enumerate(terms):
+            tokens = [term] if term in self.postings else []
+            if position == len(terms) - 1 or not tokens:
+                tokens += [token for token in self.complete(term) if token != term]
+            if not tokens:
+                return []
+            expansions.append(tokens)
+        sizes = [
+            sum(
+                len(postings)
+                for token in tokens
+                for postings in self.postings[token].values()
+            )
+            for tokens in expansions
+        ]
+        driver = sizes.index(min(sizes))
+        low = min_cents << 32
+        high = None if max_cents is None else (max_cents + 1) << 32
+        best = self.NAME_WEIGHT * len(expansions)
+        top = []
+        # Each candidate is scored once, in key order, first those whose
+        # driving term matches in the name. The heap root is the worst kept
+        # (score, -key); once no later candidate can beat it, the pass stops.
+        for driver_weight in (self.NAME_WEIGHT, self.DESCRIPTION_WEIGHT):
+            bound = best - self.NAME_WEIGHT + driver_weight
+            ranges = [
+                self._range(self.postings[token][driver_weight], low, high)
+                for token in expansions[driver]
+            ]
+            previous = None
+            for key in heapq.merge(*ranges):
+                if key == previous:
+                    continue
+                previous = key
+                if len(top) >= limit and top[0] >= (bound, -key):
+                    break
+                item_weights = self.entries[key & 0xFFFFFFFF][3]
+                score = 0
+                for position, tokens in enumerate(expansions):
+                    weight = max(item_weights.get(token, 0) for token in tokens)
+                    if not weight or (position == driver and weight != driver_weight):
+                        break
+                    score += weight
+                else:
+                    candidate = (score, -key)
+                    if len(top) < limit:
+                        heapq.heappush(top, candidate)
+                    elif candidate > top[0]:
+                        heapq.heapreplace(top, candidate)
+        results = []
+        for score, negated in sorted(top, reverse=True):
+            item_id = -negated & 0xFFFFFFFF
+            results.append((self.entries[item_id][0], self.items[item_id], score))
+        return results
+
+    def _range(self, postings, low, high):
+        start = bisect.bisect_left(postings, low)
+        end = len(postings) if high is None else bisect.bisect_left(postings, high)
+        return map(postings.__getitem__, range(start, end))
+
+    def _stage(self, token, weight):
+        staged = self.staged.get((token, weight))
+        if staged is None:
+            staged = self.staged[(token, weight)] = ([], [])
+        return staged
+
+    def _flush(self):
+        for (token, weight), (added, removed) in self.staged.items():
+            postings = self.postings[token][weight]
+            if len(added) + len(removed) <= self.BULK_MERGE:
+                for key in removed:
+                    del postings[bisect.bisect_left(postings, key)]
+                for key in added:
+                    postings.insert(bisect.bisect_left(postings, key), key)
+                continue
+            if removed:
+                removed = set(removed)
+                postings = [key for key in postings if key not in removed]
+            self.postings[token][weight] = array(
+                "q", sorted(itertools.chain(postings, added))
+            )
+        self.staged.clear()
+
+    def _trie_add(self, token):
+        node = self.trie
+        for char in token:
+            node = node.setdefault(char, {})
+        node[""] = token
+
+    def _trie_remove(self, token):
+        path = [self.trie]
+        for char in token:
+            path.append(path[-1][char])
+        del path[-1][""]
+        for depth in range(len(token), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][token[depth - 1]]
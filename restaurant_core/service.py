@@ -0,0 +1,411 @@
+import contextlib
+import json
+import math
+import random
+import socket
+import socketserver
+import threading
+import time
+
+from .ingest import OrderEngine
+from .models import (
+    AccountRegistry,
+    InvalidInputError,
+    MenuItem,
+    format_cents,
+    validate_menu_item_name,
+    validate_positive_number,
+)
+from .search import MenuSearchIndex
+
+MAX_SEARCH_LIMIT = 100
+
+
+class LockStripes:
+    def __init__(self, count=64):
+        self.locks = [threading.Lock() for _ in range(count)]
+
+    def index(self, key):
+        return hash(key) % len(self.locks)
+
+    def hold(self, *keys):
+        return self._hold(sorted({self.index(key) for key in keys}))
+
+    @contextlib.contextmanager
+    def _hold(self, indexes):
+        acquired = []
+        try:
+            for index in indexes:
+                self.locks[index].acquire()
+                acquired.append(index)
+            yield
+        finally:
+            for index in reversed(acquired):
+                self.locks[index].release()
+
+
+class OrderService:
+    def __init__(self, registry, stripes=64, create_customers=False, store=None):
+        self.registry = registry
+        self.engine = OrderEngine(registry, create_customers)
+        self.stripes = LockStripes(stripes)
+        self.accounts_lock = threading.Lock()
+        self.search_index = MenuSearchIndex()
+        self.search_index.attach(registry)
+        self.store = store
+
+    def place_order(
+        self,
+        customer_contact,
+        restaurant_contact,
+        items,
+        created_at=None,
+        idempotency_key=None,
+    ):
+        restaurant = self._restaurant(restaurant_contact)
+        customer = self._customer(customer_contact)
+        # The customer stripe also serializes retries that carry the same key.
+        with self.stripes.hold(
+            ("restaurant", restaurant.account_id), ("customer", customer.account_id)
+        ):
+            order = self.engine.place_order(
+                customer_contact, restaurant_contact, items, created_at, idempotency_key
+            )
+        return order
+
+    def get_menu(self, restaurant_contact):
+        restaurant = self._restaurant(restaurant_contact)
+        menu = restaurant.menu
+        with self.stripes.hold(("restaurant", restaurant.account_id)):
+            return [
+                [item.name, item.description, format_cents(item.price_cents)]
+                for item in map(menu.get_items().get, menu.positions)
+            ]
+
+    def add_menu_item(self, restaurant_contact, name, description, price):
+        restaurant = self._restaurant(restaurant_contact)
+        self._check_item_fields(name, description)
+        price = validate_positive_number(price)
+        with self.stripes.hold(("restaurant", restaurant.account_id)):
+            if name in restaurant.menu.get_items():
+                raise InvalidInputError("Item already exists in the menu.")
+            item = MenuItem(name, description or "", price)
+            restaurant.menu.add_item(item)
+        return item
+
+    def update_menu_item(self, restaurant_contact, name, description=None, price=None):
+        restaurant = self._restaurant(restaurant_contact)
+        self._check_item_fields(name, description)
+        if price is not None:
+            price = validate_positive_number(price)
+        with self.stripes.hold(("restaurant", restaurant.account_id)):
+            item = restaurant.menu.get_items().get(name)
+            if item is None:
+                raise InvalidInputError("Item not found in the menu.")
+            item = restaurant.menu.update_item(
+                name,
+                item.description if description is None else description,
+                item.price if price is None else price,
+            )
+        return item
+
+    def remove_menu_item(self, restaurant_contact, name):
+        restaurant = self._restaurant(restaurant_contact)
+        self._check_item_fields(name, None)
+        with self.stripes.hold(("restaurant", restaurant.account_id)):
+            if name not in restaurant.menu.get_items():
+                raise InvalidInputError("Item not found in the menu.")
+            restaurant.menu.remove_item(name)
+
+    def handle(self, request):
+        response = {"ok": True}
+        try:
+            if isinstance(request, (str, bytes)):
+                try:
+                    request = json.loads(request)
+                except (ValueError, RecursionError):
+                    raise InvalidInputError("Malformed JSON request.")
+            if not isinstance(request, dict):
+                raise InvalidInputError("Request must be an object.")
+            if "request_id" in request:
+                response["request_id"] = request["request_id"]
+            operation = request.get("op")
+            if operation == "place_order":
+                order = self.place_order(
+                    self._text(request, "customer_phone"),
+                    self._text(request, "restaurant_phone"),
+                    request.get("items"),
+                    self._number(request, "created_at"),
+                    self._text(request, "idempotency_key", required=False),
+                )
+                response["order_id"] = order.order_id
+                response["total"] = format_cents(order.total_cents)
+            elif operation == "search":
+                query = request.get("query", "")
+                if not isinstance(query, str):
+                    raise InvalidInputError("Field 'query' must be a string.")
+                limit = request.get("limit", 10)
+                if (
+                    isinstance(limit, bool)
+                    or not isinstance(limit, int)
+                    or not 0 < limit <= MAX_SEARCH_LIMIT
+                ):
+                    raise InvalidInputError(
+                        f"Field 'limit' must be an integer from 1 to {MAX_SEARCH_LIMIT}."
+                    )
+                response["results"] = [
+                    [restaurant.contact_info, item.name, format_cents(item.price_cents)]
+                    for restaurant, item, _ in self.search_index.search(query, limit)
+                ]
+            elif operation == "stats":
+                response["idempotency"] = self.registry.placed_orders.stats()
+            elif operation == "menu":
+                response["items"] = self.get_menu(
+                    self._text(request, "restaurant_phone")
+                )
+            elif operation == "add_menu_item":
+                self.add_menu_item(
+                    self._text(request, "restaurant_phone"),
+                    self._text(request, "name"),
+                    self._text(request, "description", required=False),
+                    self._number(request, "price", required=True),
+                )
+            elif operation == "update_menu_item":
+                self.update_menu_item(
+                    self._text(request, "restaurant_phone"),
+                    self._text(request, "name"),
+                    self._text(request, "description", required=False),
+                    self._number(request, "price"),
+                )
+            elif operation == "remove_menu_item":
+                self.remove_menu_item(
+                    self._text(request, "restaurant_phone"),
+                    self._text(request, "name"),
+                )
+            elif operation != "ping":
+                raise InvalidInputError(f"Unknown operation '{operation}'.")
+        except InvalidInputError as e:
+            response["ok"] = False
+            response["error"] = str(e)
+        except (ValueError, TypeError, OverflowError, RecursionError):
+            response["ok"] = False
+            response["error"] = "Invalid request."
+        return response
+
+    def _text(self, request, field, required=True):
+        value = request.get(field)
+        if value is None and not required:
+            return None
+        if not isinstance(value, str):
+            raise InvalidInputError(f"Field '{field}' must be a string.")
+        return value
+
+    def _number(self, request, field, required=False):
+        value = request.get(field)
+        if value is None and not required:
+            return None
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or isinstance(value, float)
+            and not math.isfinite(value)
+        ):
+            raise InvalidInputError(f"Field '{field}' must be a finite number.")
+        return value
+
+    def _restaurant(self, contact_info):
+        restaurant = self.registry.find_restaurant(contact_info or "")
+        if restaurant is None:
+            raise InvalidInputError("Unknown restaurant phone number.")
+        return restaurant
+
+    def _customer(self, contact_info):
+        customer = self.registry.find_customer(contact_info or "")
+        if customer is not None:
+            return customer
+        if not self.engine.create_customers:
+            raise InvalidInputError("Unknown customer phone number.")
+        with self.accounts_lock:
+            customer = self.registry.find_customer(contact_info)
+            if customer is None:
+                customer = self.registry.create_customer(contact_info, "", contact_info)
+        return customer
+
+    def _check_item_fields(self, name, description):
+        validate_menu_item_name(name)
+        if not name.strip():
+            raise InvalidInputError("Item name cannot be empty.")
+        if description is not None and not isinstance(description, str):
+            raise InvalidInputError("Invalid item description provided.")
+
+
+class OrderRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = service.handle(line)
+            self.wfile.write(
+                json.dumps(response, separators=(",", ":")).encode() + b"\n"
+            )
+
+
+class OrderServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, service):
+        super().__init__(address, OrderRequestHandler)
+        self.service = service
+
+
+def run_load_test(
+    clients=50,
+    orders_per_client=200,
+    restaurants=20,
+    customers=200,
+    items_per_menu=10,
+    pipeline=16,
+    stripes=64,
+    seed=0,
+):
+    rng = random.Random(seed)
+    registry = AccountRegistry()
+    for r in range(restaurants):
+        restaurant = registry.create_restaurant(
+            f"Restaurant {r}", f"{r} Load Street", f"0910{r:07d}"
+        )
+        for i in range(items_per_menu):
+            restaurant.menu.add_item(
+                MenuItem(f"Item {i}", "", rng.randint(100, 2000) / 100)
+            )
+    for c in range(customers):
+        registry.create_customer(f"Customer {c}", f"{c} Load Avenue", f"0930{c:07d}")
+
+    service = OrderService(registry, stripes)
+    server = OrderServer(("127.0.0.1", 0), service)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    results = [[] for _ in range(clients)]
+    failures = []
+
+    def requests_for(client_rng, index, seq):
+        restaurant_phone = f"0910{client_rng.randrange(restaurants):07d}"
+        customer_phone = f"0930{client_rng.randrange(customers):07d}"
+        item_name = f"Item {client_rng.randrange(items_per_menu)}"
+        order_request = {
+            "op": "place_order",
+            "request_id": seq,
+            "customer_phone": customer_phone,
+            "restaurant_phone": restaurant_phone,
+            "items": {item_name: client_rng.randint(1, 3)},
+            "idempotency_key": f"{seed}-{index}-{seq}",
+        }
+        requests = [order_request]
+        if seq % 10 == 0:
+            requests.append(dict(order_request, request_id=f"retry-{seq}"))
+        if seq % 25 == 0:
+            requests.append(
+                {
+                    "op": "update_menu_item",
+                    "request_id": f"menu-{seq}",
+                    "restaurant_phone": restaurant_phone,
+                    "name": f"Item {client_rng.randrange(items_per_menu)}",
+                    "price": client_rng.randint(100, 2000) / 100,
+                }
+            )
+        return requests
+
+    def client(index):
+        client_rng = random.Random(f"{seed}-{index}")
+        try:
+            with socket.create_connection(server.server_address) as sock:
+                reader = sock.makefile("rb")
+                for start in range(0, orders_per_client, pipeline):
+                    batch = []
+                    for seq in range(start, min(start + pipeline, orders_per_client)):
+                        batch.extend(requests_for(client_rng, index, seq))
+                    sock.sendall(
+                        b"".join(
+                            json.dumps(request).encode() + b"\n" for request in batch
+                        )
+                    )
+                    for request in batch:
+                        results[index].append((request, json.loads(reader.readline())))
+                reader.close()
+        except (OSError, ValueError) as e:
+            failures.append(f"client {index}: {str(e)}")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    server.server_close()
+
+    placed = {}
+    by_key = {}
+    retries = 0
+    for responses in results:
+        for request, response in responses:
+            if response.get("request_id") != request["request_id"]:
+                failures.append(f"response to {request['request_id']} out of order")
+            elif not response.get("ok"):
+                failures.append(response.get("error"))
+            elif request["op"] == "place_order":
+                key = request["idempotency_key"]
+                if key in by_key:
+                    retries += 1
+                    if by_key[key] != response["order_id"]:
+                        failures.append(f"retry of {key} placed a second order")
+                    continue
+                by_key[key] = response["order_id"]
+                if response["order_id"] in placed:
+                    failures.append(f"order {response['order_id']} was duplicated")
+                placed[response["order_id"]] = request
+    expected = clients * orders_per_client
+    if len(placed) != expected:
+        failures.append(f"{expected - len(placed)} orders were not acknowledged")
+    stored = {}
+    for restaurant in registry.restaurants.values():
+        history = restaurant.order_history
+        quantities = {}
+        for order in history.orders.values():
+            if order.order_id in stored:
+                failures.append(f"order {order.order_id} is stored twice")
+            stored[order.order_id] = order
+            for item, quantity in order.iter_lines():
+                quantities[item.name] = quantities.get(item.name, 0) + quantity
+        if quantities != {k: v for k, v in history.item_quantities.items() if v}:
+            failures.append(f"item counters of {restaurant.name} do not match")
+    for order_id in placed.keys() - stored.keys():
+        failures.append(f"order {order_id} was lost")
+    for order_id in stored.keys() - placed.keys():
+        failures.append(f"order {order_id} was not requested")
+    for order_id, request in placed.items():
+        order = stored.get(order_id)
+        if order is not None and (
+            order.restaurant.contact_info != request["restaurant_phone"]
+            or order.customer.contact_info != request["customer_phone"]
+        ):
+            failures.append(f"order {order_id} belongs to the wrong account")
+    customer_orders = [
+        order.order_id
+        for customer in registry.customers.values()
+        for order in customer.order_history
+    ]
+    if sorted(customer_orders) != sorted(stored):
+        failures.append("customer histories do not match restaurant histories")
+
+    return {
+        "clients": clients,
+        "placed": len(placed),
+        "retries": retries,
+        "elapsed_s": elapsed,
+        "failures": failures,
+    }
@@ -0,0 +1,172 @@
+import json
+import multiprocessing
+import re
+import zlib
+
+from .ingest import IngestReport, OrderEngine, load_catalog_line
+from .models import AccountRegistry, InvalidInputError, Order, normalize_contact_info
+
+SHARD_ID_SPAN = 10**12
+RESTAURANT_PHONE_PATTERN = re.compile(r'"restaurant_phone"\s*:\s*"([^"\\]*)"')
+
+
+def shard_of(contact_info, shards):
+    try:
+        key = normalize_contact_info(contact_info or "")
+    except InvalidInputError:
+        key = ""
+    return zlib.crc32(key.encode()) % shards
+
+
+def shard_worker(connection, index, catalog, customers, create_customers):
+    Order.next_id = index * SHARD_ID_SPAN + 1
+    registry = AccountRegistry()
+    catalog_errors = []
+    for line_number, line in catalog:
+        error = load_catalog_line(registry, line_number, line)
+        if error is not None:
+            catalog_errors.append((line_number, error))
+    for name, address, contact_info, location in customers:
+        registry.create_customer(name, address, contact_info, location)
+    engine = OrderEngine(registry, create_customers)
+    report = IngestReport()
+    while True:
+        command, payload = connection.recv()
+        if command == "ingest":
+            engine._ingest_batch(payload, report)
+        elif command == "report":
+            connection.send(
+                (report.received, report.applied, report.errors, report.samples)
+            )
+        elif command == "catalog_errors":
+            connection.send(catalog_errors)
+        elif command == "item_counts":
+            connection.send(
+                {
+                    restaurant.contact_info: dict(
+                        restaurant.order_history.item_quantities
+                    )
+                    for restaurant in registry.restaurants.values()
+                }
+            )
+        elif command == "revenue":
+            connection.send(
+                {
+                    restaurant.contact_info: (
+                        len(restaurant.order_history.orders),
+                        sum(
+                            order.total_cents
+                            for order in restaurant.order_history.orders.values()
+                        ),
+                    )
+                    for restaurant in registry.restaurants.values()
+                }
+            )
+        elif command == "stop":
+            break
+    connection.close()
+
+
+class ShardPool:
+    def __init__(self, shards, catalog=(), customers=(), create_customers=False):
+        catalogs = [[] for _ in range(shards)]
+        for line_number, line in enumerate(catalog, start=1):
+            if not line.strip():
+                continue
+            try:
+                contact_info = json.loads(line).get("contact_info")
+            except (ValueError, AttributeError):
+                contact_info = None
+            catalogs[shard_of(contact_info, shards)].append((line_number, line))
+        customers = list(customers)
+        self.connections = []
+        self.processes = []
+        for index in range(shards):
+            parent_end, child_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=shard_worker,
+                args=(child_end, index, catalogs[index], customers, create_customers),
+                daemon=True,
+            )
+            process.start()
+            child_end.close()
+            self.connections.append(parent_end)
+            self.processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def ingest(self, records, batch_size=1000):
+        report = IngestReport()
+        shards = len(self.connections)
+        batches = [[] for _ in range(shards)]
+        for line_number, record in records:
+            if isinstance(record, dict):
+                contact_info = record.get("restaurant_phone")
+            else:
+                match = RESTAURANT_PHONE_PATTERN.search(record)
+                contact_info = match.group(1) if match else None
+            index = shard_of(contact_info, shards)
+            batch = batches[index]
+            batch.append((line_number, record))
+            if len(batch) >= batch_size:
+                self.connections[index].send(("ingest", batch))
+                batches[index] = []
+        for connection, batch in zip(self.connections, batches):
+            if batch:
+                connection.send(("ingest", batch))
+        for received, applied, errors, samples in self._query("report"):
+            report.received += received
+            report.applied += applied
+            report.rejected += received - applied
+            for message, count in errors.items():
+                report.errors[message] = report.errors.get(message, 0) + count
+            report.samples.extend(samples)
+        report.samples = sorted(report.samples)[: report.max_samples]
+        report.finish()
+        return report
+
+    def catalog_errors(self):
+        errors = []
+        for shard in self._query("catalog_errors"):
+            errors.extend(shard)
+        return [message for _, message in sorted(errors)]
+
+    def item_counts(self, restaurant_contact=None):
+        counts = {}
+        for shard in self._query("item_counts"):
+            for contact_info, quantities in shard.items():
+                if (
+                    restaurant_contact is not None
+                    and contact_info != restaurant_contact
+                ):
+                    continue
+                for item_name, quantity in quantities.items():
+                    counts[item_name] = counts.get(item_name, 0) + quantity
+        return counts
+
+    def revenue(self):
+        totals = {}
+        for shard in self._query("revenue"):
+            totals.update(shard)
+        return totals
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(("stop", None))
+            except OSError:
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def _query(self, command):
+        for connection in self.connections:
+            connection.send((command, None))
+        return [connection.recv() for connection in self.connections]
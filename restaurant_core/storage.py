@@ -0,0 +1,550 @@
+import heapq
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+
+from .models import AccountRegistry, InvalidInputError, Menu, MenuItem, Order
+
+
+class HistorySpill:
+    RECORD = struct.Struct("<dqq")
+    BLOCK = 256
+
+    def __init__(self, path, find_restaurant):
+        self.path = path
+        self.find_restaurant = find_restaurant
+        self.count = 0
+        self.newest = None
+
+    def extend(self, records):
+        mode = "ab"
+        if self.newest is not None and records[0][:2] < self.newest:
+            records = list(heapq.merge(self._read(0, self.count), records))
+            mode = "wb"
+            self.count = 0
+        with open(self.path, mode) as f:
+            f.write(b"".join(self.RECORD.pack(*record) for record in records))
+        self.count += len(records)
+        self.newest = records[-1][:2]
+
+    def iter_newest(self, start=None, end=None, before=None, account_id=None):
+        with open(self.path, "rb") as f:
+            low = 0 if start is None else self._bisect(f, (start,))
+            high = self.count if end is None else self._bisect(f, (end,))
+            if before is not None:
+                high = min(high, self._bisect(f, tuple(before)))
+        while high > low:
+            block_low = max(low, high - self.BLOCK)
+            for created_at, order_id, restaurant_id in reversed(
+                self._read(block_low, high)
+            ):
+                if account_id is not None and restaurant_id != account_id:
+                    continue
+                restaurant = self.find_restaurant(restaurant_id)
+                order = restaurant.order_history.get_order(order_id)
+                if order is not None:
+                    yield (created_at, order_id), order
+            high = block_low
+
+    def _read(self, low, high):
+        if high <= low:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(low * self.RECORD.size)
+            data = f.read((high - low) * self.RECORD.size)
+        return list(self.RECORD.iter_unpack(data))
+
+    def _bisect(self, f, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            f.seek(middle * self.RECORD.size)
+            if self.RECORD.unpack(f.read(self.RECORD.size))[:2] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class DataStore:
+    SNAPSHOT_FILE = "snapshot.json"
+    HISTORY_DIR = "history"
+
+    def __init__(
+        self,
+        path,
+        group_commit=1,
+        sync_interval=None,
+        snapshot_every=100_000,
+        history_keep=None,
+    ):
+        self.path = path
+        self.group_commit = group_commit
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.history_keep = history_keep
+        self.registry = None
+        self.segment = 1
+        self.log = None
+        self.records = 0
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.compactor = None
+        self.lock = threading.RLock()
+
+    def open(self, registry=None):
+        os.makedirs(self.path, exist_ok=True)
+        self.registry = AccountRegistry() if registry is None else registry
+        self.records = self._load()
+        if self.history_keep is not None:
+            # Spill files only mirror what the snapshot and log already hold,
+            # so they are rebuilt from scratch rather than trusted across runs.
+            history_path = os.path.join(self.path, self.HISTORY_DIR)
+            shutil.rmtree(history_path, ignore_errors=True)
+            os.makedirs(history_path)
+            for customer in self.registry.customers.values():
+                self._spill_history(customer)
+        self.log = open(self._segment_path(self.segment), "a", encoding="utf-8")
+        self.registry.subscribe(self.record)
+        return self.registry
+
+    def close(self):
+        if self.log is None:
+            return
+        self.registry.unsubscribe(self.record)
+        self.wait()
+        self.sync()
+        self.log.close()
+        self.log = None
+
+    def wait(self):
+        compactor = self.compactor
+        if compactor is not None:
+            compactor.join()
+
+    def record(self, event, account, *args):
+        if event == "customer_created" and self.history_keep is not None:
+            self._spill_history(account)
+        entry = self._encode(event, account, args)
+        if entry is None:
+            return
+        with self.lock:
+            self._append(entry)
+
+    def _append(self, entry):
+        self.log.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.records += 1
+        self.pending += 1
+        if self.group_commit and self.pending >= self.group_commit:
+            self.sync()
+        elif (
+            self.sync_interval is not None
+            and time.monotonic() - self.last_sync >= self.sync_interval
+        ):
+            self.sync()
+        if (
+            self.snapshot_every
+            and self.records >= self.snapshot_every
+            and self.compactor is None
+        ):
+            # Mutations only pay for starting a log segment; the snapshot is
+            # rebuilt from the previous one and the closed segments.
+            segment = self._rotate()
+            self.compactor = threading.Thread(
+                target=self._compact, args=(segment,), daemon=True
+            )
+            self.compactor.start()
+
+    def sync(self):
+        with self.lock:
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.pending = 0
+            self.last_sync = time.monotonic()
+
+    def snapshot(self):
+        while True:
+            self.wait()
+            with self.lock:
+                if self.compactor is None:
+                    self._write_snapshot(self._rotate())
+                    return
+
+    def _rotate(self):
+        self.sync()
+        self.log.close()
+        self.segment += 1
+        self.records = 0
+        self.log = open(self._segment_path(self.segment), "a", encoding="utf-8")
+        return self.segment
+
+    def _compact(self, segment):
+        try:
+            loader = DataStore(self.path)
+            loader.registry = AccountRegistry()
+            loader._load(segment)
+            loader._write_snapshot(segment)
+        finally:
+            with self.lock:
+                self.compactor = None
+
+    def _write_snapshot(self, segment):
+        snapshot_path = os.path.join(self.path, self.SNAPSHOT_FILE)
+        temp_path = snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._dump_state(segment), f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, snapshot_path)
+        for old_segment in range(1, segment):
+            if os.path.exists(self._segment_path(old_segment)):
+                os.remove(self._segment_path(old_segment))
+
+    def _load(self, until=None):
+        restaurants = {}
+        customers = {}
+        snapshot_path = os.path.join(self.path, self.SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as f:
+                self._load_snapshot(json.load(f), restaurants, customers)
+        segments = sorted(
+            int(name[4:-4])
+            for name in os.listdir(self.path)
+            if name.startswith("wal-") and name.endswith(".log")
+        )
+        records = 0
+        for segment in segments:
+            if segment >= self.segment and (until is None or segment < until):
+                records += self._replay(segment, restaurants, customers)
+                self.segment = segment
+        return records
+
+    def _spill_history(self, customer):
+        path = os.path.join(
+            self.path, self.HISTORY_DIR, f"customer-{customer.account_id}.bin"
+        )
+        spill = HistorySpill(path, self.registry.find_restaurant_by_id)
+        customer.order_history.spill_to(spill, self.history_keep)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, f"wal-{segment:06d}.log")
+
+    def _encode(self, event, account, args):
+        if event in ("restaurant_created", "restaurant_updated"):
+            kind = "R" if event == "restaurant_created" else "r"
+            return [kind] + self._account_fields(account)
+        if event in ("customer_created", "customer_updated"):
+            kind = "C" if event == "customer_created" else "c"
+            return [kind] + self._account_fields(account)
+        if event == "menu_item_added":
+            item = args[0]
+            return ["M+", account.account_id, item.name, item.description, item.price]
+        if event == "menu_items_added":
+            return [
+                "M*",
+                account.account_id,
+                [[item.name, item.description, item.price] for item in args[0]],
+            ]
+        if event == "menu_item_updated":
+            item = args[0]
+            return ["M~", account.account_id, item.name, item.description, item.price]
+        if event == "menu_item_removed":
+            return ["M-", account.account_id, args[0].name]
+        if event == "menu_replaced":
+            items = args[0].get_items().values() if args[0] else ()
+            return [
+                "M=",
+                account.account_id,
+                [[item.name, item.description, item.price] for item in items],
+            ]
+        if event == "order_added":
+            order = args[0]
+            return [
+                "O+",
+                account.account_id,
+                order.order_id,
+                order.created_at,
+                order.customer.account_id,
+                [
+                    [item.name, quantity, unit_cents]
+                    for item, quantity, unit_cents in order.iter_priced_lines()
+                ],
+            ]
+        if event == "order_removed":
+            return ["O-", account.account_id, args[0].order_id]
+        if event == "order_item_changed":
+            order, item, _, new_quantity, unit_cents = args
+            return [
+                "O~",
+                account.account_id,
+                order.order_id,
+                item.name,
+                new_quantity,
+                unit_cents,
+            ]
+        return None
+
+    def _account_fields(self, account):
+        location = list(account.location) if account.location else None
+        return [
+            account.account_id,
+            account.name,
+            account.address,
+            account.contact_info,
+            location,
+        ]
+
+    def _replay(self, segment, restaurants, customers):
+        path = self._segment_path(segment)
+        applied = 0
+        offset = 0
+        with open(path, "rb") as f:
+            lines = f.readlines()
+        for line_number, line in enumerate(lines, start=1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                if line_number == len(lines):
+                    with open(path, "r+b") as f:
+                        f.truncate(offset)
+                    break
+                raise InvalidInputError(
+                    f"Corrupted log record at line {line_number} of {path}."
+                )
+            self._apply(entry, restaurants, customers)
+            offset += len(line)
+            applied += 1
+        if lines and offset == sum(map(len, lines)) and not lines[-1].endswith(b"\n"):
+            with open(path, "ab") as f:
+                f.write(b"\n")
+        return applied
+
+    def _apply(self, entry, restaurants, customers):
+        kind = entry[0]
+        if kind in ("R", "C"):
+            account_id, name, address, contact_info, location = entry[1:]
+            location = tuple(location) if location else None
+            if kind == "R":
+                restaurants[account_id] = self.registry.create_restaurant(
+                    name, address, contact_info, location, account_id
+                )
+            else:
+                customers[account_id] = self.registry.create_customer(
+                    name, address, contact_info, location, account_id
+                )
+        elif kind in ("r", "c"):
+            account_id, name, address, contact_info, location = entry[1:]
+            location = tuple(location) if location else None
+            if kind == "r":
+                self.registry.update_restaurant(
+                    restaurants[account_id], name, address, contact_info, location
+                )
+            else:
+                self.registry.update_customer(
+                    customers[account_id], name, address, contact_info, location
+                )
+        elif kind == "M+":
+            _, account_id, name, description, price = entry
+            restaurants[account_id].menu.add_item(MenuItem(name, description, price))
+        elif kind == "M*":
+            restaurants[entry[1]].menu.add_items(
+                [MenuItem(*fields) for fields in entry[2]]
+            )
+        elif kind == "M~":
+            _, account_id, name, description, price = entry
+            restaurants[account_id].menu.update_item(name, description, price)
+        elif kind == "M-":
+            restaurants[entry[1]].menu.remove_item(entry[2])
+        elif kind == "M=":
+            menu = Menu()
+            for name, description, price in entry[2]:
+                menu.add_item(MenuItem(name, description, price))
+            restaurants[entry[1]].update_menu(menu)
+        elif kind == "O+":
+            _, account_id, order_id, created_at, customer_id, lines = entry
+            restaurant = restaurants[account_id]
+            customer = customers.get(customer_id)
+            priced_lines = []
+            for name, quantity, *unit_cents in lines:
+                unit_cents = unit_cents[0] if unit_cents else None
+                item = self._line_item(restaurant, name, unit_cents)
+                priced_lines.append((item, quantity, unit_cents))
+            order = Order.restore(
+                customer, restaurant, priced_lines, order_id, created_at
+            )
+            if customer is not None:
+                customer.order_history.append(order)
+            restaurant.order_history.add_order(order)
+        elif kind == "O-":
+            restaurants[entry[1]].order_history.remove_order_by_id(entry[2])
+        elif kind == "O~":
+            _, account_id, order_id, name, new_quantity, *unit_cents = entry
+            unit_cents = unit_cents[0] if unit_cents else None
+            restaurant = restaurants[account_id]
+            order = restaurant.order_history.get_order(order_id)
+            item = next(
+                (
+                    item
+                    for item, _, line_cents in order.iter_priced_lines()
+                    if item.name == name and unit_cents in (None, line_cents)
+                ),
+                None,
+            )
+            if item is None:
+                item = self._line_item(restaurant, name, unit_cents)
+            order.set_quantity(item, new_quantity)
+
+    def _line_item(self, restaurant, name, unit_cents):
+        # An order may hold an item the menu has since dropped or repriced.
+        # Its version is still in the menu history unless the whole menu was
+        # replaced; otherwise the line is rebuilt from its name and price.
+        menu = restaurant.menu
+        if not isinstance(menu, Menu):
+            menu = Menu()
+        item = menu.get_items().get(name)
+        if item is not None and unit_cents in (None, item.price_cents):
+            return item
+        for item in reversed(menu.history.get(name, ((), ()))[1]):
+            if item is not None and unit_cents in (None, item.price_cents):
+                return item
+        if unit_cents is None:
+            raise InvalidInputError(f"Item '{name}' of a logged order is unknown.")
+        return MenuItem(name, "", unit_cents / 100)
+
+    def _dump_state(self, segment):
+        detached = {}
+        for customer in self.registry.customers.values():
+            # Spilled orders are always attached; detached ones stay in memory.
+            for order in customer.order_history.orders.values():
+                history = order.restaurant.order_history
+                if history.orders.get(order.order_id) is not order:
+                    detached.setdefault(order.restaurant, []).append(order)
+        restaurants = []
+        for restaurant in self.registry.restaurants.values():
+            items = []
+            positions = {}
+
+            def ref(item):
+                if item not in positions:
+                    positions[item] = len(items)
+                    items.append([item.name, item.description, item.price])
+                return positions[item]
+
+            def dump_order(order):
+                return [
+                    order.order_id,
+                    order.created_at,
+                    order.customer.account_id,
+                    [
+                        [ref(item), quantity, unit_cents]
+                        for item, quantity, unit_cents in order.iter_priced_lines()
+                    ],
+                    order.menu_version,
+                ]
+
+            menu = restaurant.menu if isinstance(restaurant.menu, Menu) else Menu()
+            restaurants.append(
+                {
+                    "account": self._account_fields(restaurant),
+                    "menu": [ref(item) for item in menu.get_items().values()],
+                    "menu_version": menu.version,
+                    "menu_history": [
+                        [
+                            name,
+                            versions,
+                            [None if item is None else ref(item) for item in items],
+                        ]
+                        for name, (versions, items) in menu.history.items()
+                    ],
+                    "orders": [
+                        dump_order(order)
+                        for order in restaurant.order_history.orders.values()
+                    ],
+                    "detached": [
+                        dump_order(order) for order in detached.get(restaurant, ())
+                    ],
+                    "items": items,
+                }
+            )
+        return {
+            "wal_segment": segment,
+            "next_order_id": Order.next_id,
+            "next_restaurant_id": self.registry.next_restaurant_id,
+            "next_customer_id": self.registry.next_customer_id,
+            "customers": [
+                self._account_fields(customer)
+                for customer in self.registry.customers.values()
+            ],
+            "restaurants": restaurants,
+        }
+
+    def _load_snapshot(self, snapshot, restaurants, customers):
+        self.segment = snapshot["wal_segment"]
+        for account_id, name, address, contact_info, location in snapshot["customers"]:
+            customers[account_id] = self.registry.create_customer(
+                name,
+                address,
+                contact_info,
+                tuple(location) if location else None,
+                account_id,
+            )
+        placed = []
+        for entry in snapshot["restaurants"]:
+            account_id, name, address, contact_info, location = entry["account"]
+            restaurant = self.registry.create_restaurant(
+                name,
+                address,
+                contact_info,
+                tuple(location) if location else None,
+                account_id,
+            )
+            restaurants[account_id] = restaurant
+            items = [MenuItem(*fields) for fields in entry["items"]]
+            for position in entry["menu"]:
+                restaurant.menu.add_item(items[position])
+            if "menu_history" in entry:
+                restaurant.menu.restore_history(
+                    entry["menu_version"],
+                    {
+                        name: (
+                            versions,
+                            [None if ref is None else items[ref] for ref in refs],
+                        )
+                        for name, versions, refs in entry["menu_history"]
+                    },
+                )
+
+            def load_order(fields):
+                order_id, created_at, customer_id, lines = fields[:4]
+                return Order.restore(
+                    customers.get(customer_id),
+                    restaurant,
+                    [
+                        (items[line[0]], line[1], (line[2:] or [None])[0])
+                        for line in lines
+                    ],
+                    order_id,
+                    created_at,
+                    fields[4] if len(fields) > 4 else None,
+                )
+
+            for fields in entry["orders"]:
+                order = load_order(fields)
+                restaurant.order_history.add_order(order)
+                if order.customer is not None:
+                    placed.append(order)
+            for fields in entry["detached"]:
+                placed.append(load_order(fields))
+        placed.sort(key=lambda order: order.order_id)
+        for order in placed:
+            order.customer.order_history.append(order)
+        Order.next_id = max(Order.next_id, snapshot["next_order_id"])
+        self.registry.next_restaurant_id = max(
+            self.registry.next_restaurant_id, snapshot["next_restaurant_id"]
+        )
+        self.registry.next_customer_id = max(
+            self.registry.next_customer_id, snapshot["next_customer_id"]
+        )
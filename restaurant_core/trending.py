@@ -0,0 +1,156 @@
+import heapq
+import random
+import threading
+import time
+from array import array
+
+from .models import InvalidInputError
+
+TRENDING_WINDOWS = ((900, 60), (86400, 3600))
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+class SlidingSketch:
+    def __init__(self, span, bucket_seconds, size):
+        self.span = span
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.buckets = [
+            array("q", bytes(8 * size)) for _ in range(span // bucket_seconds)
+        ]
+        self.touched = [set() for _ in self.buckets]
+        self.totals = array("q", bytes(8 * size))
+        self.current = None
+        self.candidates = {}
+
+    def add(self, positions, amount, timestamp):
+        index = int(timestamp // self.bucket_seconds)
+        self.advance(index)
+        if index <= self.current - len(self.buckets):
+            return False
+        slot = index % len(self.buckets)
+        bucket = self.buckets[slot]
+        totals = self.totals
+        for position in positions:
+            bucket[position] += amount
+            totals[position] += amount
+        self.touched[slot].update(positions)
+        return True
+
+    def advance(self, index):
+        if self.current is None or index - self.current >= len(self.buckets):
+            if self.current is not None:
+                for slot in range(len(self.buckets)):
+                    self._expire(slot)
+            self.current = index
+            return
+        while self.current < index:
+            self.current += 1
+            self._expire(self.current % len(self.buckets))
+
+    def _expire(self, slot):
+        # Only the counters touched in this bucket are visited, so rotating
+        # costs as much as the updates it undoes rather than the sketch size.
+        bucket = self.buckets[slot]
+        totals = self.totals
+        for position in self.touched[slot]:
+            totals[position] -= bucket[position]
+            bucket[position] = 0
+        self.touched[slot].clear()
+
+    def estimate(self, positions):
+        totals = self.totals
+        return min(totals[position] for position in positions)
+
+
+class TrendingTracker:
+    def __init__(self, windows=TRENDING_WINDOWS, width=2048, depth=4, k=20):
+        self.width = width
+        self.depth = depth
+        rng = random.Random(depth * width)
+        self.hashes = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+            for _ in range(depth)
+        ]
+        self.k = k
+        self.capacity = 2 * k
+        self.windows = {
+            span: SlidingSketch(span, bucket_seconds, width * depth)
+            for span, bucket_seconds in windows
+        }
+        self.lock = threading.Lock()
+
+    def attach(self, registry, now=None):
+        start = (time.time() if now is None else now) - max(self.windows)
+        for restaurant in registry.restaurants.values():
+            for order in restaurant.order_history.orders_between(start):
+                self.add_order(restaurant, order)
+        registry.subscribe(self.record)
+
+    def record(self, event, account, *args):
+        if event == "order_added":
+            self.add_order(account, args[0])
+        elif event == "order_removed":
+            self.add_order(account, args[0], -1)
+        elif event == "order_item_changed":
+            order, item, old_quantity, new_quantity, _ = args
+            self.add(account, item.name, new_quantity - old_quantity, order.created_at)
+
+    def add_order(self, restaurant, order, sign=1):
+        for item, quantity in order.iter_lines():
+            self.add(restaurant, item.name, sign * quantity, order.created_at)
+
+    def add(self, restaurant, name, quantity, timestamp):
+        scoped = (restaurant.account_id, name)
+        with self.lock:
+            global_positions = self._positions(name)
+            scoped_positions = self._positions(scoped)
+            for window in self.windows.values():
+                if not window.add(global_positions, quantity, timestamp):
+                    continue
+                window.add(scoped_positions, quantity, timestamp)
+                if quantity > 0:
+                    self._offer(window, None, name, global_positions)
+                    self._offer(window, restaurant.account_id, scoped, scoped_positions)
+
+    def top(self, span, n=None, restaurant=None, now=None):
+        window = self.windows.get(span)
+        if window is None:
+            raise InvalidInputError(f"No trending window of {span} seconds.")
+        n = self.k if n is None else min(n, self.k)
+        scope = None if restaurant is None else restaurant.account_id
+        now = time.time() if now is None else now
+        with self.lock:
+            window.advance(int(now // window.bucket_seconds))
+            ranked = heapq.nlargest(
+                n,
+                (
+                    (window.estimate(positions), key if scope is None else key[1])
+                    for key, positions in window.candidates.get(scope, {}).items()
+                ),
+            )
+        return [(name, count) for count, name in ranked if count > 0]
+
+    def _positions(self, key):
+        # Rows of a count-min sketch need independent hashes; mixing the row
+        # into one tuple hash leaves collisions correlated across rows.
+        value = hash(key)
+        width = self.width
+        return tuple(
+            row * width + (a * value + b) % MERSENNE_PRIME % width
+            for row, (a, b) in enumerate(self.hashes)
+        )
+
+    def _offer(self, window, scope, key, positions):
+        candidates = window.candidates.setdefault(scope, {})
+        candidates[key] = positions
+        # Candidates are re-ranked by their current estimates only when the
+        # set doubles, which keeps the admission cost constant per update.
+        if len(candidates) > 2 * self.capacity:
+            window.candidates[scope] = dict(
+                heapq.nlargest(
+                    self.capacity,
+                    candidates.items(),
+                    key=lambda pair: window.estimate(pair[1]),
+                )
+            )
@@ -0,0 +1,33 @@
+import pytest
+
+from restaurant_core import AccountRegistry, MenuItem
+
+
+@pytest.fixture
+def registry():
+    registry = AccountRegistry()
+    restaurant = registry.create_restaurant("Pizza Place", "1 Main St", "09120000001")
+    restaurant.menu.add_item(MenuItem("Pizza", "cheese and tomato", 10))
+    restaurant.menu.add_item(MenuItem("Soda", "fizzy drink", 2))
+    registry.create_customer("Customer", "2 Main St", "09350000001")
+    return registry
+
+
+@pytest.fixture
+def restaurant(registry):
+    return registry.find_restaurant("09120000001")
+
+
+@pytest.fixture
+def customer(registry):
+    return registry.find_customer("09350000001")
+
+
+@pytest.fixture
+def pizza(restaurant):
+    return restaurant.menu.get_items()["Pizza"]
+
+
+@pytest.fixture
+def order(customer, restaurant, pizza):
+    return customer.place_order(restaurant, {pizza: 2})
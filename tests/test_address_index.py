@@ -0,0 +1,82 @@
+from restaurant_core import AccountRegistry, AddressIndex
+
+
+def build():
+    registry = AccountRegistry()
+    places = {
+        "Near": ("5 Elm St", (0.5, 0.5)),
+        "Middle": ("6 Elm St", (3.0, 4.0)),
+        "Far": ("7 Elm St", (30.0, 40.0)),
+        "Unmapped": ("1 Main St", None),
+    }
+    restaurants = {
+        name: registry.create_restaurant(name, address, f"0912{n}", location)
+        for n, (name, (address, location)) in enumerate(places.items())
+    }
+    customer = registry.create_customer("C", "1 MAIN st.", "0935", (0.0, 0.0))
+    return registry, restaurants, customer
+
+
+def names(restaurants):
+    return [restaurant.name for restaurant in restaurants]
+
+
+def test_radius_search_is_sorted_by_distance_and_adds_same_address():
+    registry, _, customer = build()
+    assert names(registry.nearby_restaurants(customer, radius=5)) == [
+        "Near",
+        "Middle",
+        "Unmapped",
+    ]
+    assert names(registry.nearby_restaurants(customer, radius=0.1)) == ["Unmapped"]
+
+
+def test_nearest_k_with_and_without_a_radius():
+    registry, _, customer = build()
+    assert names(registry.nearby_restaurants(customer, k=1)) == ["Near", "Unmapped"]
+    assert names(registry.nearby_restaurants(customer, k=3))[:3] == [
+        "Near",
+        "Middle",
+        "Far",
+    ]
+    assert names(registry.nearby_restaurants(customer, radius=10, k=5)) == [
+        "Near",
+        "Middle",
+        "Unmapped",
+    ]
+
+
+def test_address_only_matches_normalized_addresses():
+    registry, _, customer = build()
+    customer.location = None
+    assert names(registry.nearby_restaurants(customer, radius=5)) == ["Unmapped"]
+
+
+def test_moving_a_restaurant_updates_the_index():
+    registry, restaurants, customer = build()
+    registry.update_restaurant(restaurants["Far"], location=(1.0, 1.0))
+    assert names(registry.nearby_restaurants(customer, radius=2)) == [
+        "Near",
+        "Far",
+        "Unmapped",
+    ]
+
+
+def test_index_matches_a_brute_force_scan():
+    index = AddressIndex(cell_size=2.0)
+    registry = AccountRegistry()
+    points = [((n * 7919) % 100 / 3.0, (n * 104729) % 100 / 3.0) for n in range(200)]
+    for n, point in enumerate(points):
+        index.add(registry.create_restaurant(f"R{n}", "", f"0912{n}", point))
+    center = (15.0, 15.0)
+    by_distance = sorted(
+        index.entries,
+        key=lambda r: (r.location[0] - 15) ** 2 + (r.location[1] - 15) ** 2,
+    )
+    assert index.nearest(center, 10) == by_distance[:10]
+    inside = [
+        r
+        for r in by_distance
+        if ((r.location[0] - 15) ** 2 + (r.location[1] - 15) ** 2) ** 0.5 <= 6
+    ]
+    assert index.within_radius(center, 6) == inside
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from restaurant_core import AccountRegistry, DataStore, MenuItem, OrderEngine
+
+
+def setup(registry, count=40, seed=1):
+    restaurants = []
+    for n in range(3):
+        restaurant = registry.create_restaurant(f"R{n}", "1 St", f"0912{n}")
+        restaurant.menu.add_item(MenuItem("Pizza", "", 10))
+        restaurants.append(restaurant)
+    customer = registry.create_customer("C", "", "0935")
+    engine = OrderEngine(registry)
+    rng = random.Random(seed)
+    orders = [
+        engine.place_order(
+            "0935",
+            rng.choice(restaurants).contact_info,
+            {"Pizza": 1},
+            rng.uniform(0, 1000),
+        )
+        for _ in range(count)
+    ]
+    return customer, restaurants, orders
+
+
+def newest_first(orders):
+    return sorted(orders, key=lambda o: (o.created_at, o.order_id), reverse=True)
+
+
+def pages(history, limit, **filters):
+    cursor, seen = None, []
+    while True:
+        page, cursor = history.page(cursor, limit, **filters)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+def check(customer, restaurants, orders):
+    history = customer.order_history
+    assert list(history.iter_orders()) == newest_first(orders)
+    assert pages(history, 7) == newest_first(orders)
+    restaurant = restaurants[0]
+    expected = [
+        o
+        for o in newest_first(orders)
+        if o.restaurant is restaurant and 100 <= o.created_at < 800
+    ]
+    assert pages(history, 3, restaurant=restaurant, start=100, end=800) == expected
+    assert len(history) == len(orders)
+
+
+def test_cursor_pages_in_memory():
+    customer, restaurants, orders = setup(AccountRegistry())
+    check(customer, restaurants, orders)
+    page, cursor = customer.order_history.page(None, 100)
+    assert cursor is None and len(page) == 40
+
+
+@pytest.mark.parametrize("keep", [0, 5])
+def test_spilled_history_pages_the_same(tmp_path, keep):
+    store = DataStore(str(tmp_path), snapshot_every=0, history_keep=keep)
+    registry = store.open()
+    customer, restaurants, orders = setup(registry)
+    history = customer.order_history
+    assert len(history.orders) <= 2 * keep + 1
+    assert history.spill.count >= len(orders) - 2 * keep - 1
+    removed = orders[:10:3]
+    for order in removed:
+        order.restaurant.order_history.remove_order(order)
+    # Removed orders are pinned in memory, so the customer still sees them.
+    check(customer, restaurants, orders)
+    store.close()
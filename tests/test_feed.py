@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from restaurant_core import InvalidInputError, OrderEngine
+from restaurant_core.feed import BLOCK, COALESCE, DROP_OLDEST, EventFeed, FeedEvent
+
+
+def publish(feed, *keys):
+    for key in keys:
+        feed.publish(FeedEvent("order_added", key, {"key": key}))
+
+
+async def drain(subscription):
+    events = []
+    while subscription.queue:
+        events.append(await subscription.get())
+    return [event.key for event in events]
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+
+def test_drop_oldest_keeps_the_newest_events():
+    async def scenario():
+        feed = EventFeed()
+        await feed.start()
+        subscription = feed.subscribe(maxsize=3, policy=DROP_OLDEST)
+        publish(feed, 1, 2, 3, 4, 5)
+        await feed.close()
+        return await drain(subscription), subscription.stats()
+
+    keys, stats = run(scenario())
+    assert keys == [3, 4, 5]
+    assert stats["dropped"] == 2
+
+
+def test_coalesce_keeps_the_latest_event_per_key():
+    async def scenario():
+        feed = EventFeed()
+        await feed.start()
+        subscription = feed.subscribe(maxsize=10, policy=COALESCE)
+        for version in range(3):
+            for key in ("a", "b"):
+                feed.publish(FeedEvent("order_added", key, {"version": version}))
+        await feed.close()
+        return [await subscription.get() for _ in range(2)], subscription.stats()
+
+    events, stats = run(scenario())
+    assert [(event.key, event.data["version"]) for event in events] == [
+        ("a", 2),
+        ("b", 2),
+    ]
+    assert stats["coalesced"] == 4
+
+
+def test_block_waits_for_the_subscriber_without_losing_events():
+    async def scenario():
+        feed = EventFeed()
+        await feed.start()
+        subscription = feed.subscribe(maxsize=2, policy=BLOCK)
+        publish(feed, *range(10))
+        received = []
+        while len(received) < 10:
+            received.append((await subscription.get()).key)
+        await feed.close()
+        return received, subscription.stats()
+
+    received, stats = run(scenario())
+    assert received == list(range(10))
+    assert stats["dropped"] == 0
+
+
+def test_close_does_not_hang_on_a_stuck_block_subscriber():
+    async def scenario():
+        feed = EventFeed()
+        await feed.start()
+        stuck = feed.subscribe(maxsize=2, policy=BLOCK)
+        other = feed.subscribe(maxsize=100)
+        publish(feed, *range(10))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(feed.close(), 1)
+        return await drain(stuck), await drain(other), stuck.stats()
+
+    stuck_keys, other_keys, stats = run(scenario())
+    assert stuck_keys == [0, 1]
+    assert other_keys == list(range(10))
+    assert stats["dropped"] == 8
+
+
+def test_kinds_filter_and_registry_events(registry):
+    async def scenario():
+        feed = EventFeed()
+        feed.attach(registry)
+        await feed.start()
+        orders = feed.subscribe(kinds=["order_added"])
+        OrderEngine(registry).place_order("09350000001", "09120000001", {"Pizza": 2})
+        registry.find_restaurant("09120000001").menu.remove_item("Soda")
+        await feed.close()
+        return [await orders.get() for _ in range(2)]
+
+    event, end = run(scenario())
+    assert event.kind == "order_added"
+    assert event.data["items"] == [["Pizza", 2]]
+    assert end is None
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(InvalidInputError):
+        EventFeed().subscribe(policy="wait")
@@ -0,0 +1,31 @@
+import pytest
+
+from restaurant_core import AccountRegistry, InvalidInputError, MenuItem, OrderEngine
+
+
+def test_idempotency_cache_belongs_to_the_registry(registry, restaurant):
+    engine = OrderEngine(registry)
+    first = engine.place_order("09350000001", "09120000001", {"Pizza": 1}, None, "k")
+    again = engine.place_order("09350000001", "09120000001", {"Pizza": 1}, None, "k")
+    assert again is first
+    assert len(restaurant.order_history.orders) == 1
+    assert AccountRegistry().placed_orders.stats()["size"] == 0
+
+
+def test_removed_order_is_not_replayed(registry, restaurant):
+    engine = OrderEngine(registry)
+    first = engine.place_order("09350000001", "09120000001", {"Pizza": 1}, None, "k")
+    restaurant.order_history.remove_order(first)
+    retried = engine.place_order("09350000001", "09120000001", {"Pizza": 1}, None, "k")
+    assert retried is not first
+    assert restaurant.order_history.get_order(retried.order_id) is retried
+    assert registry.placed_orders.stats()["invalidations"] == 1
+
+
+def test_idempotency_key_is_bound_to_its_restaurant(registry):
+    other = registry.create_restaurant("Other", "3 St", "09120000002")
+    other.menu.add_item(MenuItem("Pizza", "", 9))
+    engine = OrderEngine(registry)
+    engine.place_order("09350000001", "09120000001", {"Pizza": 1}, None, "k")
+    with pytest.raises(InvalidInputError):
+        engine.place_order("09350000001", "09120000002", {"Pizza": 1}, None, "k")
@@ -0,0 +1,86 @@
+import io
+import json
+import time
+
+import pytest
+
+from restaurant_core import MenuImporter, OrderEngine, load_catalog
+
+PHONES = {"customer_phone": "09350000001", "restaurant_phone": "09120000001"}
+
+
+def ingest(registry, *records):
+    engine = OrderEngine(registry)
+    lines = [
+        (number, record if isinstance(record, str) else json.dumps(record))
+        for number, record in enumerate(records, start=1)
+    ]
+    return engine.ingest(lines)
+
+
+@pytest.mark.parametrize(
+    "items, error",
+    [
+        (5, "Order items must be a list, object or string."),
+        ([{"name": ["Pizza"]}], "Invalid item name provided."),
+        ({"Pizza": 2**31}, "Quantity is too large."),
+        ([["Pizza", 2**31 - 1], ["Pizza", 1]], "Quantity is too large."),
+        ("Pizza:99999999999", "Quantity is too large."),
+        (["ab"], "Invalid order line provided."),
+        ({"Pizza": 0}, "Quantity must be a positive integer."),
+        ({"Pizza": 1.5}, "Quantity must be a positive integer."),
+    ],
+)
+def test_bad_items_are_rejected(registry, restaurant, items, error):
+    report = ingest(
+        registry, dict(PHONES, items=items), dict(PHONES, items={"Pizza": 1})
+    )
+    assert report.applied == 1
+    assert report.rejected == 1
+    assert report.samples == [(1, error)]
+    assert len(restaurant.order_history.orders) == 1
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        "not json",
+        "[1, 2]",
+        "[" * 100_000,
+        dict(PHONES, items={"Pizza": 1}, created_at="inf"),
+        dict(PHONES, items={"Pizza": 1}, created_at=1e300),
+        dict(PHONES, items={"Pizza": 1}, created_at=10**400),
+        dict(PHONES, items={"Pizza": 1}, created_at=-5),
+        dict(PHONES, items={"Pizza": 1}, created_at=time.time() + 86400),
+        dict(PHONES, items={"Pizza": 1}, idempotency_key=5),
+        {"customer_phone": "0999", "restaurant_phone": "09120000001", "items": "Pizza"},
+    ],
+)
+def test_bad_records_are_rejected(registry, restaurant, record):
+    report = ingest(registry, record)
+    assert report.rejected == 1
+    assert not restaurant.order_history.orders
+
+
+def test_catalog_rejects_malformed_lines(registry):
+    lines = [
+        "[1, 2]",
+        '{"name": "A", "contact_info": "0912", "menu": [1]}',
+        '{"name": "B", "contact_info": "0913", "location": "ab"}',
+        '{"name": "C", "contact_info": "0914", "menu": [{"name": "Pie", "price": 5}]}',
+        "[" * 100_000,
+    ]
+    errors = load_catalog(registry, io.StringIO("\n".join(lines) + "\n"))
+    assert errors[:3] == [
+        "Catalog line 1: Catalog record must be an object.",
+        "Catalog line 2: Menu entry must be an object.",
+        "Catalog line 3: Location must be a pair of numbers.",
+    ]
+    assert len(errors) == 4 and errors[3].startswith("Catalog line 5:")
+    assert registry.find_restaurant("0912") is None
+    assert "Pie" in registry.find_restaurant("0914").menu.get_items()
+
+
+def test_menu_import_rejects_deeply_nested_records(restaurant):
+    report = MenuImporter(restaurant).ingest([(1, "[" * 100_000)])
+    assert report.rejected == 1
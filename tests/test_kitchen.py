@@ -0,0 +1,64 @@
+import pytest
+
+from restaurant_core import InvalidInputError, OrderEngine
+from restaurant_core.kitchen import KitchenDispatcher, KitchenScheduler
+
+
+@pytest.fixture
+def engine(registry):
+    return OrderEngine(registry)
+
+
+def place(engine, created_at, items=None):
+    return engine.place_order(
+        "09350000001", "09120000001", items or {"Pizza": 1}, created_at
+    )
+
+
+def test_orders_start_by_latest_start_time(engine):
+    scheduler = KitchenScheduler(1, prep_times={"Pizza": 600, "Soda": 60})
+    pizza = place(engine, 100)
+    soda = place(engine, 100, {"Soda": 1})
+    scheduler.enqueue(soda, promised_at=700, now=100)
+    scheduler.enqueue(pizza, promised_at=900, now=100)
+    assert [order for _, order, _ in scheduler.dispatch(now=100)] == [pizza]
+    scheduler.complete(pizza, now=700)
+    assert [order for _, order, _ in scheduler.dispatch(now=700)] == [soda]
+
+
+def test_ties_keep_arrival_order_and_stations_are_reused(engine):
+    scheduler = KitchenScheduler(2, prep_times={"Pizza": 300})
+    orders = [place(engine, 100) for _ in range(4)]
+    for order in orders:
+        scheduler.enqueue(order, promised_at=1000, now=100)
+    first = scheduler.dispatch(now=100)
+    assert [order for _, order, _ in first] == orders[:2]
+    assert scheduler.dispatch(now=150) == []
+    station = scheduler.complete(orders[1], now=400)
+    assert scheduler.dispatch(now=400) == [(station, orders[2], 700)]
+    assert scheduler.stats()["queue_depth"] == 1
+
+
+def test_cancel_and_late_orders(engine):
+    scheduler = KitchenScheduler(1, prep_times={"Pizza": 300})
+    first, second = place(engine, 0), place(engine, 0)
+    scheduler.enqueue(first, promised_at=200, now=0)
+    scheduler.enqueue(second, promised_at=400, now=0)
+    assert scheduler.cancel(second)
+    assert not scheduler.cancel(second)
+    with pytest.raises(InvalidInputError):
+        scheduler.enqueue(first, now=0)
+    scheduler.dispatch(now=0)
+    scheduler.complete(first, now=500)
+    assert scheduler.stats()["late"] == 1
+    assert scheduler.prep_times["Pizza"] > 300
+
+
+def test_dispatcher_follows_registry_events(registry, restaurant, engine):
+    dispatcher = KitchenDispatcher(stations=1)
+    dispatcher.attach(registry)
+    order = place(engine, 0)
+    scheduler = dispatcher.scheduler(restaurant)
+    assert scheduler.depth() == 1
+    restaurant.order_history.remove_order(order)
+    assert scheduler.depth() == 0
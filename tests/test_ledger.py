@@ -0,0 +1,48 @@
+import pytest
+
+from restaurant_core import MenuItem, OrderEngine
+from restaurant_core.models import Order
+
+pytest.importorskip("numpy")
+
+from restaurant_core.ledger import OrderLedger  # noqa: E402
+
+
+@pytest.fixture
+def ledger(registry):
+    ledger = OrderLedger()
+    ledger.attach(registry)
+    return ledger
+
+
+def test_revenue_and_baskets(registry, restaurant, ledger):
+    engine = OrderEngine(registry)
+    first = engine.place_order("09350000001", "09120000001", {"Pizza": 2}, 100)
+    engine.place_order("09350000001", "09120000001", {"Soda": 1}, 4000)
+    first.add_item(restaurant.menu.get_items()["Soda"], 1)
+    revenue = {item.name: total for item, total in ledger.revenue_per_item().items()}
+    assert revenue == {"Pizza": 2000, "Soda": 400}
+    assert ledger.revenue_per_restaurant() == {restaurant: 2400}
+    assert ledger.orders_per_bucket(3600) == {0.0: 1, 3600.0: 1}
+    assert ledger.average_basket_size() == 2.0
+    restaurant.order_history.remove_order(first)
+    assert ledger.average_basket_size(restaurant) == 1.0
+
+
+def test_sparse_order_ids(registry, restaurant, ledger, monkeypatch):
+    monkeypatch.setattr(Order, "next_id", 10**15)
+    engine = OrderEngine(registry)
+    engine.place_order("09350000001", "09120000001", {"Pizza": 1}, 100)
+    engine.place_order("09350000001", "09120000001", {"Pizza": 3}, 200)
+    assert ledger.average_basket_size() == 2.0
+    assert ledger.orders_per_bucket(3600) == {0.0: 2}
+
+
+def test_prices_are_exact_cents(registry, restaurant, ledger):
+    restaurant.menu.add_item(MenuItem("Gum", "", 0.1))
+    engine = OrderEngine(registry)
+    for _ in range(3):
+        engine.place_order("09350000001", "09120000001", {"Gum": 1}, 100)
+    assert ledger.column("unit_cents").dtype.kind == "i"
+    assert ledger.revenue_per_restaurant() == {restaurant: 30}
+    assert isinstance(ledger.revenue_per_restaurant()[restaurant], int)
@@ -0,0 +1,17 @@
+import pytest
+
+from restaurant_core import AccountRegistry, InvalidInputError, MenuItem
+
+
+def test_item_tables_are_per_restaurant(registry, customer, restaurant, order, pizza):
+    other = AccountRegistry().create_restaurant("Other", "3 St", "09120000002")
+    other.menu.add_item(MenuItem("Salad", "", 5))
+    salad = other.menu.get_items()["Salad"]
+    other_order = customer.place_order(other, {salad: 1})
+    assert not hasattr(MenuItem, "catalog")
+    assert restaurant.item_table.items == [pizza]
+    assert other.item_table.items == [salad]
+    assert list(other_order.iter_lines()) == [(salad, 1)]
+    assert order.quantity_of(salad) == 0
+    with pytest.raises(InvalidInputError):
+        order.remove_item(salad)
@@ -0,0 +1,67 @@
+import io
+import json
+
+import pytest
+
+from restaurant_core import MenuImporter, export_menu, read_order_records
+
+
+def import_lines(restaurant, text, file_format="jsonl", batch_size=2):
+    records = read_order_records(io.StringIO(text), file_format)
+    return MenuImporter(restaurant).ingest(records, batch_size)
+
+
+def test_jsonl_import_reports_bad_rows(restaurant):
+    rows = [
+        {"name": "Salad", "description": " green ", "price": 4.5},
+        {"name": "", "price": 1},
+        {"name": "Pie", "price": -2},
+        "not json",
+        {"name": "Pizza", "description": "new", "price": 11},
+        {"name": "Tea", "price": "abc"},
+    ]
+    text = "".join(
+        (row if isinstance(row, str) else json.dumps(row)) + "\n" for row in rows
+    )
+    report = import_lines(restaurant, text)
+    assert (report.applied, report.rejected) == (2, 4)
+    assert [line for line, _ in report.samples] == [2, 3, 4, 6]
+    items = restaurant.menu.get_items()
+    assert items["Salad"].description == "green"
+    assert items["Pizza"].price_cents == 1100
+
+
+def test_csv_import(restaurant):
+    text = "name,description,price\nSalad,green,4.50\nTea,,x\n"
+    report = import_lines(restaurant, text, "csv")
+    assert (report.applied, report.rejected) == (1, 1)
+    assert report.samples[0][0] == 3
+    assert restaurant.menu.get_items()["Salad"].price_cents == 450
+
+
+@pytest.mark.parametrize("file_format", ["jsonl", "csv"])
+def test_export_round_trip(registry, restaurant, file_format):
+    stream = io.StringIO()
+    assert export_menu(restaurant.menu, stream, file_format) == 2
+    other = registry.create_restaurant("Copy", "", "09120000009")
+    report = import_lines(other, stream.getvalue(), file_format)
+    assert report.rejected == 0
+    assert other.menu.render() == restaurant.menu.render()
+    assert [item.description for item in other.menu.get_items().values()] == [
+        "cheese and tomato",
+        "fizzy drink",
+    ]
+
+
+def test_non_finite_prices_are_rejected_per_row(restaurant):
+    text = (
+        '{"name": "Tea", "price": "nan"}\n'
+        '{"name": "Jam", "price": NaN}\n'
+        '{"name": "Pie", "price": Infinity}\n'
+        '{"name": "Salad", "price": 4}\n'
+    )
+    report = import_lines(restaurant, text)
+    assert (report.applied, report.rejected) == (1, 3)
+    assert "Tea" not in restaurant.menu.get_items()
+    report = import_lines(restaurant, "name,description,price\nTea,,inf\n", "csv")
+    assert (report.applied, report.rejected) == (0, 1)
@@ -0,0 +1,23 @@
+def test_repriced_item_counts_once_per_order(restaurant, order, pizza):
+    history = restaurant.order_history
+    repriced = restaurant.menu.update_item("Pizza", "", 12)
+    order.add_item(repriced, 1)
+    assert history.count_item_orders("Pizza") == 1
+    assert history.count_item_quantity("Pizza") == 3
+    order.remove_item(pizza)
+    assert history.count_item_orders("Pizza") == 1
+    order.add_item(pizza, 1)
+    history.remove_order(order)
+    assert history.count_item_orders("Pizza") == 0
+    history.add_order(order)
+    assert history.count_item_orders("Pizza") == 1
+    order.remove_item(repriced)
+    order.remove_item(pizza)
+    assert history.count_item_orders("Pizza") == 0
+    assert history.count_item_quantity("Pizza") == 0
+
+
+def test_removed_menu_item_stays_on_orders(restaurant, order, pizza):
+    restaurant.menu.remove_item("Pizza")
+    order.add_item(pizza, 1)
+    assert list(order.iter_priced_lines()) == [(pizza, 3, 1000)]
@@ -0,0 +1,47 @@
+import pytest
+
+from restaurant_core import InvalidInputError, MenuItem, to_cents, validate_quantity
+
+
+@pytest.mark.parametrize("quantity", [0, -3, 1.5, 2.0, True, "2", None, 2**31])
+def test_invalid_quantities_are_rejected(customer, restaurant, order, pizza, quantity):
+    with pytest.raises(InvalidInputError):
+        order.add_item(pizza, quantity)
+    with pytest.raises(InvalidInputError):
+        customer.place_order(restaurant, {pizza: quantity})
+    if quantity is not None:
+        with pytest.raises(InvalidInputError):
+            order.remove_item(pizza, quantity)
+    assert order.quantity_of(pizza) == 2
+    assert order.total_cents == 2000
+
+
+def test_quantity_sum_must_fit_the_line_array(order, pizza):
+    order.add_item(pizza, 2**31 - 3)
+    with pytest.raises(InvalidInputError):
+        order.add_item(pizza, 1)
+    assert order.quantity_of(pizza) == 2**31 - 1
+
+
+def test_set_quantity_accepts_zero_only_as_removal(order, pizza):
+    for quantity in (-1, 1.0, False):
+        with pytest.raises(InvalidInputError):
+            order.set_quantity(pizza, quantity)
+    order.set_quantity(pizza, 0)
+    assert order.line_count() == 0
+    assert order.total_cents == 0
+
+
+def test_validate_quantity_and_oversized_prices():
+    assert validate_quantity(5) == 5
+    assert validate_quantity(0, 0) == 0
+    with pytest.raises(InvalidInputError):
+        MenuItem("Gold", "", 30_000_000)
+
+
+@pytest.mark.parametrize("price", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_prices_are_rejected(price):
+    with pytest.raises(InvalidInputError):
+        to_cents(price)
+    with pytest.raises(InvalidInputError):
+        MenuItem("Soup", "", price)
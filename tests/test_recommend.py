@@ -0,0 +1,48 @@
+from restaurant_core import CoOccurrenceIndex, MenuItem
+
+
+def test_suggestions_follow_orders(registry, restaurant, customer, pizza):
+    index = CoOccurrenceIndex()
+    index.attach(registry)
+    soda = restaurant.menu.get_items()["Soda"]
+    restaurant.menu.add_item(MenuItem("Salad", "", 5))
+    salad = restaurant.menu.get_items()["Salad"]
+    customer.place_order(restaurant, {pizza: 1, soda: 1})
+    customer.place_order(restaurant, {pizza: 1, soda: 2})
+    last = customer.place_order(restaurant, {pizza: 1, salad: 1})
+    assert index.neighbors(restaurant, "Pizza") == [("Soda", 2), ("Salad", 1)]
+    assert index.suggest(restaurant, [pizza]) == [(soda, 2), (salad, 1)]
+    assert index.suggest(restaurant, [pizza, soda]) == [(salad, 1)]
+
+    restaurant.order_history.remove_order(last)
+    assert index.neighbors(restaurant, "Pizza") == [("Soda", 2)]
+
+    restaurant.menu.remove_item("Soda")
+    assert index.suggest(restaurant, [pizza]) == []
+
+
+def test_attach_counts_existing_orders(registry, restaurant, customer, pizza):
+    soda = restaurant.menu.get_items()["Soda"]
+    order = customer.place_order(restaurant, {pizza: 1})
+    index = CoOccurrenceIndex()
+    index.attach(registry)
+    assert index.neighbors(restaurant, "Pizza") == []
+    order.set_quantity(soda, 1)
+    assert index.neighbors(restaurant, "Pizza") == [("Soda", 1)]
+    order.set_quantity(soda, 0)
+    assert index.neighbors(restaurant, "Pizza") == []
+
+
+def test_rows_are_pruned_to_capacity(registry, restaurant, customer, pizza):
+    index = CoOccurrenceIndex(k=2, slack=2)
+    index.attach(registry)
+    for n in range(20):
+        restaurant.menu.add_item(MenuItem(f"Side {n}", "", 1))
+        side = restaurant.menu.get_items()[f"Side {n}"]
+        for _ in range(n + 1):
+            customer.place_order(restaurant, {pizza: 1, side: 1})
+        assert len(index.tables[restaurant]["Pizza"]) <= 2 * index.capacity
+    assert index.neighbors(restaurant, "Pizza") == [("Side 19", 20), ("Side 18", 19)]
+    assert index.neighbors(restaurant, "Pizza", limit=5) == index.neighbors(
+        restaurant, "Pizza"
+    )
@@ -0,0 +1,38 @@
+import pytest
+
+from restaurant_core import AccountRegistry, InvalidInputError
+
+
+def test_lookups_ignore_phone_formatting(registry, restaurant, customer):
+    assert registry.find_restaurant("0912-000-0001") is restaurant
+    assert registry.find_restaurant("0912 000 0001") is restaurant
+    assert registry.find_customer("09350000001") is customer
+    assert registry.find_customer("09350000002") is None
+    assert registry.find_restaurant_by_id(restaurant.account_id) is restaurant
+
+
+def test_duplicate_and_invalid_phone_numbers_are_rejected(registry):
+    with pytest.raises(InvalidInputError):
+        registry.create_restaurant("Copy", "9 St", "0912-000-0001")
+    with pytest.raises(InvalidInputError):
+        registry.create_customer("Nobody", "", "---")
+    with pytest.raises(InvalidInputError):
+        registry.find_customer(None)
+
+
+def test_updates_move_the_index_entry(registry, restaurant):
+    registry.update_restaurant(restaurant, contact_info="09129999999")
+    assert registry.find_restaurant("09120000001") is None
+    assert registry.find_restaurant("09129999999") is restaurant
+    other = registry.create_restaurant("Other", "3 St", "09120000001")
+    with pytest.raises(InvalidInputError):
+        registry.update_restaurant(other, contact_info="09129999999")
+    assert registry.find_restaurant("09120000001") is other
+
+
+def test_account_ids_are_unique():
+    registry = AccountRegistry()
+    first = registry.create_customer("A", "", "1")
+    second = registry.create_customer("B", "", "2")
+    assert first.account_id != second.account_id
+    assert registry.get_customers() == [first, second]
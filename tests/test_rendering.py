@@ -0,0 +1,69 @@
+import io
+
+from restaurant_core import MenuItem, OrderEngine, render_orders
+
+
+def place_orders(registry, count):
+    engine = OrderEngine(registry)
+    return [
+        engine.place_order("09350000001", "09120000001", {"Pizza": 1}, 1000 + n * 60)
+        for n in range(count)
+    ]
+
+
+def test_orders_are_rendered_one_page_at_a_time(registry):
+    orders = place_orders(registry, 5)
+    stream = io.StringIO()
+    assert render_orders(iter(orders), stream, 0, 2) == 2
+    assert stream.getvalue().count("Order #") == 2
+    assert f"Order #{orders[0].order_id} " in stream.getvalue()
+    stream = io.StringIO()
+    assert render_orders(iter(orders), stream, 4, 2) is None
+    assert stream.getvalue().count("Order #") == 1
+    assert f"Order #{orders[4].order_id} " in stream.getvalue()
+
+
+def test_report_lists_lines_and_total(registry, restaurant):
+    order = place_orders(registry, 1)[0]
+    order.add_item(restaurant.menu.get_items()["Soda"], 2)
+    stream = io.StringIO()
+    render_orders([order], stream, separator=True)
+    report = stream.getvalue()
+    assert "Pizza - 10.00" in report
+    assert "Soda - 2.00" in report
+    assert "Total price: 14.00" in report
+    assert report.endswith("\n\n")
+
+
+def test_history_view_pages(registry, restaurant):
+    place_orders(registry, 3)
+    history = restaurant.order_history
+    stream = io.StringIO()
+    assert history.view_orders(0, 2, stream) == 2
+    assert history.view_orders(2, 2, io.StringIO()) is None
+    assert stream.getvalue().count("Order #") == 2
+
+
+def test_menu_listing_is_cached_until_the_menu_changes(restaurant):
+    menu = restaurant.menu
+    listing = menu.render()
+    assert listing == "1. Pizza - 10.00\n2. Soda - 2.00\n"
+    assert menu.render() is listing
+    assert menu.render(with_prices=False) == "1. Pizza\n2. Soda\n"
+    menu.add_item(MenuItem("Salad", "", 4.5))
+    menu.update_item("Pizza", "", 11)
+    assert menu.render() == "1. Pizza - 11.00\n2. Soda - 2.00\n3. Salad - 4.50\n"
+    menu.remove_item("Soda")
+    assert menu.render() == "1. Pizza - 11.00\n2. Salad - 4.50\n"
+
+
+def test_removed_item_is_replaced_by_the_last_one(restaurant):
+    menu = restaurant.menu
+    for name in ("Salad", "Soup", "Tea"):
+        menu.add_item(MenuItem(name, "", 1))
+    menu.remove_item("Soda")
+    menu.remove_item("Tea")
+    assert menu.positions == ["Pizza", "Soup", "Salad"]
+    assert menu.indexes == {"Pizza": 0, "Soup": 1, "Salad": 2}
+    assert menu.get_item_at(1).name == "Soup"
+    assert menu.render(with_prices=False) == "1. Pizza\n2. Soup\n3. Salad\n"
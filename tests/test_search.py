@@ -0,0 +1,90 @@
+import time
+
+from restaurant_core import (
+    AccountRegistry,
+    MenuItem,
+    MenuSearchIndex,
+    parse_search_query,
+)
+
+
+def build(*menu):
+    registry = AccountRegistry()
+    index = MenuSearchIndex()
+    index.attach(registry)
+    restaurant = registry.create_restaurant("R", "1 St", "09120000001")
+    for name, description, price in menu:
+        restaurant.menu.add_item(MenuItem(name, description, price))
+    return registry, restaurant, index
+
+
+def names(results):
+    return [item.name for _, item, _ in results]
+
+
+def test_name_matches_rank_above_description_matches():
+    _, _, index = build(
+        ("Garlic Bread", "toasted", 4),
+        ("Pasta", "with garlic", 3),
+        ("Garlic Pizza", "with cheese", 9),
+    )
+    results = index.search("garlic")
+    assert names(results) == ["Garlic Bread", "Garlic Pizza", "Pasta"]
+    assert [score for _, _, score in results] == [2, 2, 1]
+
+
+def test_every_word_must_match_and_cheaper_items_come_first():
+    _, _, index = build(
+        ("Cheese Pizza", "", 12),
+        ("Pizza", "extra cheese", 8),
+        ("Tomato Pizza", "", 7),
+        ("Cheap Cheese Pizza", "", 6),
+    )
+    assert names(index.search("cheese pizza")) == [
+        "Cheap Cheese Pizza",
+        "Cheese Pizza",
+        "Pizza",
+    ]
+    assert names(index.search("cheese pizza", limit=1)) == ["Cheap Cheese Pizza"]
+
+
+def test_price_filters_and_prefixes():
+    _, _, index = build(("Pizza", "", 12), ("Pizzetta", "", 6), ("Soup", "", 5))
+    assert names(index.search("piz under 10")) == ["Pizzetta"]
+    assert names(index.search("pizza between 10 and 15")) == ["Pizza"]
+    assert parse_search_query("soup over 4") == (["soup"], 400, None)
+
+
+def test_out_of_range_price_bounds_are_ignored():
+    _, _, index = build(("Pizza", "", 12), ("Soup", "", 5))
+    huge = "9" * 29
+    assert parse_search_query(f"pizza under {huge}") == (["pizza"], 0, None)
+    assert parse_search_query(f"soup over {huge}") == (["soup"], 0, None)
+    assert parse_search_query(f"between {huge} and 6") == ([], 0, 600)
+    assert names(index.search(f"pizza under {huge}")) == ["Pizza"]
+    assert names(index.search("soup under 99999999999")) == ["Soup"]
+
+
+def test_menu_changes_update_the_index():
+    _, restaurant, index = build(("Pizza", "", 12), ("Soda", "", 2))
+    restaurant.menu.update_item("Pizza", "with basil", 11)
+    restaurant.menu.remove_item("Soda")
+    restaurant.menu.add_item(MenuItem("Basil Soda", "", 3))
+    results = index.search("basil")
+    assert names(results) == ["Basil Soda", "Pizza"]
+    assert results[1][1].price_cents == 1100
+    assert names(index.search("soda")) == ["Basil Soda"]
+
+
+def test_long_queries_stay_fast():
+    words = ["spicy", "chicken", "garlic", "cheese", "tomato", "basil", "cream"]
+    menu = [
+        (f"Dish {n}", " ".join(words[n % 7 :] + words[: n % 7]), n % 50 + 1)
+        for n in range(2000)
+    ]
+    _, _, index = build(*menu)
+    started = time.perf_counter()
+    results = index.search(" ".join(words * 3), limit=5)
+    assert time.perf_counter() - started < 1.0
+    assert len(results) == 5
+    assert [item.price_cents for _, item, _ in results] == [100] * 5
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from restaurant_core import OrderService
+
+
+@pytest.fixture
+def service(registry):
+    return OrderService(registry)
+
+
+ORDER = {
+    "op": "place_order",
+    "customer_phone": "09350000001",
+    "restaurant_phone": "09120000001",
+}
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        "{not json",
+        "[" * 100_000,
+        [1, 2],
+        {"op": 5},
+        {"op": "search", "query": ["pizza"]},
+        {"op": "search", "query": "pizza", "limit": 0},
+        {"op": "search", "query": "pizza", "limit": "5"},
+        {"op": "search", "query": "pizza", "limit": 10**9},
+        {"op": "menu", "restaurant_phone": 912},
+        dict(ORDER, items={"Pizza": -1}),
+        dict(ORDER, items={"Pizza": 1}, created_at="soon"),
+        dict(ORDER, restaurant_phone=["09120000001"], items={"Pizza": 1}),
+        {
+            "op": "add_menu_item",
+            "restaurant_phone": "09120000001",
+            "name": "Pie",
+            "description": 5,
+            "price": 3,
+        },
+    ],
+)
+def test_malformed_requests_return_errors(service, request_):
+    response = service.handle(request_)
+    assert response["ok"] is False
+    assert response["error"]
+
+
+def test_place_order_and_retry(service, restaurant):
+    request = json.dumps(dict(ORDER, items={"Pizza": 2}, idempotency_key="r1"))
+    first = service.handle(request)
+    second = service.handle(request)
+    assert first["ok"] and first["order_id"] == second["order_id"]
+    assert first["total"] == "20.00"
+    assert len(restaurant.order_history.orders) == 1
+    stats = service.handle({"op": "stats"})["idempotency"]
+    assert stats["hits"] == 1
+
+
+def test_search_request(service):
+    response = service.handle({"op": "search", "query": "pizza", "limit": 5})
+    assert response == {"ok": True, "results": [["09120000001", "Pizza", "10.00"]]}
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        '{"op": "add_menu_item", "restaurant_phone": "09120000001",'
+        ' "name": "Pie", "price": NaN}',
+        '{"op": "update_menu_item", "restaurant_phone": "09120000001",'
+        ' "name": "Pizza", "price": Infinity}',
+        '{"op": "place_order", "customer_phone": "09350000001",'
+        ' "restaurant_phone": "09120000001", "items": {"Pizza": 1},'
+        ' "created_at": NaN}',
+        dict(ORDER, items={"Pizza": 1}, created_at=10**400),
+    ],
+)
+def test_non_finite_numbers_return_errors(service, restaurant, request_):
+    response = service.handle(request_)
+    assert response["ok"] is False
+    assert response["error"]
+    assert restaurant.menu.get_items()["Pizza"].price_cents == 1000
+    assert not restaurant.order_history.orders
+
+
+def test_item_tables_lock_per_restaurant(registry, restaurant):
+    other = registry.create_restaurant("Other", "", "09120000002")
+    assert restaurant.item_table.lock is not other.item_table.lock
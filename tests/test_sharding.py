@@ -0,0 +1,64 @@
+import json
+
+from restaurant_core import AccountRegistry, OrderEngine, ShardPool, load_catalog_line
+
+CATALOG = [
+    json.dumps(
+        {
+            "name": f"R{n}",
+            "contact_info": f"091200000{n:02d}",
+            "menu": [{"name": "Pizza", "price": 10}, {"name": "Soda", "price": 2}],
+        }
+    )
+    + "\n"
+    for n in range(6)
+] + ["[1]\n"]
+
+
+def records():
+    lines = []
+    for n in range(60):
+        record = {
+            "customer_phone": f"0935{n % 7:07d}",
+            "restaurant_phone": f"091200000{n % 6:02d}",
+            "items": {"Pizza": n % 3 + 1, "Soda": 1},
+        }
+        if n % 10 == 0:
+            record["items"] = {"Unknown": 1}
+        lines.append((n + 1, json.dumps(record)))
+    return lines
+
+
+def test_sharded_ingest_matches_a_single_process():
+    registry = AccountRegistry()
+    for line_number, line in enumerate(CATALOG, start=1):
+        load_catalog_line(registry, line_number, line)
+    expected = OrderEngine(registry, create_customers=True).ingest(records())
+    with ShardPool(3, CATALOG, create_customers=True) as pool:
+        report = pool.ingest(records(), batch_size=7)
+        assert pool.catalog_errors() == [
+            "Catalog line 7: Catalog record must be an object."
+        ]
+        counts = pool.item_counts()
+        revenue = pool.revenue()
+        single = pool.item_counts("09120000000")
+    assert (report.received, report.applied, report.rejected) == (60, 54, 6)
+    assert (expected.applied, expected.rejected) == (54, 6)
+    assert sorted(report.samples) == sorted(expected.samples)
+    assert counts == {
+        "Pizza": sum(
+            r.order_history.count_item_quantity("Pizza")
+            for r in registry.restaurants.values()
+        ),
+        "Soda": 54,
+    }
+    assert single == dict(
+        registry.find_restaurant("09120000000").order_history.item_quantities
+    )
+    assert revenue == {
+        r.contact_info: (
+            len(r.order_history.orders),
+            sum(order.total_cents for order in r.order_history.orders.values()),
+        )
+        for r in registry.restaurants.values()
+    }
@@ -0,0 +1,123 @@
+import os
+
+from restaurant_core import DataStore, Menu, MenuItem, OrderEngine
+
+
+def state(registry):
+    return sorted(
+        (
+            order.order_id,
+            order.total_cents,
+            [
+                (item.name, quantity, unit_cents)
+                for item, quantity, unit_cents in order.iter_priced_lines()
+            ],
+        )
+        for restaurant in registry.restaurants.values()
+        for order in restaurant.order_history.orders.values()
+    )
+
+
+def populate(registry):
+    restaurant = registry.create_restaurant("R", "1 St", "09120000001")
+    restaurant.menu.add_item(MenuItem("Pizza", "", 10))
+    restaurant.menu.add_item(MenuItem("Soda", "fizzy", 2))
+    registry.create_customer("C", "2 St", "09350000001")
+    engine = OrderEngine(registry)
+    first = engine.place_order("09350000001", "09120000001", {"Pizza": 1})
+    second = engine.place_order("09350000001", "09120000001", {"Pizza": 1, "Soda": 1})
+    return restaurant, engine, first, second
+
+
+def reopen(path):
+    store = DataStore(path, snapshot_every=0)
+    registry = store.open()
+    store.close()
+    return registry
+
+
+def test_log_round_trip(tmp_path):
+    store = DataStore(str(tmp_path), snapshot_every=0)
+    registry = store.open()
+    restaurant, engine, first, second = populate(registry)
+    second.restaurant.order_history.remove_order(second)
+    engine.place_order("09350000001", "09120000001", {"Soda": 3})
+    expected = state(registry)
+    store.close()
+    assert state(reopen(str(tmp_path))) == expected
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = DataStore(str(tmp_path), snapshot_every=0)
+    registry = store.open()
+    restaurant, engine, first, second = populate(registry)
+    store.snapshot()
+    engine.place_order("09350000001", "09120000001", {"Pizza": 2})
+    expected = state(registry)
+    store.close()
+    reopened = reopen(str(tmp_path))
+    assert state(reopened) == expected
+    assert (
+        reopened.find_restaurant("09120000001").menu.version == restaurant.menu.version
+    )
+
+
+def test_replay_with_removed_and_repriced_items(tmp_path):
+    store = DataStore(str(tmp_path), snapshot_every=0)
+    registry = store.open()
+    restaurant, engine, first, second = populate(registry)
+    soda = restaurant.menu.get_items()["Soda"]
+    restaurant.menu.update_item("Pizza", "", 12)
+    restaurant.menu.remove_item("Soda")
+    first.add_item(soda, 1)
+    second.remove_item(soda, 1)
+    second.add_item(soda, 2)
+    first.add_item(restaurant.menu.get_items()["Pizza"], 1)
+    expected = state(registry)
+    store.close()
+    assert state(reopen(str(tmp_path))) == expected
+    store = DataStore(str(tmp_path), snapshot_every=0)
+    store.open()
+    store.snapshot()
+    store.close()
+    assert state(reopen(str(tmp_path))) == expected
+
+
+def test_replay_after_menu_replacement(tmp_path):
+    store = DataStore(str(tmp_path), snapshot_every=0)
+    registry = store.open()
+    restaurant, engine, first, second = populate(registry)
+    soda = restaurant.menu.get_items()["Soda"]
+    menu = Menu()
+    menu.add_item(MenuItem("Pizza", "", 11))
+    restaurant.update_menu(menu)
+    first.add_item(soda, 2)
+    expected = state(registry)
+    store.close()
+    assert state(reopen(str(tmp_path))) == expected
+
+
+def test_background_snapshot(tmp_path):
+    store = DataStore(str(tmp_path), group_commit=0, snapshot_every=20)
+    registry = store.open()
+    restaurant, engine, first, second = populate(registry)
+    for _ in range(100):
+        engine.place_order("09350000001", "09120000001", {"Pizza": 1})
+    store.wait()
+    expected = state(registry)
+    store.close()
+    segments = [name for name in os.listdir(tmp_path) if name.startswith("wal-")]
+    assert "snapshot.json" in os.listdir(tmp_path)
+    assert len(segments) <= 2
+    assert state(reopen(str(tmp_path))) == expected
+
+
+def test_partial_last_record_is_discarded(tmp_path):
+    store = DataStore(str(tmp_path), snapshot_every=0)
+    registry = store.open()
+    populate(registry)
+    expected = state(registry)
+    store.close()
+    with open(os.path.join(tmp_path, "wal-000001.log"), "a") as f:
+        f.write('["O+", 1, 99')
+    assert state(reopen(str(tmp_path))) == expected
@@ -0,0 +1,47 @@
+import pytest
+
+from restaurant_core import InvalidInputError, OrderEngine, TrendingTracker
+
+NOW = 1_000_000
+
+
+def place(registry, items, created_at):
+    return OrderEngine(registry).place_order(
+        "09350000001", "09120000001", items, created_at
+    )
+
+
+def test_windows_rank_recent_items(registry, restaurant):
+    tracker = TrendingTracker()
+    tracker.attach(registry, now=NOW)
+    place(registry, {"Soda": 5}, NOW - 3600)
+    place(registry, {"Pizza": 2}, NOW - 60)
+    assert tracker.top(900, now=NOW) == [("Pizza", 2)]
+    assert tracker.top(86400, now=NOW) == [("Soda", 5), ("Pizza", 2)]
+    assert tracker.top(86400, restaurant=restaurant, now=NOW) == [
+        ("Soda", 5),
+        ("Pizza", 2),
+    ]
+    assert tracker.top(86400, n=1, now=NOW) == [("Soda", 5)]
+    assert tracker.top(900, now=NOW + 1000) == []
+    with pytest.raises(InvalidInputError):
+        tracker.top(60)
+
+
+def test_removed_and_changed_orders(registry, restaurant, pizza):
+    tracker = TrendingTracker()
+    tracker.attach(registry, now=NOW)
+    order = place(registry, {"Pizza": 3}, NOW - 10)
+    order.set_quantity(pizza, 1)
+    assert tracker.top(900, now=NOW) == [("Pizza", 1)]
+    restaurant.order_history.remove_order(order)
+    assert tracker.top(900, now=NOW) == []
+
+
+def test_attach_replays_recent_history(registry, restaurant):
+    place(registry, {"Pizza": 1}, NOW - 2 * 86400)
+    place(registry, {"Soda": 4}, NOW - 100)
+    tracker = TrendingTracker()
+    tracker.attach(registry, now=NOW)
+    assert tracker.top(86400, now=NOW) == [("Soda", 4)]
+    assert not tracker.windows[900].add((0,), 1, NOW - 86400)